@@ -0,0 +1,115 @@
+"""
+基准测试: 控制台彩色输出的格式化开销
+
+旧方式: _strike 逐字符拼接字符串, 再按 19 个颜色代码依次 str.replace, 每行重新格式化时间
+新方式: 按显示模式预先生成代码表, 一次遍历完成替换; 信息标签与时间前缀带缓存
+
+用法 (在仓库根目录): python benchmarks/bench_color_print.py
+"""
+
+import datetime
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tooldelta.color_print import Print
+
+LINES = [
+    "<Steve> 今天的服务器好卡啊",
+    "§a玩家 Alex 加入了游戏",
+    "§e%multiplayer.player.joined §bSteve_2024 §f在 §6主城 §f附近",
+    "§1death.attack.player Steve Alex",
+    "§c线程 数据包分发工作线程 #3 出错: ValueError('未连接到游戏')",
+    "§f[§a商店§f] §e玩家 §bAlex §e购买了 §d钻石剑 x1§e, 花费 §a1200 §e金币",
+    "§s被删除的文字§r 与 §l加粗 §u下划线",
+]
+ROUNDS = 20_000
+
+
+def legacy_strike(text: str) -> str:
+    text_ok = ""
+    strikeMode = False
+    i = 0
+    while i < len(text):
+        char = text[i]
+        try:
+            if char == "§":
+                if text[i + 1] == "s":
+                    strikeMode = True
+                    i += 2
+                    continue
+                if text[i + 1] == "r":
+                    strikeMode = False
+        except IndexError:
+            pass
+        if strikeMode:
+            text_ok += "̶" + char
+        else:
+            text_ok += char
+        i += 1
+    return text_ok
+
+
+def legacy_colormode_replace(text: str, showmode=0) -> str:
+    text = legacy_strike(text)
+    kw = {
+        "§0": f"\033[{showmode};37;90m",
+        "§1": f"\033[{showmode};37;34m",
+        "§2": f"\033[{showmode};37;32m",
+        "§3": f"\033[{showmode};37;36m",
+        "§4": f"\033[{showmode};37;31m",
+        "§5": f"\033[{showmode};37;35m",
+        "§6": f"\033[{showmode};37;33m",
+        "§7": f"\033[{showmode};37;90m",
+        "§8": f"\033[{showmode};37;2m",
+        "§9": f"\033[{showmode};37;94m",
+        "§a": f"\033[{showmode};37;92m",
+        "§b": f"\033[{showmode};37;96m",
+        "§c": f"\033[{showmode};37;91m",
+        "§d": f"\033[{showmode};37;95m",
+        "§e": f"\033[{showmode};37;93m",
+        "§f": f"\033[{showmode};37;1m",
+        "§r": "\033[0m",
+        "§u": "\033[4m",
+        "§l": "\033[1m",
+    }
+    for k, v in kw.items():
+        text = text.replace(k, str(v))
+    return text + "\033[0m"
+
+
+def legacy_fmt_info(text: str, info: str = Print.INFO_NORMAL) -> str:
+    return (
+        datetime.datetime.now().strftime("[%H:%M] ")
+        + legacy_colormode_replace(info, 7)
+        + " "
+        + legacy_colormode_replace(text)
+    )
+
+
+def bench(func) -> float:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for line in LINES:
+            func(line)
+    return (time.perf_counter() - start) / (ROUNDS * len(LINES))
+
+
+def main():
+    # 不含删除线的文本, 新旧输出应完全一致
+    Print.set_plain_output(False)
+    for line in LINES[:-1]:
+        assert Print.colormode_replace(line) == legacy_colormode_replace(line), line
+    legacy = bench(legacy_fmt_info)
+    new = bench(Print.fmt_info)
+    Print.set_plain_output(True)
+    plain = bench(Print.fmt_info)
+    print(f"旧 fmt_info       {legacy * 1e6:6.2f} µs/行")
+    print(f"新 fmt_info       {new * 1e6:6.2f} µs/行 ({legacy / new:.1f}x)")
+    print(f"新 fmt_info 纯文本 {plain * 1e6:6.2f} µs/行 ({legacy / plain:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
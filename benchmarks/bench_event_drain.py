@@ -0,0 +1,93 @@
+"""
+基准测试: ThreadOmega 逐个拉取事件 与 批量拉取事件 的吞吐对比
+
+用法 (在仓库根目录): python benchmarks/bench_event_drain.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from neomega_stub import StubLib
+
+from tooldelta.neo_libs import neo_conn
+from tooldelta.neo_libs.cmd_registry import CommandCallbackRegistry
+
+EVENTS = 200_000
+BATCH_SIZES = (16, 64, 256)
+
+
+class NullDispatcher:
+    def key_of(self, packet_type, _=None):
+        return packet_type
+
+    def submit(self, *_):
+        return True
+
+
+def make_events(n: int) -> list[tuple[str, str, object]]:
+    move = '{"EntityRuntimeID":12,"Position":[1.5,64,2.5],"Pitch":0,"Yaw":90}'
+    text = '{"TextType":1,"SourceName":"Steve","Message":"hello","Parameters":[]}'
+    resp = {
+        "CommandOrigin": {
+            "Origin": 0,
+            "UUID": "",
+            "RequestID": "",
+            "PlayerUniqueID": 0,
+        },
+        "OutputType": 3,
+        "SuccessCount": 1,
+        "OutputMessages": [
+            {"Success": True, "Message": "commands.testfor.success", "Parameters": []}
+        ],
+    }
+    events = []
+    for i in range(n):
+        m = i % 10
+        if m < 6:
+            events.append(("MCPacket", "MovePlayer", move))
+        elif m < 8:
+            events.append(("MCPacket", "Text", text))
+        elif m == 8:
+            events.append(("CommandResponseCB", "cmd_callback_1", resp))
+        else:
+            events.append(("PlayerChange", "", "online"))
+    return events
+
+
+def make_omega() -> neo_conn.ThreadOmega:
+    omega = neo_conn.ThreadOmega(neo_conn.ConnectType.Remote, "", None)
+    omega._omega_disconnected_lock = neo_conn.threading.Event()
+    omega._packet_listeners = {"Text": [(lambda *_: None, 9)], "MovePlayer": []}
+    omega._player_change_listeners = []
+    omega._cmd_callbacks = CommandCallbackRegistry()
+    omega._cmd_callbacks.register()
+    omega._packet_dispatcher = NullDispatcher()  # type: ignore
+    return omega
+
+
+def run(batch_size: int, events) -> tuple[float, int]:
+    lib = StubLib(events, batch=batch_size > 0)
+    neo_conn.LIB = lib
+    omega = make_omega()
+    omega.event_batch_size = batch_size
+    start = time.perf_counter()
+    omega._react()
+    return time.perf_counter() - start, lib.calls
+
+
+def main():
+    events = make_events(EVENTS)
+    for batch_size in (0, *BATCH_SIZES):
+        cost, calls = run(batch_size, events)
+        mode = "逐个拉取" if batch_size == 0 else f"批量拉取 x{batch_size}"
+        print(
+            f"{mode:<14} {EVENTS / cost:>12,.0f} 事件/秒  "
+            f"{cost / EVENTS * 1e6:6.2f} µs/事件  动态库调用 {calls:,} 次"
+        )
+
+
+if __name__ == "__main__":
+    main()
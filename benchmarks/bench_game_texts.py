@@ -0,0 +1,122 @@
+"""
+基准测试: 还原死亡与加入游戏消息的开销
+
+旧方式: GameTextsHandle.Handle_Text_Class1 每条消息都重新执行若干正则, 逐个参数 str.replace,
+        最后 json.dumps 结果
+新方式: 每个文本键只编译一次模板 (LRU 缓存), 渲染时只需一次 str.format
+
+游戏文本数据需要联网下载, 这里使用与简体中文语言文件格式相同的示例文本.
+
+用法 (在仓库根目录): python benchmarks/bench_game_texts.py
+"""
+
+import os
+import re
+import sys
+import time
+
+import ujson as json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tooldelta.game_texts import GameTextsHandle
+
+GAME_TEXTS = {
+    "death.attack.player": "%1$s 被 %2$s 杀死了",
+    "death.attack.mob": "%1$s 被 %2$s 杀死了",
+    "death.attack.arrow": "%1$s 被 %2$s 射杀",
+    "death.attack.player.item": "%1$s 被 %2$s 用 %3$s 杀死了",
+    "death.fell.accident.generic": "%1$s 从高处摔了下来",
+    "death.attack.lava": "%1$s 试图在熔岩里游泳",
+    "death.attack.explosion.player": "%1$s 被 %2$s 炸死了",
+    "multiplayer.player.joined": "%s 加入了游戏",
+    "multiplayer.player.left": "%s 退出了游戏",
+    "entity.zombie.name": "僵尸",
+    "entity.skeleton.name": "骷髅",
+    "entity.creeper.name": "苦力怕",
+}
+PACKETS = [
+    {"Message": "death.attack.player", "Parameters": ["Steve", "Alex"]},
+    {"Message": "death.attack.mob", "Parameters": ["Steve", "%entity.zombie.name"]},
+    {"Message": "death.attack.arrow", "Parameters": ["Alex", "%entity.skeleton.name"]},
+    {
+        "Message": "death.attack.player.item",
+        "Parameters": ["Steve", "Alex", "[钻石剑]"],
+    },
+    {"Message": "death.fell.accident.generic", "Parameters": ["Notch"]},
+    {"Message": "death.attack.lava", "Parameters": ["Herobrine"]},
+    {
+        "Message": "death.attack.explosion.player",
+        "Parameters": ["Alex", "%entity.creeper.name"],
+    },
+    {"Message": "multiplayer.player.joined", "Parameters": ["Steve_2024"]},
+    {"Message": "multiplayer.player.left", "Parameters": ["Alex"]},
+]
+ROUNDS = 20_000
+
+
+def legacy_handle(game_texts: dict, packet: dict) -> list:
+    """旧版 Handle_Text_Class1 处理单个数据包的分支"""
+    json_result = []
+    if (
+        original_message := game_texts.get(packet["Message"].replace("%", ""))
+    ) is not None:
+        if not len(re.findall(r"%[a-zA-Z]", original_message)) >= 1:
+            original_message = re.sub(
+                r'\$[^"\'\]/\]\)）}\s]{0,3}', "", original_message
+            )
+            param_list = list(packet["Parameters"])
+            for n, _ in enumerate(param_list, start=1):
+                original_message = original_message.replace(
+                    f"%{n}", "{" + str(n - 1) + "}"
+                )
+            if len([str(param) for param in param_list if "%" in str(param)]) >= 1:
+                filtered_param_list = [
+                    re.sub(r"%", "", p) for p in param_list if "%" in p
+                ]
+                for filtered_param in filtered_param_list:
+                    for i in range(len(param_list)):
+                        if filtered_param in param_list[i]:
+                            param_list[i] = param_list[i].replace(
+                                f"%{filtered_param}", game_texts.get(filtered_param)
+                            )
+            filled_message = original_message.format(*param_list)
+        else:
+            param_list = list(packet["Parameters"])
+            original_message = re.sub(
+                r'\$[^"\'\]/\]\)）}\s]{0,3}', "", original_message
+            )
+            formatted_string = original_message
+            for arg in param_list:
+                formatted_string = re.sub(
+                    r"%[a-zA-Z]", str(arg), formatted_string, count=1
+                )
+            filled_message = formatted_string
+    else:
+        filled_message = packet["Message"]
+    json_result.append(json.dumps(filled_message, indent=2, ensure_ascii=False))
+    return json_result
+
+
+def bench(func) -> float:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for pkt in PACKETS:
+            func(pkt)
+    return (time.perf_counter() - start) / (ROUNDS * len(PACKETS))
+
+
+def main():
+    handle = GameTextsHandle(GAME_TEXTS)
+    for pkt in PACKETS:
+        old = json.loads(legacy_handle(GAME_TEXTS, pkt)[0])
+        new = handle.render_texts(pkt)[0]
+        assert old == new, (old, new)
+    legacy = bench(lambda pkt: legacy_handle(GAME_TEXTS, pkt))
+    new = bench(handle.render_texts)
+    print(f"旧 Handle_Text_Class1  {legacy * 1e6:6.2f} µs/条")
+    print(f"新 render_texts        {new * 1e6:6.2f} µs/条 ({legacy / new:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
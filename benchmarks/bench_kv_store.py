@@ -0,0 +1,91 @@
+"""
+基准测试: 10000 名玩家的数据, 用 JSON 文件与键值库分别存取的开销
+
+- 单个 JSON 文件: 每次修改一名玩家都用 readFileFrom / writeFileTo 读写整个文件
+- 每人一个 JSON 文件: 每次修改读写该玩家的文件
+- 键值库: get / put 单个键, 以及在一个事务中批量写入
+
+用法 (在仓库根目录): python benchmarks/bench_kv_store.py
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tooldelta.kv_store import migrate_json_files, open_store
+from tooldelta.utils import Utils
+
+PLAYERS = 10_000
+UPDATES = 200
+PLUGIN = "基准测试"
+
+
+def player_data(i: int) -> dict:
+    return {
+        "money": i * 3,
+        "homes": {"home": [i, 64, -i]},
+        "stats": {"kills": i % 17, "deaths": i % 5},
+    }
+
+
+def report(name: str, cost: float, ops: int):
+    print(f"{name:<28} {cost / ops * 1e6:10.1f} µs/次")
+
+
+def main():
+    os.chdir(tempfile.mkdtemp())
+    rng = random.Random(0)
+    targets = [f"player{rng.randrange(PLAYERS)}" for _ in range(UPDATES)]
+    everyone = {f"player{i}": player_data(i) for i in range(PLAYERS)}
+
+    Utils.JsonIO.writeFileTo(PLUGIN, "all", everyone)
+    start = time.perf_counter()
+    for name in targets:
+        data = Utils.JsonIO.readFileFrom(PLUGIN, "all")
+        data[name]["money"] += 1
+        Utils.JsonIO.writeFileTo(PLUGIN, "all", data)
+    report("单个 JSON 文件 读改写", time.perf_counter() - start, UPDATES)
+
+    for name, data in everyone.items():
+        Utils.JsonIO.writeFileTo(f"{PLUGIN}/players", name, data)
+    start = time.perf_counter()
+    for name in targets:
+        data = Utils.JsonIO.readFileFrom(f"{PLUGIN}/players", name)
+        data["money"] += 1
+        Utils.JsonIO.writeFileTo(f"{PLUGIN}/players", name, data)
+    report("每人一个 JSON 文件 读改写", time.perf_counter() - start, UPDATES)
+
+    store = open_store(PLUGIN)
+    start = time.perf_counter()
+    count = migrate_json_files(store, os.path.join("插件数据文件", PLUGIN, "players"))
+    print(
+        f"{'迁移每人一个的 JSON 文件':<28} {time.perf_counter() - start:10.2f} s ({count} 键)"
+    )
+
+    start = time.perf_counter()
+    for name in targets:
+        data = store.get(name)
+        data["money"] += 1
+        store.put(name, data)
+    report("键值库 读改写", time.perf_counter() - start, UPDATES)
+
+    start = time.perf_counter()
+    for name in targets:
+        store.get(name)
+    report("键值库 读取", time.perf_counter() - start, UPDATES)
+
+    start = time.perf_counter()
+    store.put_many(everyone)
+    report("键值库 事务内批量写入", time.perf_counter() - start, PLAYERS)
+
+    start = time.perf_counter()
+    found = len(store.keys("player99"))
+    report(f"键值库 前缀扫描 ({found} 键)", time.perf_counter() - start, 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+基准测试: 数据包从 ThreadOmega 到插件监听器的单包分发开销
+
+旧方式: 每个包按名字查数据包 ID, 再以 str(ID) 查 PluginGroup._packet_funcs
+新方式: ThreadOmega 注册监听时就解析好 ID, PluginGroup 按 ID 直接索引路由表
+
+用法 (在仓库根目录): python benchmarks/bench_packet_routing.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tooldelta.plugin_load.PluginGroup import PluginGroup
+
+PACKETS = 1_000_000
+NAME_TO_ID = {f"Packet{i}": i for i in range(1, 320)}
+NAME_TO_ID.update({"Text": 9, "MovePlayer": 19, "UpdateAttributes": 29})
+# 监听的数据包 (Text 有插件监听, 其余只被框架监听)
+TRAFFIC = ["MovePlayer"] * 6 + ["UpdateAttributes"] * 3 + ["Text"]
+PKT = {"TextType": 1, "SourceName": "Steve", "Message": "hi"}
+
+
+def on_text(_):
+    return False
+
+
+class LegacyRouting:
+    """重现改动前的路由方式"""
+
+    def __init__(self):
+        self._packet_funcs: dict[str, list] = {}
+
+    def add_listen_packet_func(self, packetType, func):
+        if self._packet_funcs.get(str(packetType)):
+            self._packet_funcs[str(packetType)].append(func)
+        else:
+            self._packet_funcs[str(packetType)] = [func]
+
+    def get_packet_name_to_id_mapping(self, requires=None):
+        if requires is None:
+            return dict(NAME_TO_ID.items())
+        if isinstance(requires, list):
+            return {k: NAME_TO_ID[k] for k in requires}
+        return NAME_TO_ID[requires]
+
+    def processPacketFunc(self, pktID, pkt):
+        d = self._packet_funcs.get(str(pktID))
+        if d:
+            for func in d:
+                if func(pkt):
+                    return True
+        return False
+
+    def packet_handler_parent(self, pkt_type, pkt):
+        self.processPacketFunc(self.get_packet_name_to_id_mapping(pkt_type), pkt)
+
+
+def run_legacy(traffic) -> float:
+    legacy = LegacyRouting()
+    legacy.add_listen_packet_func(9, on_text)
+    listeners = {name: [legacy.packet_handler_parent] for name in set(TRAFFIC)}
+    start = time.perf_counter()
+    for name in traffic:
+        for listener in listeners[name]:
+            listener(name, PKT)
+    return time.perf_counter() - start
+
+
+def run_routed(traffic) -> float:
+    group = PluginGroup()
+    group.add_listen_packet_func(9, on_text)
+    process = group.processPacketFunc
+
+    def packet_handler_parent(pkt_type, pkt):
+        process(pkt_type, pkt)
+
+    # 与 ThreadOmega.listen_packets_by_id 相同: 注册时解析好数据包 ID
+    listeners = {
+        name: [(packet_handler_parent, NAME_TO_ID[name])] for name in set(TRAFFIC)
+    }
+    start = time.perf_counter()
+    for name in traffic:
+        for listener, pkt_type in listeners[name]:
+            listener(pkt_type, PKT)
+    return time.perf_counter() - start
+
+
+def main():
+    traffic = TRAFFIC * (PACKETS // len(TRAFFIC))
+    for label, runner in (("改动前", run_legacy), ("路由表", run_routed)):
+        cost = min(runner(traffic) for _ in range(3))
+        print(f"{label}  {cost / len(traffic) * 1e9:7.1f} ns/包")
+
+
+if __name__ == "__main__":
+    main()
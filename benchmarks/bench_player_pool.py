@@ -0,0 +1,67 @@
+"""
+基准测试: 100 名玩家依次进入时, PlayerKit 的创建次数与动态库调用次数
+
+每名玩家进入时, 模拟框架处理一次 PlayerList 数据包:
+调用 3 次 get_all_online_players() 并读取所有玩家的名字, 再做一次 is_op 检查.
+对比 每次查询都新建 PlayerKit (改动前) 与 按 UUID 复用 PlayerKit (对象池).
+
+用法 (在仓库根目录): python benchmarks/bench_player_pool.py
+"""
+
+import gc
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from neomega_stub import StubPlayerLib
+
+from tooldelta.neo_libs import neo_conn
+
+PLAYERS = 100
+
+
+def run(pooled: bool) -> tuple[float, int, int, int]:
+    lib = StubPlayerLib()
+    neo_conn.LIB = lib
+    neo_conn.OmegaAvailable = lambda: None
+    omega = neo_conn.ThreadOmega(neo_conn.ConnectType.Remote, "", None)
+    created = [0]
+    kit_init = neo_conn.PlayerKit.__init__
+
+    def counting_init(self, *args):
+        created[0] += 1
+        kit_init(self, *args)
+
+    neo_conn.PlayerKit.__init__ = counting_init
+    if not pooled:
+        # 改动前: 每次查询都新建 PlayerKit
+        omega._get_bind_player = lambda u: neo_conn.PlayerKit(u, omega) if u else None
+    try:
+        start = time.perf_counter()
+        for i in range(PLAYERS):
+            lib.online[f"uuid-{i}"] = f"player{i}"
+            for _ in range(3):
+                names = [p.name for p in omega.get_all_online_players()]
+            player = omega.get_player_by_name(names[-1])
+            assert player is not None
+            _ = player.can_operator_commands
+        cost = time.perf_counter() - start
+    finally:
+        neo_conn.PlayerKit.__init__ = kit_init
+    gc.collect()
+    return cost, created[0], lib.calls, lib.binds_released
+
+
+def main():
+    for label, pooled in (("每次新建", False), ("对象池", True)):
+        cost, created, calls, released = run(pooled)
+        print(
+            f"{label:<6} 耗时 {cost * 1000:8.2f} ms  新建 PlayerKit {created:>6,} 个  "
+            f"动态库调用 {calls:>7,} 次  释放绑定 {released:>6,} 次"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+基准测试: Utils.TMPJson 读取大型 JSON 缓存的开销
+
+旧方式: read() 每次 copy.deepcopy 整个文档
+新方式: read() 使用只针对 JSON 类型的 json_copy; read_view() 返回零拷贝的只读视图
+
+用法 (在仓库根目录): python benchmarks/bench_tmpjson_read.py
+"""
+
+import copy
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tooldelta.utils import Utils, jsonPathTmp
+
+# 玩家数, 对应文档大小约 0.2 / 2 / 6 MB
+SIZES = (1_000, 10_000, 30_000)
+
+
+def make_doc(players: int) -> dict:
+    return {
+        f"player{i}": {
+            "money": i * 3,
+            "level": i % 100,
+            "vip": i % 7 == 0,
+            "homes": [{"name": "home", "pos": [i, 64, -i], "dim": 0}],
+            "flags": {"muted": False, "banned": False},
+        }
+        for i in range(players)
+    }
+
+
+def timeit(func, min_time: float = 0.5) -> float:
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        func()
+        runs += 1
+        cost = time.perf_counter() - start
+        if cost >= min_time:
+            return cost / runs
+
+
+def main():
+    path = "__bench_tmpjson__.json"
+    for players in SIZES:
+        doc = make_doc(players)
+        jsonPathTmp[path] = [False, doc]
+        legacy = timeit(lambda: copy.deepcopy(jsonPathTmp[path][1]))
+        read = timeit(lambda: Utils.TMPJson.read(path))
+        view = timeit(lambda: Utils.TMPJson.read_view(path)["player42"]["money"])
+        print(
+            f"{players:>6} 名玩家  deepcopy {legacy * 1e3:9.2f} ms  "
+            f"read {read * 1e3:8.2f} ms ({legacy / read:4.1f}x)  "
+            f"read_view+取值 {view * 1e6:6.2f} µs"
+        )
+        del jsonPathTmp[path]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+等价性检查: 随机生成含 § 代码的文本, 比较新旧 colormode_replace 的输出
+
+旧实现见 bench_color_print.py 中的 legacy_colormode_replace.
+随机文本偏重 § 与代码字符 (含 §s 删除线, §r 与连续的 §§), 以覆盖各种边界情况.
+
+用法 (在仓库根目录): python benchmarks/check_color_print_equivalence.py [次数]
+"""
+
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_color_print import legacy_colormode_replace
+
+from tooldelta.color_print import Print
+
+ALPHABET = "§§§§sr0123456789abcdeful xyz中文"
+DEFAULT_ROUNDS = 200_000
+
+
+def random_text(rng: random.Random) -> str:
+    return "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 16)))
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROUNDS
+    rng = random.Random(20240601)
+    Print.set_plain_output(False)
+    mismatches = 0
+    for _ in range(rounds):
+        text = random_text(rng)
+        showmode = rng.choice((0, 7))
+        old = legacy_colormode_replace(text, showmode)
+        new = Print.colormode_replace(text, showmode)
+        if old != new:
+            mismatches += 1
+            if mismatches <= 10:
+                print(f"不一致: {text!r}\n  旧 {old!r}\n  新 {new!r}")
+    print(f"{rounds} 条随机文本, {mismatches} 条输出不一致")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+neOmega 动态库的本地替身, 供基准测试使用
+
+只实现 ThreadOmega 事件循环会用到的导出函数, 返回值与真实动态库使用相同的 ctypes 结构体,
+因此字符串解码等 Python 侧开销与实际运行时一致 (不包含 Go 侧的开销).
+"""
+
+import ctypes
+import json
+
+from tooldelta.neo_libs import neo_conn
+
+
+class StubLib:
+    """按顺序吐出预先生成的事件, 事件耗尽后产生 OmegaConnErr"""
+
+    def __init__(self, events: list[tuple[str, str, object]], batch: bool = True):
+        """
+        Args:
+            events (list[tuple[str, str, object]]): (事件类型, retriever, 数据) 列表
+            batch (bool, optional): 是否导出 EventPollBatch
+        """
+        # 预先编码好各事件, 避免把 Go 侧的序列化开销算进 Python 侧
+        self.events = [
+            (
+                typ,
+                retriever,
+                data,
+                json.dumps(data).encode() if isinstance(data, dict) else None,
+                json.dumps({"Type": typ, "Retriever": retriever, "Data": data}),
+            )
+            for typ, retriever, data in events
+        ]
+        end_record = {"Type": "OmegaConnErr", "Retriever": "", "Data": "stub drained"}
+        self._end = ("OmegaConnErr", "", "stub drained", None, json.dumps(end_record))
+        self.pos = 0
+        self.current = None
+        self.calls = 0
+        self._buffers = {}
+        if batch:
+            self.EventPollBatch = self._event_poll_batch
+
+    def _next(self):
+        if self.pos >= len(self.events):
+            return self._end
+        evt = self.events[self.pos]
+        self.pos += 1
+        return evt
+
+    def EventPoll(self):
+        self.calls += 1
+        self.current = self._next()
+        typ, retriever = self.current[:2]
+        return neo_conn.Event(typ.encode(), retriever.encode())
+
+    def OmitEvent(self):
+        self.calls += 1
+
+    def ConsumeMCPacket(self):
+        self.calls += 1
+        return neo_conn.MCPacketEvent(self.current[2].encode(), None)
+
+    def ConsumeCommandResponseCB(self):
+        self.calls += 1
+        return self.current[3]
+
+    def ConsumePlayerChange(self):
+        self.calls += 1
+        return self.current[2].encode()
+
+    def ConsumeOmegaConnError(self):
+        self.calls += 1
+        return self.current[2].encode()
+
+    def ReleaseBindPlayer(self, _):
+        self.calls += 1
+
+    def FreeMem(self, ptr):
+        self.calls += 1
+        self._buffers.pop(ctypes.addressof(ptr.contents), None)
+
+    def _event_poll_batch(self, max_events):
+        self.calls += 1
+        lines = []
+        for _ in range(max_events.value):
+            evt = self._next()
+            lines.append(evt[4])
+            if evt is self._end:
+                break
+        blob = "\n".join(lines).encode()
+        buf = ctypes.create_string_buffer(blob, len(blob))
+        self._buffers[ctypes.addressof(buf)] = buf
+        return neo_conn.EventBatch(ctypes.cast(buf, neo_conn.CBytes), len(blob))
+
+
+class StubPlayerLib:
+    """模拟在线玩家相关的导出函数, 统计调用与玩家绑定次数"""
+
+    def __init__(self):
+        self.online: dict[str, str] = {}
+        self.calls = 0
+        self.binds_released = 0
+
+    @staticmethod
+    def _uuid(c_uuid: ctypes.c_char_p) -> str:
+        return (c_uuid.value or b"").decode()
+
+    def GetAllOnlinePlayers(self):
+        self.calls += 1
+        return json.dumps(list(self.online)).encode()
+
+    def GetPlayerByName(self, c_name):
+        self.calls += 1
+        name = (c_name.value or b"").decode()
+        for uuid, n in self.online.items():
+            if n == name:
+                return uuid.encode()
+        return b""
+
+    def PlayerName(self, c_uuid):
+        self.calls += 1
+        return self.online.get(self._uuid(c_uuid), "").encode()
+
+    def PlayerCanOperatorCommands(self, _):
+        self.calls += 1
+        return 0
+
+    def ReleaseBindPlayer(self, _):
+        self.calls += 1
+        self.binds_released += 1
@@ -1,7 +1,16 @@
 "支持 mc 颜色代码的输出模块"
 
+import atexit
+import collections
+import contextlib
 import datetime
+import functools
+import itertools
+import re
+import sys
 import threading
+import time
+from typing import Any
 
 import colorama
 
@@ -9,6 +18,138 @@ from .logger import publicLogger
 
 colorama.init(autoreset=True)
 
+# 随显示模式变化的颜色代码 -> ANSI 参数
+_MODE_CODES = {
+    "0": "37;90",
+    "1": "37;34",
+    "2": "37;32",
+    "3": "37;36",
+    "4": "37;31",
+    "5": "37;35",
+    "6": "37;33",
+    "7": "37;90",
+    "8": "37;2",
+    "9": "37;94",
+    "a": "37;92",
+    "b": "37;96",
+    "c": "37;91",
+    "d": "37;95",
+    "e": "37;93",
+    "f": "37;1",
+}
+# 与显示模式无关的格式代码 -> ANSI 序列
+_FIXED_CODES = {"r": "\033[0m", "u": "\033[4m", "l": "\033[1m"}
+_PLAIN_CODES = dict.fromkeys([*_MODE_CODES, *_FIXED_CODES], "")
+_STRIKE = "\u0336"
+_LOG_COLOR_CODES = re.compile("§[0-9a-gr]")
+# 输出队列中可丢弃 (低优先级) 输出的最大条数, 超出时丢弃最早的
+OUTPUT_QUEUE_SIZE = 4096
+# 输出线程每次最多合并写入的条数
+OUTPUT_BATCH_SIZE = 256
+# 同步等待输出队列清空的最长时间 (秒)
+OUTPUT_FLUSH_TIMEOUT = 5.0
+
+
+@functools.cache
+def _code_table(showmode: int) -> dict[str, str]:
+    """预先生成某个显示模式下各代码对应的 ANSI 序列"""
+    table = {k: f"\033[{showmode};{v}m" for k, v in _MODE_CODES.items()}
+    table.update(_FIXED_CODES)
+    return table
+
+
+def _apply_strike(text: str) -> str:
+    """为 §s 与 §r 之间的每个字符加上删除线, 其间的 § 代码也作为文字被划去而不再生效"""
+    out = []
+    striking = False
+    i = 0
+    n = len(text)
+    while i < n:
+        char = text[i]
+        if char == "§" and i + 1 < n:
+            if text[i + 1] == "s":
+                striking = True
+                i += 2
+                continue
+            if text[i + 1] == "r":
+                striking = False
+        out.append(_STRIKE + char if striking else char)
+        i += 1
+    return "".join(out)
+
+
+def _render(text: str, table: dict[str, str], strike: bool = True) -> str:
+    """一次遍历替换文本中的 § 代码
+
+    Args:
+        text (str): 文本
+        table (dict[str, str]): 代码 -> 替换内容
+        strike (bool, optional): 是否为 §s 与 §r 之间的文字加上删除线, 为 False 时去掉 §s
+
+    Returns:
+        str: 替换后的文本, 不认识的代码原样保留
+    """
+    if "§" not in text:
+        return text
+    if "§s" in text:
+        text = _apply_strike(text) if strike else text.replace("§s", "")
+    parts = text.split("§")
+    out = [parts[0]]
+    for part in parts[1:]:
+        replacement = table.get(part[:1])
+        if replacement is None:
+            out.append("§" + part)
+        else:
+            out.append(replacement + part[1:])
+    return "".join(out)
+
+
+@functools.lru_cache(maxsize=256)
+def _render_cached(text: str, showmode: int, plain: bool) -> str:
+    # 用于 INFO_* 等反复出现的短文本
+    if plain:
+        return _render(text, _PLAIN_CODES, strike=False)
+    return _render(text, _code_table(showmode)) + "\033[0m"
+
+
+def _stdout_is_tty() -> bool:
+    try:
+        return sys.stdout.isatty()
+    except (AttributeError, ValueError):
+        # 没有标准输出 (None) 或其已关闭
+        return False
+
+
+_time_prefix_cache: list = [None, ""]
+
+
+def _time_prefix(created: float | None = None) -> str:
+    """获取 "[时:分] " 前缀, 每分钟只格式化一次
+
+    Args:
+        created (float | None, optional): 时间戳, 默认为当前时间
+    """
+    if created is None:
+        created = time.time()
+    minute = int(created // 60)
+    if _time_prefix_cache[0] != minute:
+        _time_prefix_cache[1] = datetime.datetime.fromtimestamp(created).strftime(
+            "[%H:%M] "
+        )
+        _time_prefix_cache[0] = minute
+    return _time_prefix_cache[1]
+
+
+def _queue_print_kwargs(print_kwargs: dict) -> tuple[str, Any]:
+    """检查放入输出队列的 print 参数, 返回 end 与 file
+
+    只输出一个对象, 因此 sep 没有作用; 输出线程每次写入后都会 flush.
+    """
+    for key in print_kwargs:
+        if key not in ("end", "file", "sep", "flush"):
+            raise TypeError(f"'{key}' is an invalid keyword argument for print()")
+    return print_kwargs.get("end", "\n"), print_kwargs.get("file")
+
 
 def simple_fmt(kw: dict, arg: str) -> str:
     """简单的字符串格式化
@@ -25,6 +166,170 @@ def simple_fmt(kw: dict, arg: str) -> str:
     return arg
 
 
+class ConsoleWriter:
+    """控制台输出队列
+
+    输出线程负责格式化, 记录日志和写入, 调用方只需将记录放入队列, 不会被缓慢的终端阻塞.
+    - 队列为两个 deque, 追加与取出均不需要加锁; 记录带有递增的序号, 输出线程按序号合并两个队列
+    - 低优先级的记录所在队列有长度上限, 超出时丢弃最早的记录; 警告与报错等记录不会被丢弃
+    - 输出线程每次取出多条记录, 合并为一次写入
+    """
+
+    def __init__(self, maxsize: int = OUTPUT_QUEUE_SIZE) -> None:
+        """
+        Args:
+            maxsize (int, optional): 低优先级记录的最大条数
+        """
+        self._seq = itertools.count()
+        self._low: collections.deque = collections.deque(maxlen=maxsize)
+        self._high: collections.deque = collections.deque()
+        self._wakeup = threading.Event()
+        self._start_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        # 启动阶段有大量交互式输入, 在框架开始运行后才启用
+        self.enabled = False
+        self.dropped = 0
+        self.written = 0
+        self._reported_dropped = 0
+
+    def put(
+        self,
+        render,
+        args: tuple,
+        end: str = "\n",
+        file=None,
+        droppable: bool = True,
+    ) -> bool:
+        """将一条输出放入队列
+
+        Args:
+            render (Callable[..., str]): 在输出线程中调用, 返回要输出的文本
+            args (tuple): render 的参数
+            end (str, optional): 追加在文本后的字符串
+            file (optional): 输出到的文件, 默认为 sys.stdout
+            droppable (bool, optional): 队列已满时是否可以丢弃
+
+        Returns:
+            bool: 是否已放入队列; 为 False 时调用方应直接输出
+        """
+        if not self.enabled or threading.current_thread() is self._thread:
+            return False
+        if self._thread is None:
+            self._start()
+        record = (next(self._seq), render, args, end, file, None)
+        if droppable:
+            if len(self._low) == self._low.maxlen:
+                self.dropped += 1
+            self._low.append(record)
+        else:
+            self._high.append(record)
+        self._wakeup.set()
+        return True
+
+    def flush(self, timeout: float = OUTPUT_FLUSH_TIMEOUT) -> bool:
+        """等待此前放入队列的输出全部写入
+
+        Args:
+            timeout (float, optional): 最长等待时间 (秒)
+
+        Returns:
+            bool: 是否在超时前写入完毕
+        """
+        if self._thread is None or threading.current_thread() is self._thread:
+            return True
+        done = threading.Event()
+        self._high.append((next(self._seq), None, (), "", None, done))
+        self._wakeup.set()
+        return done.wait(timeout)
+
+    def _start(self) -> None:
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="ToolDelta: 控制台输出", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            while self._low or self._high:
+                self._write_batch(self._take_batch())
+
+    def _take_batch(self) -> list:
+        batch = []
+        low, high = self._low, self._high
+        while len(batch) < OUTPUT_BATCH_SIZE:
+            try:
+                if low and high:
+                    queue = low if low[0][0] < high[0][0] else high
+                elif low:
+                    queue = low
+                elif high:
+                    queue = high
+                else:
+                    break
+                batch.append(queue.popleft())
+            except IndexError:
+                break
+        return batch
+
+    def _write_batch(self, batch: list) -> None:
+        chunks: list[str] = []
+        target = None
+        if self.dropped != self._reported_dropped:
+            chunks.append(
+                Print.fmt_info(
+                    f"§6控制台输出过多, 已丢弃 {self.dropped - self._reported_dropped} 条输出",
+                    Print.INFO_WARN,
+                )
+                + "\n"
+            )
+            self._reported_dropped = self.dropped
+        for _, render, args, end, file, done in batch:
+            if file is not target and chunks:
+                self._write(target, chunks)
+                chunks = []
+            target = file
+            if done is not None:
+                self._write(target, chunks)
+                chunks = []
+                done.set()
+                continue
+            try:
+                chunks.append(render(*args) + end)
+            except Exception as err:  # noqa: BLE001 插件对象的 __str__ 可能抛出任何异常
+                chunks.append(f"<无法输出的内容: {err!r}>\n")
+        self._write(target, chunks)
+
+    def _write(self, file, chunks: list[str]) -> None:
+        if not chunks:
+            return
+        out = sys.stdout if file is None else file
+        # 输出已关闭或无法编码时丢弃, 不能让输出线程退出
+        with contextlib.suppress(OSError, ValueError):
+            out.write("".join(chunks))
+            out.flush()
+        self.written += len(chunks)
+
+    def stats(self) -> dict[str, int]:
+        """获取输出队列的统计数据
+
+        Returns:
+            dict[str, int]: 排队中的记录数, 已写入与已丢弃的记录数
+        """
+        return {
+            "queued": len(self._low) + len(self._high),
+            "written": self.written,
+            "dropped": self.dropped,
+        }
+
+
+console_writer = ConsoleWriter()
+atexit.register(console_writer.flush)
+
+
 class Print:
     """生成多样彩色输出的类"""
 
@@ -70,6 +375,18 @@ class Print:
         """
         return simple_fmt(kw, arg)
 
+    # 输出不是终端时 (如重定向到文件), 不生成任何 ANSI 序列
+    plain_output = not _stdout_is_tty()
+
+    @staticmethod
+    def set_plain_output(plain: bool) -> None:
+        """设置是否输出不带 ANSI 颜色的纯文本
+
+        Args:
+            plain (bool): 是否输出纯文本
+        """
+        Print.plain_output = plain
+
     @staticmethod
     def colormode_replace(text: str, showmode=0) -> str:
         """颜色代码替换
@@ -82,34 +399,9 @@ class Print:
             str: 替换后的字符串
         """
         # 1 = bg_color
-        text = Print._strike(text)
-        return (
-            simple_fmt(
-                {
-                    "§0": f"\033[{showmode};37;90m",
-                    "§1": f"\033[{showmode};37;34m",
-                    "§2": f"\033[{showmode};37;32m",
-                    "§3": f"\033[{showmode};37;36m",
-                    "§4": f"\033[{showmode};37;31m",
-                    "§5": f"\033[{showmode};37;35m",
-                    "§6": f"\033[{showmode};37;33m",
-                    "§7": f"\033[{showmode};37;90m",
-                    "§8": f"\033[{showmode};37;2m",
-                    "§9": f"\033[{showmode};37;94m",
-                    "§a": f"\033[{showmode};37;92m",
-                    "§b": f"\033[{showmode};37;96m",
-                    "§c": f"\033[{showmode};37;91m",
-                    "§d": f"\033[{showmode};37;95m",
-                    "§e": f"\033[{showmode};37;93m",
-                    "§f": f"\033[{showmode};37;1m",
-                    "§r": "\033[0m",
-                    "§u": "\033[4m",
-                    "§l": "\033[1m",
-                },
-                text,
-            )
-            + "\033[0m"
-        )
+        if Print.plain_output:
+            return _render(text, _PLAIN_CODES, strike=False)
+        return _render(text, _code_table(showmode)) + "\033[0m"
 
     @staticmethod
     def align(text: str, length: int = 15) -> str:
@@ -138,74 +430,61 @@ class Print:
         Returns:
             str: 删除线后的字符串
         """
-        text_ok = ""
-        strikeMode = False
-        i = 0
-        while i < len(text):
-            char = text[i]
-            try:
-                if char == "§":
-                    if text[i + 1] == "s":
-                        strikeMode = True
-                        i += 2
-                        continue
-                    if text[i + 1] == "r":
-                        strikeMode = False
-            except IndexError:
-                pass
-            if strikeMode:
-                text_ok += "\u0336" + char
-            else:
-                text_ok += char
-            i += 1
-        return text_ok
+        return _apply_strike(text)
+
+    # 这些信息在输出队列已满时也不会被丢弃
+    KEEP_INFOS = (INFO_WARN, INFO_ERROR, INFO_FAIL)
 
     @staticmethod
     def print_with_info(
-        text: str, info: str = INFO_NORMAL, need_log: bool = True, **print_kwargs
+        text: str,
+        info: str = INFO_NORMAL,
+        need_log: bool = True,
+        source: str | None = None,
+        **print_kwargs,
     ):
-        """输出带有信息的文本
+        """输出带有信息的文本, 默认放入输出队列, 由输出线程格式化并写入
 
         Args:
             text (str): 输出的文本
             info (str, optional): 输出的信息
             need_log (bool, optional): 是否需要记录日志
-            **print_kwargs: 原 print 函数的参数
+            source (str | None, optional): 记录在日志中的来源, 如插件名
+            **print_kwargs: 原 print 函数的参数 (sep, end, file, flush)
 
         Raises:
             AssertionError: 无法找到对应的颜色代码
+            TypeError: print_kwargs 中有 print 函数不接受的参数
         """
+        # 时间在调用时记录, 而不是在输出线程写入时
+        created = time.time()
+        end, file = _queue_print_kwargs(print_kwargs)
+        if console_writer.put(
+            Print._render_with_info,
+            (text, info, need_log, threading.current_thread().name, source, created),
+            end,
+            file,
+            info not in Print.KEEP_INFOS,
+        ):
+            return
         with Print.lock:
-            if need_log:
-                Print.c_log(info, text)
-            setNextColor = "§r"
-            if "\n" in text:
-                output_txts = []
-                for text_line in str(text).split("\n"):
-                    if "§" in text_line:
-                        try:
-                            n = text_line.rfind("§")
-                            _setNextCol = text_line[n : n + 2]
-                            if setNextColor == -1:
-                                raise AssertionError
-                            setNextColor = _setNextCol
-                        except Exception:
-                            pass
-                    output_txts.append(
-                        datetime.datetime.now().strftime("[%H:%M] ")
-                        + Print.colormode_replace(info, 7)
-                        + " "
-                        + Print.colormode_replace(setNextColor + text_line)
-                    )
-                print("\n".join(output_txts), **print_kwargs)
-            else:
-                print(
-                    datetime.datetime.now().strftime("[%H:%M] ")
-                    + Print.colormode_replace(info, 7)
-                    + " "
-                    + Print.colormode_replace(text),
-                    **print_kwargs,
-                )
+            print(
+                Print._render_with_info(text, info, need_log, None, source, created),
+                **print_kwargs,
+            )
+
+    @staticmethod
+    def _render_with_info(
+        text: str,
+        info: str,
+        need_log: bool,
+        thread: str | None = None,
+        source: str | None = None,
+        created: float | None = None,
+    ) -> str:
+        if need_log:
+            Print.c_log(info, text, thread, source, created)
+        return Print.fmt_info(text, info, created)
 
     @staticmethod
     def clean_print(text: str, **print_kwargs) -> None:
@@ -213,11 +492,48 @@ class Print:
 
         Args:
             text (str): 输出的文本
-            **print_kwargs: 原 print 函数的参数
+            **print_kwargs: 原 print 函数的参数 (sep, end, file, flush)
+
+        Raises:
+            TypeError: print_kwargs 中有 print 函数不接受的参数
         """
+        end, file = _queue_print_kwargs(print_kwargs)
+        if console_writer.put(
+            Print.colormode_replace,
+            (text,),
+            end,
+            file,
+            droppable=False,
+        ):
+            return
         with Print.lock:
             print(Print.colormode_replace(text), **print_kwargs)
 
+    @staticmethod
+    def flush(timeout: float = OUTPUT_FLUSH_TIMEOUT) -> bool:
+        """等待输出队列中的内容全部写入, 在等待输入或退出前调用
+
+        Args:
+            timeout (float, optional): 最长等待时间 (秒)
+
+        Returns:
+            bool: 是否在超时前写入完毕
+        """
+        return console_writer.flush(timeout)
+
+    @staticmethod
+    def set_async_output(enabled: bool) -> None:
+        """设置是否使用输出队列; 关闭后所有输出在调用方线程中同步写入
+
+        Args:
+            enabled (bool): 是否使用输出队列
+        """
+        if not enabled:
+            console_writer.enabled = False
+            console_writer.flush()
+        else:
+            console_writer.enabled = True
+
     @staticmethod
     def clean_fmt(text: str) -> str:
         """依照 mc 的颜色代码格式化文本
@@ -277,12 +593,15 @@ class Print:
             Print.print_with_info(f"§d{text}", Print.INFO_LOAD, **print_kwargs)
 
     @staticmethod
-    def fmt_info(text: str, info: str = "§f 信息 ") -> str:
+    def fmt_info(
+        text: str, info: str = "§f 信息 ", created: float | None = None
+    ) -> str:
         """格式化信息
 
         Args:
             text (str): 输出的文本
             info (str, optional): 输出的信息
+            created (float | None, optional): 信息产生时的时间戳, 默认为当前时间
 
         Raises:
             AssertionError: 无法找到对应的颜色代码
@@ -290,41 +609,51 @@ class Print:
         Returns:
             str: 格式化后的信息
         """
-        with Print.lock:
-            setNextColor = "§r"
-            if "\n" in text:
-                output_txts = []
-                for text_line in str(text).split("\n"):
-                    if "§" in text_line:
-                        try:
-                            n = text_line.rfind("§")
-                            _setNextCol = text_line[n : n + 2]
-                            if setNextColor == -1:
-                                raise AssertionError
-                            setNextColor = _setNextCol
-                        except Exception:
-                            pass
-                    output_txts.append(
-                        datetime.datetime.now().strftime("[%H:%M] ")
-                        + Print.colormode_replace(info, 7)
-                        + " "
-                        + Print.colormode_replace(setNextColor + text_line)
-                    )
-                return "\n".join(output_txts)
-            return (
-                datetime.datetime.now().strftime("[%H:%M] ")
-                + Print.colormode_replace(info, 7)
+        setNextColor = "§r"
+        if "\n" in text:
+            prefix = (
+                _time_prefix(created)
+                + _render_cached(info, 7, Print.plain_output)
                 + " "
-                + Print.colormode_replace(text)
             )
+            output_txts = []
+            for text_line in str(text).split("\n"):
+                if "§" in text_line:
+                    try:
+                        n = text_line.rfind("§")
+                        _setNextCol = text_line[n : n + 2]
+                        if setNextColor == -1:
+                            raise AssertionError
+                        setNextColor = _setNextCol
+                    except Exception:
+                        pass
+                output_txts.append(
+                    prefix + Print.colormode_replace(setNextColor + text_line)
+                )
+            return "\n".join(output_txts)
+        return (
+            _time_prefix(created)
+            + _render_cached(info, 7, Print.plain_output)
+            + " "
+            + Print.colormode_replace(text)
+        )
 
     @staticmethod
-    def c_log(inf: str, msg: str) -> None:
+    def c_log(
+        inf: str,
+        msg: str,
+        thread: str | None = None,
+        source: str | None = None,
+        created: float | None = None,
+    ) -> None:
         """记录日志
 
         Args:
             inf (str): 信息
             msg (str): 记录的信息
+            thread (str | None, optional): 产生这条信息的线程名, 默认为当前线程
+            source (str | None, optional): 信息的来源, 如插件名
+            created (float | None, optional): 信息产生时的时间戳, 默认为当前时间
         """
         with Print.lock:
             for _g, _s in [
@@ -337,11 +666,6 @@ class Print:
                 if inf == _g:
                     inf = _s
                     break
-            for col, _ in Print.STD_COLOR_LIST:
-                col = "§" + col
-                msg = msg.replace(col, "")
-            for col, _ in Print.STD_COLOR_LIST:
-                col = "§" + col
-                inf = inf.replace(col, "")
-            inf = inf.replace(" ", "")
-            publicLogger.log_in(msg, inf)
+            msg = _LOG_COLOR_CODES.sub("", msg)
+            inf = _LOG_COLOR_CODES.sub("", inf).replace(" ", "")
+            publicLogger.log_in(msg, inf, source, thread, created)
@@ -9,12 +9,46 @@ PLUGIN_MARKET_SOURCE_OFFICIAL = (
 )
 "插件市场源"
 
+PACKET_DISPATCH_DEFAULT: dict = {
+    "工作线程数": 8,
+    "单个队列最大长度": 2048,
+    "队列已满时的处理方式(阻塞/丢弃最新/丢弃最旧)": "丢弃最旧",
+    "数据包保序方式(数据包类型/玩家)": "数据包类型",
+}
+"数据包分发器默认配置"
+
+PACKET_DISPATCH_STD: dict = {
+    "工作线程数": int,
+    "单个队列最大长度": int,
+    "队列已满时的处理方式(阻塞/丢弃最新/丢弃最旧)": str,
+    "数据包保序方式(数据包类型/玩家)": str,
+}
+"数据包分发器配置验证格式"
+
+LOG_DEFAULT: dict = {
+    "单个日志文件最大大小(MB)": 64,
+    "每天最多保留的日志分卷数": 20,
+    "压缩旧日志文件": True,
+    "使用JSON Lines格式": False,
+}
+"日志记录默认配置"
+
+LOG_STD: dict = {
+    "单个日志文件最大大小(MB)": int,
+    "每天最多保留的日志分卷数": int,
+    "压缩旧日志文件": bool,
+    "使用JSON Lines格式": bool,
+}
+"日志记录配置验证格式"
+
 LAUNCH_CFG: dict = {
     "启动器启动模式(请不要手动更改此项, 改为0可重置)": 0,
     "验证服务器地址(更换时记得更改fbtoken)": "",
     "是否记录日志": True,
     "是否使用github镜像": True,
     "插件市场源": PLUGIN_MARKET_SOURCE_OFFICIAL,
+    "数据包分发配置": PACKET_DISPATCH_DEFAULT,
+    "日志配置": LOG_DEFAULT,
 }
 "默认登录配置"
 
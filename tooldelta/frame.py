@@ -10,13 +10,14 @@ ToolDelta 基本框架
 
 import asyncio
 import contextlib
+import functools
 import getpass
 import os
 import signal
 import sys
 import time
 import traceback
-from typing import TYPE_CHECKING, Callable
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, Mapping
 
 import requests
 import ujson as json
@@ -39,9 +40,14 @@ from .launch_cli import (
     FrameNeOmgRemote,
     SysStatus,
 )
+from .log_channel import exception_site, log_channels
 from .logger import publicLogger
-from .packets import Packet_CommandOutput, PacketIDS
+from .packet_dispatcher import DispatcherOptions
+from .packets import LazyPacket, Packet_CommandOutput, PacketIDS
+from .peek_scheduler import PeekScheduler
+from .player_roster import PlayerRoster
 from .plugin_load.injected_plugin import safe_jump
+from .query_cache import query_cache
 from .sys_args import sys_args_to_dict
 from .urlmethod import fbtokenFix, if_token
 from .utils import Utils, safe_close
@@ -83,7 +89,9 @@ class ToolDelta:
         self.consoleMenu = []
         self.is_docker: bool = os.path.exists("/.dockerenv")
         self.on_plugin_err = staticmethod(
-            lambda name, _, err: Print.print_err(f"插件 <{name}> 出现问题：\n{err}")
+            lambda name, err, tb: log_channels.get(name).print_err(
+                f"插件 <{name}> 出现问题：\n{tb}", site=exception_site(err)
+            )
         )
         self.launcher: FrameNeOmg | FrameNeOmgRemote
         self.is_mir: bool
@@ -101,6 +109,14 @@ class ToolDelta:
             self.is_mir = cfgs["是否使用github镜像"]
             self.plugin_market_url = cfgs["插件市场源"]
             publicLogger.switch_logger(cfgs["是否记录日志"])
+            log_cfg = cfgs.get("日志配置", constants.LOG_DEFAULT)
+            Config.check_auto(constants.LOG_STD, log_cfg)
+            publicLogger.configure(
+                max_bytes=log_cfg["单个日志文件最大大小(MB)"] * 1024 * 1024,
+                backup_count=log_cfg["每天最多保留的日志分卷数"],
+                compress=log_cfg["压缩旧日志文件"],
+                json_lines=log_cfg["使用JSON Lines格式"],
+            )
             if self.launchMode != 0 and self.launchMode not in range(
                 1, len(LAUNCHERS) + 1
             ):
@@ -133,6 +149,18 @@ class ToolDelta:
         self.launcher = LAUNCHERS[
             cfgs["启动器启动模式(请不要手动更改此项, 改为0可重置)"] - 1
         ][1]()
+        if isinstance(self.launcher, FrameNeOmg):
+            dispatch_cfg = cfgs.get("数据包分发配置", constants.PACKET_DISPATCH_DEFAULT)
+            try:
+                Config.check_auto(constants.PACKET_DISPATCH_STD, dispatch_cfg)
+                self.launcher.dispatcher_options = DispatcherOptions.from_cfg(
+                    dispatch_cfg
+                )
+            except (Config.ConfigError, ValueError) as err:
+                Print.print_err(
+                    f"ToolDelta 基本配置-数据包分发配置有误，需要更正：{err}"
+                )
+                raise SystemExit from err
         # 每个启动器框架的单独启动配置
         if type(self.launcher) is FrameNeOmg:
             launch_data = cfgs.get(
@@ -452,7 +480,7 @@ class ToolDelta:
                 ):
                     Print.print_err(f'未知的 MC 指令，可能是指令格式有误： "{cmd}"')
                 else:
-                    mjon = self.link_game_ctrl.Game_Data_Handle.Handle_Text_Class1(
+                    mjon = self.link_game_ctrl.Game_Data_Handle.render_texts(
                         result.as_dict["OutputMessages"]
                     )
                     if not result.SuccessCount:
@@ -489,9 +517,7 @@ class ToolDelta:
                 ["插件市场"],
                 None,
                 "进入插件市场",
-                lambda _: plugin_market.market.enter_plugin_market(
-                    self.plugin_market_url, in_game=True
-                ),
+                self.enter_plugin_market,
             )
             self.add_console_cmd_trigger(
                 ["/"], "[指令]", "执行 MC 指令", _execute_mc_command_and_get_callback
@@ -504,6 +530,37 @@ class ToolDelta:
                     "在线玩家：" + ", ".join(self.link_game_ctrl.allplayers)
                 ),
             )
+            self.add_console_cmd_trigger(
+                ["线程列表"],
+                None,
+                "查看线程池中运行与排队的线程",
+                self.print_thread_stats,
+            )
+            self.add_console_cmd_trigger(
+                ["日志限流"],
+                None,
+                "查看各插件被限速, 去重与省略堆栈的输出",
+                self.print_log_channel_stats,
+            )
+            self.add_console_cmd_trigger(
+                ["查询缓存"],
+                None,
+                "查看游戏查询缓存的命中统计",
+                self.print_query_cache_stats,
+            )
+            if isinstance(self.launcher, FrameNeOmg):
+                self.add_console_cmd_trigger(
+                    ["数据包队列"],
+                    None,
+                    "查看数据包分发队列状态",
+                    self.print_packet_dispatch_stats,
+                )
+                self.add_console_cmd_trigger(
+                    ["指令统计"],
+                    None,
+                    "查看指令返回的超时与延迟统计",
+                    self.print_command_callback_stats,
+                )
             while 1:
                 rsp = ""
                 while True:
@@ -537,6 +594,81 @@ class ToolDelta:
 
         self.createThread(_console_cmd_thread, usage="控制台指令")
 
+    def print_packet_dispatch_stats(self, _) -> None:
+        """输出数据包分发器的统计数据"""
+        stats = self.launcher.omega.get_packet_dispatcher().stats()
+        Print.print_inf(
+            f"数据包分发：已投递 {stats['submitted']}，已处理 {stats['processed']}，"
+            f"已丢弃 {stats['dropped']}"
+        )
+        Print.print_inf(
+            "各队列积压：" + ", ".join(str(i) for i in stats["queue_depths"])
+        )
+
+    def print_command_callback_stats(self, _) -> None:
+        """输出指令返回回调的统计数据"""
+        stats = self.launcher.omega.get_command_callback_stats()
+        Print.print_inf(
+            f"指令返回：等待中 {stats['pending']}，已返回 {stats['resolved']}，"
+            f"已超时 {stats['timed_out']}，超时后迟到 {stats['late']}，"
+            f"未知 {stats['unknown']}"
+        )
+        Print.print_inf(
+            "返回延迟分布："
+            + ", ".join(f"{k} {v}" for k, v in stats["latency_histogram"].items())
+        )
+
+    def print_thread_stats(self, _) -> None:
+        """输出线程池的统计数据"""
+        stats = Utils.get_thread_stats()
+        Print.print_inf(
+            f"线程池：工作线程 {stats['workers']} 个 (空闲 {stats['idle']})，"
+            f"累计执行 {stats['started']} 个任务"
+        )
+        for usage, running in sorted(stats["running"].items()):
+            queued = stats["queued"].get(usage, 0)
+            limit = stats["limits"].get(usage)
+            Print.print_inf(
+                f"  {usage or '(未命名)'}: 运行中 {running}"
+                + (f"，排队 {queued}" if queued else "")
+                + (f"，上限 {limit}" if limit is not None else "")
+            )
+
+    def print_log_channel_stats(self, _) -> None:
+        """输出各插件日志通道的限流统计, 并输出积压的重复与省略提示"""
+        log_channels.flush()
+        stats = log_channels.stats()
+        if not stats:
+            Print.print_inf("没有被限流的插件输出")
+            return
+        Print.print_inf("插件日志限流统计 (去重 / 限速 / 省略堆栈 / 已输出):")
+        for name, site, st in stats:
+            Print.print_inf(
+                f" §b{name}§r {site}: {st.deduplicated} / {st.rate_limited}"
+                f" / {st.sampled} / {st.printed}"
+            )
+
+    def enter_plugin_market(self, _) -> None:
+        """进入插件市场, 期间同步输出, 以免菜单与输入提示错位"""
+        Print.set_async_output(False)
+        try:
+            plugin_market.market.enter_plugin_market(
+                self.plugin_market_url, in_game=True
+            )
+        finally:
+            Print.set_async_output(True)
+
+    def print_query_cache_stats(self, _) -> None:
+        """输出查询缓存的统计数据"""
+        stats = query_cache.stats()
+        total = stats["hits"] + stats["misses"] + stats["shared"]
+        hit_rate = (stats["hits"] + stats["shared"]) / total * 100 if total else 0
+        Print.print_inf(
+            f"查询缓存：{stats['size']} 项，命中 {stats['hits']}，"
+            f"未命中 {stats['misses']}，共享进行中查询 {stats['shared']}，"
+            f"失效 {stats['invalidations']} 次，命中率 {hit_rate:.1f}%"
+        )
+
     def system_exit(self) -> None:
         """系统退出"""
         asyncio.run(safe_jump())
@@ -588,6 +720,8 @@ class ToolDelta:
     def safelyExit() -> None:
         """安全退出"""
         safe_close()
+        # 日志由输出线程写入, 需先写完输出队列再关闭日志
+        Print.flush()
         publicLogger.exit()
         Print.print_inf("已保存数据与日志等信息。")
 
@@ -605,9 +739,9 @@ class GameCtrl:
         self.Game_Data = GameTextsLoader().game_texts_data
         self.Game_Data_Handle = GameTextsHandle(self.Game_Data)
         self.linked_frame = frame
-        self.players_uuid = {}
-        self.allplayers = []
-        self.all_players_data = {}
+        self.roster = PlayerRoster()
+        self._warned_roster_assigns: set[str] = set()
+        self.peek_scheduler = PeekScheduler(self)
         self.linked_frame: ToolDelta
         self.pkt_unique_id: int = 0
         self.pkt_cache: list = []
@@ -615,19 +749,104 @@ class GameCtrl:
         self.store_uuid_pkt: dict[str, str] | None = None
         self.launcher = self.linked_frame.launcher
         if isinstance(self.launcher, (FrameNeOmgRemote, FrameNeOmg)):
-            self.launcher.packet_handler = lambda pckType, pck: Utils.createThread(
-                self.packet_handler, (pckType, pck), usage="数据包处理"
-            )
+            # 在数据包分发器的工作线程中执行, 插件方法由 packet_handler 交给线程池
+            self.launcher.packet_handler = self.packet_handler
         # 初始化基本函数
-        self.sendcmd = self.launcher.sendcmd
-        self.sendwscmd = self.launcher.sendwscmd
-        self.sendwocmd = self.launcher.sendwocmd
+        # 写入计分板的指令会使 game_utils 的分数查询缓存失效
+        self.sendcmd = self._noting_writes(self.launcher.sendcmd)
+        self.sendwscmd = self._noting_writes(self.launcher.sendwscmd)
+        self.sendwocmd = self._noting_writes(self.launcher.sendwocmd)
+        self.sendcmd_async = self._noting_writes_async(self.launcher.sendcmd_async)
+        self.sendwscmd_async = self._noting_writes_async(self.launcher.sendwscmd_async)
+        self.sendcmd_many = self._noting_writes_many(self.launcher.sendcmd_many)
         self.sendPacket = self.launcher.sendPacket
         if isinstance(self.linked_frame.launcher, FrameNeOmg):
             self.requireUUIDPacket = False
         else:
             self.requireUUIDPacket = True
 
+    @staticmethod
+    def _noting_writes(send: Callable) -> Callable:
+        @functools.wraps(send)
+        def wrapper(cmd: str, *args, **kwargs):
+            query_cache.note_command(cmd)
+            return send(cmd, *args, **kwargs)
+
+        return wrapper
+
+    @staticmethod
+    def _noting_writes_async(send: Callable) -> Callable:
+        @functools.wraps(send)
+        async def wrapper(cmd: str, *args, **kwargs):
+            query_cache.note_command(cmd)
+            return await send(cmd, *args, **kwargs)
+
+        return wrapper
+
+    @staticmethod
+    def _noting_writes_many(send: Callable) -> Callable:
+        def noted(cmds: Iterable[str]) -> Iterator[str]:
+            # 命令在真正发出前才被取出, 因此逐条登记
+            for cmd in cmds:
+                query_cache.note_command(cmd)
+                yield cmd
+
+        @functools.wraps(send)
+        def wrapper(cmds: Iterable[str], *args, **kwargs):
+            return send(noted(cmds), *args, **kwargs)
+
+        return wrapper
+
+    @property
+    def allplayers(self) -> list[str]:
+        """在线玩家名列表 (副本)"""
+        return list(self.roster.snapshot().names)
+
+    @allplayers.setter
+    def allplayers(self, value: list[str]) -> None:
+        self._warn_roster_assign("allplayers")
+        snapshot = self.roster.snapshot()
+        self.roster.reset(
+            {name: snapshot.players_uuid.get(name, "") for name in value},
+            self._kits_by_uuid(snapshot.players),
+        )
+
+    @property
+    def players_uuid(self) -> Mapping[str, str]:
+        """在线玩家名 -> UUID 的只读映射"""
+        return self.roster.snapshot().players_uuid
+
+    @players_uuid.setter
+    def players_uuid(self, value: Mapping[str, str]) -> None:
+        self._warn_roster_assign("players_uuid")
+        self.roster.reset(value, self._kits_by_uuid(self.roster.snapshot().players))
+
+    @property
+    def all_players_data(self) -> list:
+        """在线玩家的 PlayerKit 列表"""
+        return list(self.roster.snapshot().players)
+
+    @all_players_data.setter
+    def all_players_data(self, value: list) -> None:
+        self._warn_roster_assign("all_players_data")
+        snapshot = self.roster.snapshot()
+        self.roster.reset(
+            {name: snapshot.players_uuid.get(name, "") for name in snapshot.names},
+            self._kits_by_uuid(value),
+        )
+
+    @staticmethod
+    def _kits_by_uuid(kits) -> dict[str, Any]:
+        return {kit.uuid: kit for kit in kits if kit is not None}
+
+    def _warn_roster_assign(self, attr: str) -> None:
+        """直接赋值在线玩家名单的兼容处理: 用赋值的内容重建名单, 每个属性只警告一次"""
+        if attr not in self._warned_roster_assigns:
+            self._warned_roster_assigns.add(attr)
+            Print.print_war(
+                f"直接修改 GameCtrl.{attr} 已不推荐, 在线玩家名单由数据包自动维护"
+            )
+
     def set_listen_packets(self) -> None:
         """
         向启动器初始化监听的游戏数据包
@@ -646,75 +865,129 @@ class GameCtrl:
         """
         self.require_listen_packets.add(pkt)
 
-    @Utils.thread_func("数据包处理方法")
-    def packet_handler(self, pkt_type: int, pkt: dict) -> None:
+    def packet_handler(self, pkt_type: int, pkt: dict | LazyPacket) -> None:
         """数据包处理分发任务函数
 
+        在数据包分发器的工作线程中按到达顺序执行, 只负责更新在线玩家名单;
+        插件的数据包监听与事件方法交给线程池执行,
+        插件方法阻塞 (如等待玩家的下一条消息) 时不会拖住后续的数据包.
+
         Args:
             pkt_type (int): 数据包类型
-            pkt (dict): 数据包内容
+            pkt (dict | LazyPacket): 数据包内容
         """
+        changes = None
+        if pkt_type == PacketIDS.PlayerList:
+            changes = self.update_roster(pkt)
+        Utils.createThread(
+            self._handle_packet_in_plugins,
+            (pkt_type, pkt, changes),
+            usage="数据包处理方法",
+        )
+
+    def _handle_packet_in_plugins(
+        self,
+        pkt_type: int,
+        pkt: dict | LazyPacket,
+        changes: list[tuple[str, bool]] | None,
+    ) -> None:
         is_skiped = self.linked_frame.link_plugin_group.processPacketFunc(pkt_type, pkt)
         if is_skiped:
             return
         if pkt_type == PacketIDS.PlayerList:
-            self.process_player_list(pkt, self.linked_frame.link_plugin_group)
+            self.process_player_list(pkt, self.linked_frame.link_plugin_group, changes)
         elif pkt_type == PacketIDS.Text:
             self.process_text_packet(pkt, self.linked_frame.link_plugin_group)
 
-    def process_player_list(self, pkt: dict, plugin_group: "PluginGroup") -> None:
+    def update_roster(self, pkt: dict | LazyPacket) -> list[tuple[str, bool]]:
+        """用 PlayerList 数据包增量更新在线玩家名单
+
+        Args:
+            pkt (dict | LazyPacket): 数据包内容
+
+        Returns:
+            list[tuple[str, bool]]: (玩家名, 是否为加入) 列表, 无法获取名字的退出玩家会被忽略
+        """
+        changes = []
+        for player in pkt["Entries"]:
+            uuid = player["UUID"]
+            if player["Skin"]["SkinData"]:
+                playername = player["Username"]
+                self.roster.add(playername, uuid, self._get_player_kit(uuid))
+                changes.append((playername, True))
+            elif (playername := self.roster.remove_uuid(uuid)) is not None:
+                changes.append((playername, False))
+            else:
+                Print.print_war("无法获取 PlayerList 中玩家名字")
+        return changes
+
+    def process_player_list(
+        self,
+        pkt: dict | LazyPacket,
+        plugin_group: "PluginGroup",
+        changes: list[tuple[str, bool]] | None = None,
+    ) -> None:
         """处理玩家列表等数据包
 
         Args:
-            pkt (dict): 数据包内容
+            pkt (dict | LazyPacket): 数据包内容
             plugin_group (PluginGroup): 插件组对象
+            changes (list[tuple[str, bool]] | None, optional): update_roster 的返回值,
+                为 None 时用数据包更新名单
         """
+        if changes is None:
+            changes = self.update_roster(pkt)
         # 处理玩家进出事件
-        res = self.launcher.get_players_and_uuids()
-        if res:
-            self.allplayers = list(res.keys())
-            self.players_uuid.update(res)
-        for player in pkt["Entries"]:
-            isJoining = bool(player["Skin"]["SkinData"])
-            playername = player["Username"]
-            if isJoining and "§" in playername:
-                self.say_to(
-                    "@a",
-                    "§l§7<§6§o!§r§l§7> §6此玩家名字中含特殊字符, 可能导致插件运行异常！",
-                )
-                self.all_players_data = self.launcher.omega.get_all_online_players()
-                # 没有 VIP 名字供测试...
+        for playername, isJoining in changes:
             if isJoining:
-                self.tmp_tp_player(playername)
+                if "§" in playername:
+                    self.say_to(
+                        "@a",
+                        "§l§7<§6§o!§r§l§7> §6此玩家名字中含特殊字符, 可能导致插件运行异常！",
+                    )
+                    # 没有 VIP 名字供测试...
+                self.peek_scheduler.request(playername)
                 Print.print_inf(f"§e{playername} 加入了游戏")
-                self.all_players_data = self.launcher.omega.get_all_online_players()
-                if playername not in self.allplayers and not res:
-                    self.allplayers.append(playername)
-                    return
                 plugin_group.execute_player_join(
                     playername, self.linked_frame.on_plugin_err
                 )
             else:
-                playername = next(
-                    (k for k, v in self.players_uuid.items() if v == player["UUID"]),
-                    None,
-                )
-                if playername is None:
-                    Print.print_war("无法获取 PlayerList 中玩家名字")
-                    continue
-                if playername != "???" and not res:
-                    self.allplayers.remove(playername)
                 Print.print_inf(f"§e{playername} 退出了游戏")
-                self.all_players_data = self.launcher.omega.get_all_online_players()
                 plugin_group.execute_player_leave(
                     playername, self.linked_frame.on_plugin_err
                 )
 
-    def process_text_packet(self, pkt: dict, plugin_grp: "PluginGroup") -> None:
+    def _on_player_change(self, player, action: str) -> None:
+        """接入点的 PlayerChange 事件: 为名单中的玩家补上 PlayerKit
+
+        名单的增删只由按顺序处理的 PlayerList 数据包决定,
+        此事件与 PlayerList 先后不定, 迟到的 online 不会让已退出的玩家重新出现.
+
+        Args:
+            player (PlayerKit | None): 玩家
+            action (str): 变动类型, 如 online, offline, exist
+        """
+        if player is not None and action != "offline":
+            self.roster.attach_kit(player.uuid, player)
+
+    def _get_player_kit(self, uuid: str):
+        """获取玩家的 PlayerKit, 启动器不支持时为 None
+
+        Args:
+            uuid (str): 玩家 UUID
+        """
+        omega = getattr(self.launcher, "omega", None)
+        if omega is None:
+            return None
+        return omega.get_player_by_uuid(uuid)
+
+    def process_text_packet(
+        self, pkt: dict | LazyPacket, plugin_grp: "PluginGroup"
+    ) -> None:
         """处理 9 号数据包的消息
 
         Args:
-            pkt (dict): 数据包内容
+            pkt (dict | LazyPacket): 数据包内容
             plugin_grp (PluginGroup): 插件组对象
         """
         match pkt["TextType"]:
@@ -727,7 +1000,8 @@ class GameCtrl:
                 elif not pkt["Message"].startswith(
                     "§e%multiplayer.player.joined"
                 ) and not pkt["Message"].startswith("§e%multiplayer.player.left"):
-                    jon = self.Game_Data_Handle.Handle_Text_Class1(pkt)
+                    # 只读取 Message 与 Parameters, 不必完整解码
+                    jon = self.Game_Data_Handle.render_texts(pkt)
                     Print.print_inf(("§1" + " ".join(jon)))
                     if pkt["Message"].startswith("death."):
                         if len(pkt["Parameters"]) >= 2:
@@ -764,16 +1038,13 @@ class GameCtrl:
 
     def Inject(self) -> None:
         """载入游戏时的初始化"""
-        if hasattr(self.launcher, "bot_name"):
-            self.tmp_tp_all_players()
         res = self.launcher.get_players_and_uuids()
-        self.all_players_data = self.launcher.omega.get_all_online_players()
         Utils.createThread(
             func=self.give_bot_effect_invisibility, usage="GiveBotEffectInvisibility"
         )
         if res:
-            self.allplayers = list(res.keys())
-            self.players_uuid.update(res)
+            kits = self.launcher.omega.get_all_online_players()
+            self.roster.reset(res, self._kits_by_uuid(kits))
         else:
             while 1:
                 try:
@@ -788,12 +1059,21 @@ class GameCtrl:
                         or len(cmd_result.OutputMessages[1].Parameters) < 1
                     ):
                         raise ValueError
-                    self.allplayers = (
-                        cmd_result.OutputMessages[1].Parameters[0].split(", ")
+                    self.roster.reset(
+                        dict.fromkeys(
+                            cmd_result.OutputMessages[1].Parameters[0].split(", "), ""
+                        )
                     )
                     break
                 except (TimeoutError, ValueError):
                     Print.print_war("获取全局玩家失败..重试")
+        omega = getattr(self.launcher, "omega", None)
+        if omega is not None:
+            # 接入点每次连接时都会清空监听者, 因此每次注入时重新监听
+            omega.listen_player_change(self._on_player_change)
+        if hasattr(self.launcher, "bot_name"):
+            # 先看一眼所有玩家 (防止玩家 entityruntimeid 为空)
+            self.peek_scheduler.request(self.roster.snapshot().names)
         self.linked_frame.comsole_cmd_start()
         self.linked_frame.link_plugin_group.execute_init(
             self.linked_frame.on_plugin_err
@@ -887,8 +1167,8 @@ class GameCtrl:
 
     def tmp_tp_all_players(self) -> None:
         """
-        内部调用：在 ToolDelta 连接到 NeOmega 后先 tp 所有玩家（防止玩家 entityruntimeid 为空）
-        外部调用：临时传送至所有玩家后回到原位
+        临时传送至所有玩家后回到原位
+        (连接后与玩家加入时的传送由 peek_scheduler 合并处理)
         """
         BotPos: tuple[float, float, float] = getPosXYZ(self.bot_name)
         for player in self.allplayers:
@@ -0,0 +1,133 @@
+"""
+JSON 数据的快速复制与只读视图
+
+供 Utils.TMPJson 使用:
+- json_copy: 针对 JSON 类型的深拷贝, 比 copy.deepcopy 快得多
+- JsonView / JsonListView: 零拷贝的只读视图, 嵌套的容器在被访问时才包装,
+  需要修改时调用 thaw() 得到一份可修改的深拷贝
+"""
+
+import copy
+import marshal
+from collections.abc import Iterator, Mapping, Sequence
+from typing import Any
+
+
+def json_copy(obj: Any) -> Any:
+    """深拷贝一个 JSON 对象, 含非 JSON 类型时回退到 copy.deepcopy
+
+    JSON 的类型 (dict/list/str/数字/bool/None) 都能被 marshal 序列化,
+    借助其 C 实现完成复制要比 copy.deepcopy 逐个对象记忆与分派快得多.
+
+    Args:
+        obj (Any): JSON 对象
+
+    Returns:
+        Any: 深拷贝
+    """
+    try:
+        return marshal.loads(marshal.dumps(obj))
+    except ValueError:
+        return copy.deepcopy(obj)
+
+
+def freeze(obj: Any) -> Any:
+    """获取 JSON 对象的只读视图, 标量原样返回
+
+    Args:
+        obj (Any): JSON 对象
+
+    Returns:
+        Any: JsonView / JsonListView / 标量
+    """
+    if isinstance(obj, dict):
+        return JsonView(obj)
+    if isinstance(obj, list):
+        return JsonListView(obj)
+    return obj
+
+
+class JsonView(Mapping):
+    """JSON 对象的只读视图"""
+
+    __slots__ = ("_data",)
+
+    def __init__(self, data: dict) -> None:
+        self._data = data
+
+    def __getitem__(self, key: Any) -> Any:
+        return freeze(self._data[key])
+
+    def __iter__(self) -> Iterator:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._data
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, JsonView):
+            other = other._data
+        return self._data == other
+
+    __hash__ = None  # type: ignore
+
+    def __repr__(self) -> str:
+        return f"JsonView({self._data!r})"
+
+    def thaw(self) -> dict:
+        """获取可修改的深拷贝"""
+        return json_copy(self._data)
+
+
+class JsonListView(Sequence):
+    """JSON 数组的只读视图"""
+
+    __slots__ = ("_data",)
+
+    def __init__(self, data: list) -> None:
+        self._data = data
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return JsonListView(self._data[index])
+        return freeze(self._data[index])
+
+    def __iter__(self) -> Iterator:
+        return map(freeze, self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, value: object) -> bool:
+        return value in self._data
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, JsonListView):
+            other = other._data
+        return self._data == other
+
+    __hash__ = None  # type: ignore
+
+    def __repr__(self) -> str:
+        return f"JsonListView({self._data!r})"
+
+    def thaw(self) -> list:
+        """获取可修改的深拷贝"""
+        return json_copy(self._data)
+
+
+def thaw(obj: Any) -> Any:
+    """获取视图或 JSON 对象的可修改深拷贝
+
+    Args:
+        obj (Any): JsonView / JsonListView / JSON 对象
+
+    Returns:
+        Any: 深拷贝
+    """
+    if isinstance(obj, (JsonView, JsonListView)):
+        return obj.thaw()
+    return json_copy(obj)
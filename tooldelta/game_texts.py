@@ -1,14 +1,16 @@
 "还原游戏常见字符串"
 
+import functools
 import gzip
 import os
 import re
 import tarfile
 import threading
 import warnings
+from collections.abc import Iterable
 from glob import glob
 from importlib import util
-from typing import Dict
+from typing import TYPE_CHECKING, Dict
 
 import requests
 import ujson as json
@@ -20,6 +22,9 @@ from .get_tool_delta_version import get_tool_delta_version
 from .sys_args import sys_args_to_dict
 from .urlmethod import download_file_singlethreaded
 
+if TYPE_CHECKING:
+    from .packets import LazyPacket
+
 # 关闭警告
 urllib3.disable_warnings()
 warnings.filterwarnings("ignore")
@@ -150,11 +155,144 @@ class GameTextsLoader:
             return False
 
 
+# 最多缓存的已编译文本模板数
+GAME_TEXT_TEMPLATE_CACHE_SIZE = 4096
+# 模板中的参数: %1$s / %1 (按序号), %s / %d (按出现顺序), %% (百分号)
+_TEMPLATE_TOKEN = re.compile(r"%(?:(\d+)(?:\$[a-zA-Z])?|([a-zA-Z])|(%))")
+# 文本键前的颜色代码与 %, 如 "§e%multiplayer.player.left"
+_MESSAGE_KEY = re.compile(r"((?:§.)*)%?(.*)", re.DOTALL)
+
+
+class GameTextTemplate:
+    """编译后的游戏文本模板, 渲染时只需一次 str.format"""
+
+    __slots__ = ("fmt", "needed", "raw")
+
+    def __init__(self, fmt: str, raw: list[str]) -> None:
+        """
+        Args:
+            fmt (str): str.format 格式的模板
+            raw (list[str]): 各个参数在原文中的写法, 参数不足时原样保留
+        """
+        self.fmt = fmt
+        self.needed = len(raw)
+        self.raw = raw
+
+    def render(self, args: list[str]) -> str:
+        """填入参数
+
+        Args:
+            args (list[str]): 参数
+
+        Returns:
+            str: 文本
+        """
+        if len(args) < self.needed:
+            args = args + self.raw[len(args) :]
+        return self.fmt.format(*args)
+
+
+def compile_game_text(text: str) -> GameTextTemplate | str:
+    """将游戏文本编译为模板
+
+    Args:
+        text (str): 游戏文本, 如 "%1$s 被 %2$s 杀死了"
+
+    Returns:
+        GameTextTemplate | str: 模板; 文本中没有参数时返回文本本身
+    """
+    if "%" not in text:
+        return text
+    pieces: list[str] = []
+    raw: list[str] = []
+    pos = 0
+    seq = 0
+    for m in _TEMPLATE_TOKEN.finditer(text):
+        pieces.append(text[pos : m.start()].replace("{", "{{").replace("}", "}}"))
+        pos = m.end()
+        index_str, _, percent = m.groups()
+        if percent:
+            pieces.append("%")
+            continue
+        if index_str:
+            index = int(index_str) - 1
+            if index < 0:
+                pieces.append(m.group(0))
+                continue
+        else:
+            index = seq
+            seq += 1
+        while len(raw) <= index:
+            raw.append("")
+        if not raw[index]:
+            raw[index] = m.group(0)
+        pieces.append(f"{{{index}}}")
+    if not raw:
+        return text.replace("%%", "%")
+    pieces.append(text[pos:].replace("{", "{{").replace("}", "}}"))
+    return GameTextTemplate("".join(pieces), raw)
+
+
 class GameTextsHandle:
     """处理游戏文本返回"""
 
     def __init__(self, Game_Texts: dict) -> None:
         self.Game_Texts = Game_Texts
+        # 文本键 -> 模板, 首次用到时编译
+        self._template_of = functools.lru_cache(GAME_TEXT_TEMPLATE_CACHE_SIZE)(
+            self._compile_message
+        )
+
+    def _compile_message(
+        self, message: str
+    ) -> tuple[str, GameTextTemplate | str] | None:
+        prefix, key = _MESSAGE_KEY.match(message).groups()  # type: ignore
+        original_message = self.Game_Texts.get(key)
+        if original_message is None:
+            return None
+        return prefix, compile_game_text(original_message)
+
+    def render_text(self, message: str, params: Iterable = ()) -> str:
+        """还原一条游戏文本
+
+        Args:
+            message (str): 文本或文本键, 如 "death.attack.player"
+            params (Iterable, optional): 参数; 以 % 开头的参数视为文本键并还原
+
+        Returns:
+            str: 还原后的文本, 找不到文本键时原样返回
+        """
+        compiled = self._template_of(message)
+        if compiled is None:
+            return message
+        prefix, template = compiled
+        if isinstance(template, str):
+            return prefix + template
+        texts = self.Game_Texts
+        args = [
+            (
+                texts.get(param[1:], param)
+                if (param := str(p)).startswith("%")
+                else param
+            )
+            for p in params
+        ]
+        return prefix + template.render(args)
+
+    def render_texts(self, packet: "dict | list | LazyPacket") -> list[str]:
+        """还原文本数据包或指令返回中的游戏文本
+
+        Args:
+            packet (dict | list | LazyPacket): 含 Message 与 Parameters 的数据包, 或由其组成的列表
+
+        Returns:
+            list[str]: 还原后的文本
+        """
+        items = packet if isinstance(packet, list) else [packet]
+        return [
+            self.render_text(item["Message"], item["Parameters"] or ())
+            for item in items
+        ]
 
     def Handle_Text_Class1(self, packet: dict | list) -> list:
         """处理文本返回方法 1
@@ -165,185 +303,6 @@ class GameTextsHandle:
         Returns:
             list: 处理结果的 json 格式列表
         """
-        json_result: list = []  # 使用 list 保存处理后的结果
-        if isinstance(packet, list):  # 如果 packet 是 list 类型
-            for item in packet:  # 遍历 packet 中的每个 item
-                # 从 self.Game_Texts 中获取原始消息文本
-                if not isinstance(
-                    (
-                        original_message := self.Game_Texts.get(
-                            item["Message"].replace("%", "")
-                        )
-                    ),
-                    type(None),
-                ):
-                    # 检查原始消息中是否包含格式化参数%
-                    if not len(re.findall(r"%[a-zA-Z]", original_message)) >= 1:
-                        if original_message:  # 如果原始消息不为空
-                            original_message = re.sub(
-                                r'\$[^"\'\]/\]\)）}\s]{0,3}', "", original_message
-                            )  # 删除$后的内容
-                            param_list = list(item["Parameters"])  # 获取参数列表
-                            for n, _ in enumerate(param_list, start=1):
-                                original_message = original_message.replace(
-                                    f"{n}", f"{{{n - 1}}}"
-                                )
-                            # 检查参数中是否包含%
-                            if (
-                                len(
-                                    [
-                                        str(param)
-                                        for param in param_list
-                                        if "%" in str(param)
-                                    ]
-                                )
-                                >= 1
-                            ):
-                                # 提取参数中的%后的字符并替换为实际的值
-                                filtered_param_list = [
-                                    re.sub(r"%", "", param)
-                                    for param in param_list
-                                    if "%" in param
-                                ]
-                                for filtered_param in filtered_param_list:
-                                    for i in range(len(param_list)):
-                                        if filtered_param in param_list[i]:
-                                            param_list[i] = param_list[i].replace(
-                                                f"%{filtered_param}",
-                                                self.Game_Texts.get(
-                                                    filtered_param, "???"
-                                                ),
-                                            )
-                            # 格式化消息文本
-                            filled_message = original_message.format(*param_list)
-                    else:
-                        if original_message:  # 如果原始消息不为空
-                            original_message = re.sub(
-                                r'\$[^"\'\]/\]\)）}\s]{0,3}', "", original_message
-                            )  # 删除$后的内容
-                            param_list = list(item["Parameters"])  # 获取参数列表
-                            re.findall(r"%[a-zA-Z]", original_message)  # 查找格式化参数
-                            formatted_string = original_message
-                            for i, arg in enumerate(param_list, start=0):
-                                formatted_string = re.sub(
-                                    r"%[a-zA-Z]", str(arg), formatted_string, count=1
-                                )
-                            if (
-                                len(
-                                    [
-                                        str(param)
-                                        for param in param_list
-                                        if "%" in str(param)
-                                    ]
-                                )
-                                >= 1
-                            ):
-                                # 提取参数中的%后的字符并替换为实际的值
-                                filtered_param_list = [
-                                    re.sub(r"%", "", param)
-                                    for param in param_list
-                                    if "%" in param
-                                ]
-                                for filtered_param in filtered_param_list:
-                                    for i in range(len(param_list)):
-                                        if filtered_param in param_list[i]:
-                                            param_list[i] = param_list[i].replace(
-                                                f"%{filtered_param}",
-                                                self.Game_Texts.get(filtered_param),
-                                            )
-                            # 格式化消息文本
-                            filled_message = formatted_string.format(*param_list)
-                else:
-                    filled_message = item["Message"]
-                # 将填充后的消息文本转换为 json 格式，并添加到结果列表中
-                json_output = json.dumps(filled_message, indent=2, ensure_ascii=False)
-                json_result.append(json_output)
-        elif isinstance(packet, dict):  # 如果 packet 不是 list 类型
-            # 从 self.Game_Texts 中获取原始消息文本
-            if not isinstance(
-                (
-                    original_message := self.Game_Texts.get(
-                        packet["Message"].replace("%", "")
-                    )
-                ),
-                type(None),
-            ):
-                if not len(re.findall(r"%[a-zA-Z]", original_message)) >= 1:
-                    if original_message:  # 如果原始消息不为空
-                        original_message = re.sub(
-                            r'\$[^"\'\]/\]\)）}\s]{0,3}', "", original_message
-                        )  # 删除$后的内容
-                        param_list = list(packet["Parameters"])  # 获取参数列表
-                        for n, _ in enumerate(param_list, start=1):
-                            original_message = original_message.replace(
-                                f"%{n}", "{" + str(n - 1) + "}"
-                            )
-                        if (
-                            len(
-                                [
-                                    str(param)
-                                    for param in param_list
-                                    if "%" in str(param)
-                                ]
-                            )
-                            >= 1
-                        ):
-                            # 提取参数中的%后的字符并替换为实际的值
-                            filtered_param_list = [
-                                re.sub(r"%", "", param)
-                                for param in param_list
-                                if "%" in param
-                            ]
-                            for filtered_param in filtered_param_list:
-                                for i in range(len(param_list)):
-                                    if filtered_param in param_list[i]:
-                                        param_list[i] = param_list[i].replace(
-                                            f"%{filtered_param}",
-                                            self.Game_Texts.get(filtered_param),
-                                        )
-                        # 格式化消息文本
-                        filled_message = original_message.format(*param_list)
-                else:
-                    if original_message := self.Game_Texts.get(
-                        packet["Message"].replace("%", "")
-                    ):  # 如果原始消息不为空
-                        param_list = list(packet["Parameters"])  # 获取参数列表
-                        original_message = re.sub(
-                            r'\$[^"\'\]/\]\)）}\s]{0,3}', "", original_message
-                        )  # 删除$后的内容
-                        formatted_string = original_message
-                        for i, arg in enumerate(param_list, start=1):
-                            formatted_string = re.sub(
-                                r"%[a-zA-Z]", str(arg), formatted_string, count=1
-                            )
-                        if (
-                            len(
-                                [
-                                    str(param)
-                                    for param in param_list
-                                    if "%" in str(param)
-                                ]
-                            )
-                            >= 1
-                        ):
-                            # 提取参数中的%后的字符并替换为实际的值
-                            filtered_param_list = [
-                                re.sub(r"%", "", param)
-                                for param in param_list
-                                if "%" in param
-                            ]
-                            for filtered_param in filtered_param_list:
-                                for i in range(len(param_list)):
-                                    if filtered_param in param_list[i]:
-                                        param_list[i] = param_list[i].replace(
-                                            f"%{filtered_param}",
-                                            self.Game_Texts.get(filtered_param),
-                                        )
-
-                        filled_message = formatted_string
-            else:
-                filled_message = packet["Message"]
-            # 将填充后的消息文本转换为 json 格式，并添加到结果列表中
-            json_output = json.dumps(filled_message, indent=2, ensure_ascii=False)
-            json_result.append(json_output)
-        return json_result  # 返回处理结果的 json 格式列表
+        return [
+            json.dumps(text, ensure_ascii=False) for text in self.render_texts(packet)
+        ]
@@ -7,7 +7,13 @@ Methods:
     getItem (targetName, itemName, itemSpecialID): 获取玩家背包内指定的物品的数量
     getPosXYZ (player, timeout=30): 获取玩家的简略坐标值，并以坐标三元元组返回
     getScore (scoreboardNameToGet, targetNameToGet): 获取计分板分数
+    getMultiPos (target, timeout): 一次查询获取多名玩家的详细位置信息
+    getMultiItem (itemName, itemSpecialID, target): 一次查询获取多名玩家背包内指定物品的数量
+    getMultiScores (target): 一次查询获取多个对象的全部计分板分数
     isCmdSuccess (cmd: str, timeout=30): 获取命令执行成功与否的状态
+
+只读查询方法可传入 cached=True, 在短时间内复用相同查询的结果 (见 query_cache 模块);
+此时返回的结果可能被多个调用方共享, 请勿修改.
 """
 
 from typing import TYPE_CHECKING
@@ -15,6 +21,7 @@ from typing import TYPE_CHECKING
 import json
 
 from .packets import Packet_CommandOutput
+from .query_cache import ANY_SCOREBOARD, query_cache
 
 if TYPE_CHECKING:
     from tooldelta import GameCtrl, ToolDelta
@@ -40,17 +47,20 @@ def _set_frame(frame: "ToolDelta"):
 # utils
 
 
-def getTarget(sth: str, timeout: int = 5) -> list:
+def getTarget(sth: str, timeout: int = 5, cached: bool = False) -> list:
     """
     获取符合目标选择器实体的列表
 
     参数:
         sth: 目标选择器
         timeout: 超时时间，默认为 5 秒
+        cached: 是否使用查询缓存
     异常:
         ValueError: 指令返回超时，或者无法获取目标
     """
     _check_gamectrl_avali()
+    if cached:
+        return query_cache.get("target", sth, lambda: getTarget(sth, timeout))
     if not sth.startswith("@"):
         raise ValueError("我的世界目标选择器格式错误 (getTarget 必须使用目标选择器)")
     result = game_ctrl.sendcmd_with_resp(f"/testfor {sth}", timeout)
@@ -62,12 +72,13 @@ def getTarget(sth: str, timeout: int = 5) -> list:
     return []
 
 
-def getPos(target: str, timeout: float | int = 5) -> dict:
+def getPos(target: str, timeout: float | int = 5, cached: bool = False) -> dict:
     """获取目标玩家的详细位置信息
 
     参数:
         targetNameToGet: 目标玩家的名称
         timeout: 超时时间（秒）。默认为 5 秒
+        cached: 是否使用查询缓存
 
     异常:
         ValueError: 当目标玩家不存在时抛出该异常
@@ -75,52 +86,113 @@ def getPos(target: str, timeout: float | int = 5) -> dict:
         AttributeError: 当获取玩家 UUID 失败时抛出该异常
     """
     _check_gamectrl_avali()
+    if cached:
+        return query_cache.get("pos", target, lambda: getPos(target, timeout))
     if (
-        target not in game_ctrl.allplayers
+        target not in game_ctrl.roster
         and not target.startswith("@")
         and target != game_ctrl.bot_name
     ):
         raise ValueError(f'玩家 "{target}" 不存在')
-    result = game_ctrl.sendcmd_with_resp(f'/querytarget @a[name="{target}"]', timeout)
+    if target == "@a":
+        return getMultiPos(target, timeout)
+    selector = target if target.startswith("@") else f'@a[name="{target}"]'
+    result = game_ctrl.sendcmd_with_resp(f"/querytarget {selector}", timeout)
     if not result.OutputMessages[0].Success:
         raise ValueError(f"无法获取坐标信息：{result.OutputMessages[0].Message}")
     parameter = json.loads(result.OutputMessages[0].Parameters[0])
     if isinstance(parameter, str):
         raise ValueError("无法获取坐标信息：" + parameter)
-    result = {}
     if game_ctrl.players_uuid is None:
         raise AttributeError("无法获取玩家 UUID 表")
-    targetName = target
-    x = (
-        parameter[0]["position"]["x"]
-        if parameter[0]["position"]["x"] >= 0
-        else parameter[0]["position"]["x"] - 1
-    )
-    y = parameter[0]["position"]["y"] - 1.6200103759765
-    z = (
-        parameter[0]["position"]["z"]
-        if parameter[0]["position"]["z"] >= 0
-        else parameter[0]["position"]["z"] - 1
-    )
-    position = {
-        "x": float(f"{x:.2f}"),
-        "y": float(f"{y:.2f}"),
-        "z": float(f"{z:.2f}"),
-    }
-    dimension = parameter[0]["dimension"]
-    yRot = parameter[0]["yRot"]
-    result[targetName] = {
-        "dimension": dimension,
-        "position": position,
-        "yRot": yRot,
-    }
-    if target == "@a":
-        return result
-    if len(result) != 1:
+    if len(parameter) != 1:
         raise ValueError("获取坐标失败")
-    if target.startswith("@a"):
-        return list(result.values())[0]
-    return result[target]
+    return _parse_pos_entry(parameter[0])
+
+
+def _parse_pos_entry(entry: dict) -> dict:
+    """将 querytarget 返回的单个实体项转换为位置信息"""
+    pos = entry["position"]
+    x = pos["x"] if pos["x"] >= 0 else pos["x"] - 1
+    y = pos["y"] - 1.6200103759765
+    z = pos["z"] if pos["z"] >= 0 else pos["z"] - 1
+    return {
+        "dimension": entry["dimension"],
+        "position": {
+            "x": float(f"{x:.2f}"),
+            "y": float(f"{y:.2f}"),
+            "z": float(f"{z:.2f}"),
+        },
+        "yRot": entry["yRot"],
+    }
+
+
+def _map_entries_to_players(entries: list[dict]) -> dict[str, dict]:
+    """按实体唯一 ID 将 querytarget 返回的各项对应到在线玩家名
+
+    Raises:
+        ValueError: 没有可用的 PlayerKit, 无法将实体对应到玩家名
+    """
+    names_by_unique_id = {}
+    for kit in game_ctrl.all_players_data:
+        try:
+            names_by_unique_id[kit.entity_unique_id] = kit.name
+        except Exception:  # noqa: BLE001, S112 接入点断开时抛出的是 Exception
+            continue
+    if entries and not names_by_unique_id:
+        raise ValueError("无法获取玩家的实体唯一 ID, 不能将坐标对应到玩家名")
+    result = {}
+    for entry in entries:
+        name = names_by_unique_id.get(int(entry.get("uniqueId", 0)))
+        if name is not None:
+            result[name] = _parse_pos_entry(entry)
+    return result
+
+
+def getMultiPos(
+    target: str = "@a", timeout: float = 5, cached: bool = False
+) -> dict[str, dict]:
+    """只用一条 querytarget 指令获取多名玩家的详细位置信息
+
+    参数:
+        target: 目标选择器, 默认为所有玩家
+        timeout: 超时时间（秒）。默认为 5 秒
+        cached: 是否使用查询缓存
+    返回:
+        玩家名 -> 位置信息 (与 getPos 返回的格式相同); 无法对应到在线玩家的实体会被忽略
+    异常:
+        ValueError: 当获取位置信息失败, 或启动器不提供 PlayerKit 而无法对应玩家名时抛出该异常
+            (target 为 @a 时改为按玩家名逐个获取)
+    """
+    _check_gamectrl_avali()
+    if cached:
+        return query_cache.get(
+            "pos", ("multi", target), lambda: getMultiPos(target, timeout)
+        )
+    if not target.startswith("@"):
+        raise ValueError("getMultiPos 必须使用目标选择器")
+    if target == "@a" and not game_ctrl.all_players_data:
+        # 没有 PlayerKit 时无法按实体唯一 ID 对应, 按玩家名逐个获取
+        return _get_pos_by_names(game_ctrl.allplayers, timeout)
+    result = game_ctrl.sendcmd_with_resp(f"/querytarget {target}", timeout)
+    if not result.OutputMessages[0].Success:
+        raise ValueError(f"无法获取坐标信息：{result.OutputMessages[0].Message}")
+    parameter = json.loads(result.OutputMessages[0].Parameters[0])
+    if isinstance(parameter, str):
+        # 字符串是服务器返回的报错信息, 与 getPos 一致抛出 ValueError
+        raise ValueError("无法获取坐标信息：" + parameter)  # noqa: TRY004
+    return _map_entries_to_players(parameter)
+
+
+def _get_pos_by_names(names: list[str], timeout: float) -> dict[str, dict]:
+    """用玩家名逐个获取位置信息, 获取失败 (如玩家已退出) 的玩家会被忽略"""
+    result = {}
+    for name in names:
+        try:
+            result[name] = getPos(name, timeout)
+        except ValueError:
+            continue
+    return result
 
 
 def getItem(target: str, itemName: str, itemSpecialID: int = -1) -> int:
@@ -132,7 +204,7 @@ def getItem(target: str, itemName: str, itemSpecialID: int = -1) -> int:
         itemSpecialID (int): 物品特殊值，默认值 -1
     """
     if (
-        (target not in game_ctrl.allplayers)
+        (target not in game_ctrl.roster)
         and (target != game_ctrl.bot_name)
         and (not target.startswith("@a"))
     ):
@@ -147,66 +219,154 @@ def getItem(target: str, itemName: str, itemSpecialID: int = -1) -> int:
     return int(result.OutputMessages[0].Parameters[1])
 
 
-def getPosXYZ(player, timeout: int | float = 30) -> tuple[float, float, float]:
+def getMultiItem(
+    itemName: str, itemSpecialID: int = -1, target: str = "@a", timeout=30
+) -> dict[str, int]:
+    """
+    只用一条 clear 指令获取多名玩家背包内指定物品的数量
+    参数:
+        itemName (str): 物品 ID
+        itemSpecialID (int): 物品特殊值，默认值 -1
+        target (str): 目标选择器，默认为所有玩家
+        timeout: 超时时间
+    返回:
+        玩家名 -> 物品数量
+    """
+    _check_gamectrl_avali()
+    result: Packet_CommandOutput = game_ctrl.sendcmd_with_resp(
+        f"/clear {target} {itemName} {itemSpecialID} 0", timeout
+    )
+    counts = {}
+    for msg in result.OutputMessages:
+        if msg.Message == "commands.generic.syntax":
+            raise ValueError("物品 ID 错误")
+        if not msg.Parameters:
+            continue
+        if msg.Message == "commands.clear.failure.no.items":
+            counts[msg.Parameters[0]] = 0
+        elif len(msg.Parameters) >= 2:
+            counts[msg.Parameters[0]] = int(msg.Parameters[1])
+    return counts
+
+
+def getPosXYZ(
+    player, timeout: int | float = 30, cached: bool = False
+) -> tuple[float, float, float]:
     """
     获取玩家的简略坐标值，并以坐标三元元组返回
     参数:
         player (str): 玩家名
         timeout (int): 最长超时时间
+        cached (bool): 是否使用查询缓存
     返回:
         tuple[float, float, float]
     """
-    res = getPos(player, timeout=timeout)["position"]
+    res = getPos(player, timeout=timeout, cached=cached)["position"]
     return res["x"], res["y"], res["z"]
 
 
-def getMultiScore(scoreboardNameToGet: str, targetNameToGet: str) -> int | dict:
+def getMultiScore(
+    scoreboardNameToGet: str, targetNameToGet: str, cached: bool = False
+) -> int | dict:
     """
     获取单个或多个计分板分数项
     参数:
         scoreboardNameToGet: 计分板名
         targetNameToGet: 获取分数的对象/目标选择器
+        cached: 是否使用查询缓存
     返回:
         分数：int
     异常:
         ValueError: 无法获取分数
     """
-    resultList = game_ctrl.sendcmd_with_resp(
-        f"/scoreboard players list {targetNameToGet}"
-    ).OutputMessages
+    if cached:
+        return query_cache.get(
+            "score",
+            ("multi", scoreboardNameToGet, targetNameToGet),
+            lambda: getMultiScore(scoreboardNameToGet, targetNameToGet),
+            scoreboard=(
+                ANY_SCOREBOARD if scoreboardNameToGet == "*" else scoreboardNameToGet
+            ),
+        )
+    result, result2 = _parse_score_list(
+        game_ctrl.sendcmd_with_resp(
+            f"/scoreboard players list {targetNameToGet}"
+        ).OutputMessages
+    )
+    if not (result or result2):
+        raise Exception("获取计分板分数失败")
+    try:
+        if targetNameToGet == "*" or targetNameToGet.startswith("@"):
+            return result2[scoreboardNameToGet]
+        if scoreboardNameToGet == "*":
+            return result[targetNameToGet]
+        return result[targetNameToGet][scoreboardNameToGet]
+    except KeyError as err:
+        raise Exception(f"获取计分板分数失败：{err}")
+
+
+def _parse_score_list(outputs) -> tuple[dict, dict]:
+    """解析 scoreboard players list 的返回
+
+    返回:
+        (对象名 -> 计分板名 -> 分数, 计分板名 -> 对象名 -> 分数)
+    """
     result = {}
     result2 = {}
-    for i in resultList:
+    targetName = None
+    for i in outputs:
         Message = i.Message
         if Message == r"commands.scoreboard.players.list.player.empty":
             continue
         if Message == r"§a%commands.scoreboard.players.list.player.count":
             targetName = i.Parameters[1][1:]
         elif Message == "commands.scoreboard.players.list.player.entry":
-            if targetName == "commands.scoreboard.players.offlinePlayerName":
+            if targetName in (None, "commands.scoreboard.players.offlinePlayerName"):
                 continue
             scoreboardName = i.Parameters[2]
             targetScore = int(i.Parameters[0])
-            if targetName not in result:
-                result[targetName] = {}
-            result[targetName][scoreboardName] = targetScore
-            if scoreboardName not in result2:
-                result2[scoreboardName] = {}
-            result2[scoreboardName][targetName] = targetScore
-    if not (result or result2):
-        raise Exception("获取计分板分数失败")
-    try:
-        if targetNameToGet == "*" or targetNameToGet.startswith("@"):
-            return result2[scoreboardNameToGet]
-        if scoreboardNameToGet == "*":
-            return result[targetNameToGet]
-        return result[targetNameToGet][scoreboardNameToGet]
-    except KeyError as err:
-        raise Exception(f"获取计分板分数失败：{err}")
+            result.setdefault(targetName, {})[scoreboardName] = targetScore
+            result2.setdefault(scoreboardName, {})[targetName] = targetScore
+    return result, result2
+
+
+def getMultiScores(
+    target: str = "*", timeout=30, cached: bool = False
+) -> dict[str, dict[str, int]]:
+    """
+    只用一条 scoreboard players list 指令获取多个对象的全部计分板分数
+    参数:
+        target: 获取分数的对象/目标选择器，默认为所有对象
+        timeout: 超时时间
+        cached: 是否使用查询缓存
+    返回:
+        对象名 -> 计分板名 -> 分数
+    """
+    _check_gamectrl_avali()
+    if cached:
+        return query_cache.get(
+            "scores",
+            target,
+            lambda: getMultiScores(target, timeout),
+            scoreboard=ANY_SCOREBOARD,
+        )
+    result, _ = _parse_score_list(
+        game_ctrl.sendcmd_with_resp(
+            f"/scoreboard players list {target}", timeout
+        ).OutputMessages
+    )
+    return result
 
 
-def getScore(scb_name: str, target: str, timeout=30) -> int:
+def getScore(scb_name: str, target: str, timeout=30, cached: bool = False) -> int:
     _check_gamectrl_avali()
+    if cached:
+        return query_cache.get(
+            "score",
+            (scb_name, target),
+            lambda: getScore(scb_name, target, timeout),
+            scoreboard=scb_name,
+        )
     if target == "*" or scb_name == "*":
         raise ValueError("在此处无法使用 通配符 作为计分板分数获取目标")
     resp = game_ctrl.sendcmd_with_resp(
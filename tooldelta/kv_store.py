@@ -0,0 +1,311 @@
+"""
+插件数据的键值存储
+
+每个插件可在 插件数据文件/<插件名>/ 下打开若干个键值库, 适合按玩家存放的小块数据
+(余额, 家园, 统计等): 单个键的读写不需要读写整个文件, 也不会产生成千上万的小文件.
+值为任意可 JSON 序列化的对象.
+
+目前提供基于 sqlite (WAL 模式) 的实现; 其他后端实现 KVStore 的方法后登记到 KV_BACKENDS 即可.
+"""
+
+import contextlib
+import os
+import sqlite3
+import threading
+from collections.abc import Iterator
+from typing import TYPE_CHECKING, Any
+
+import ujson as json
+
+from .constants import TOOLDELTA_PLUGIN_DATA_DIR
+
+if TYPE_CHECKING:
+    from typing import Self
+
+_MISSING = object()
+
+
+class KVStore:
+    """键值库的通用接口"""
+
+    shared = False
+    "是否为 open_store 返回的共享实例; 共享实例退出 with 语句时不会被关闭"
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """获取一个键的值
+
+        Args:
+            key (str): 键
+            default (Any, optional): 键不存在时返回的值
+
+        Returns:
+            Any: 值
+        """
+        raise NotImplementedError
+
+    def put(self, key: str, value: Any) -> None:
+        """写入一个键的值
+
+        Args:
+            key (str): 键
+            value (Any): 可 JSON 序列化的值
+        """
+        raise NotImplementedError
+
+    def delete(self, key: str) -> bool:
+        """删除一个键
+
+        Args:
+            key (str): 键
+
+        Returns:
+            bool: 键是否存在
+        """
+        raise NotImplementedError
+
+    def scan(self, prefix: str = "") -> Iterator[tuple[str, Any]]:
+        """按键的顺序遍历所有以 prefix 开头的键值对
+
+        Args:
+            prefix (str, optional): 键前缀
+
+        Yields:
+            tuple[str, Any]: 键值对
+        """
+        raise NotImplementedError
+
+    def transaction(self) -> contextlib.AbstractContextManager:
+        """开启一个事务, 其中的所有写入要么全部生效, 要么在出现异常时全部撤销
+
+        ```python
+        with store.transaction():
+            store.put("a", 1)
+            store.put("b", 2)
+        ```
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """关闭键值库; 由 open_store 打开的库关闭后, 再次 open_store 会重新打开"""
+        raise NotImplementedError
+
+    def put_many(self, items: dict[str, Any]) -> None:
+        """在一个事务中写入多个键值对
+
+        Args:
+            items (dict[str, Any]): 键值对
+        """
+        with self.transaction():
+            for key, value in items.items():
+                self.put(key, value)
+
+    def keys(self, prefix: str = "") -> list[str]:
+        """获取所有以 prefix 开头的键
+
+        Args:
+            prefix (str, optional): 键前缀
+
+        Returns:
+            list[str]: 键列表
+        """
+        return [key for key, _ in self.scan(prefix)]
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __enter__(self) -> "Self":
+        return self
+
+    def __exit__(self, *_) -> None:
+        # 共享实例可能还被其他线程或插件使用, 由 close() 或 close_all_stores 关闭
+        if not self.shared:
+            self.close()
+
+
+class SqliteKVStore(KVStore):
+    """基于 sqlite 的键值库, 使用 WAL 日志, 写入途中崩溃不会损坏数据"""
+
+    def __init__(self, path: str) -> None:
+        """
+        Args:
+            path (str): 数据库文件路径
+        """
+        self.path = path
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # WAL 模式下 NORMAL 在断电时最多丢失最近的事务, 不会损坏数据库
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            " WITHOUT ROWID"
+        )
+        self._lock = threading.RLock()
+        self._depth = 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM kv WHERE key = ?", (key,)
+            ).fetchone()
+        return default if row is None else json.loads(row[0])
+
+    def put(self, key: str, value: Any) -> None:
+        data = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO kv (key, value) VALUES (?, ?)", (key, data)
+            )
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            return (
+                self._conn.execute("DELETE FROM kv WHERE key = ?", (key,)).rowcount > 0
+            )
+
+    def scan(self, prefix: str = "") -> Iterator[tuple[str, Any]]:
+        upper = _prefix_upper_bound(prefix)
+        with self._lock:
+            if upper is not None:
+                # 以前缀的下一个字符串为上界, 可以使用主键索引
+                rows = self._conn.execute(
+                    "SELECT key, value FROM kv WHERE key >= ? AND key < ? ORDER BY key",
+                    (prefix, upper),
+                ).fetchall()
+            elif prefix:
+                rows = self._conn.execute(
+                    "SELECT key, value FROM kv WHERE key >= ? ORDER BY key", (prefix,)
+                ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT key, value FROM kv ORDER BY key"
+                ).fetchall()
+        for key, value in rows:
+            yield key, json.loads(value)
+
+    @contextlib.contextmanager
+    def transaction(self) -> Iterator["SqliteKVStore"]:
+        # 事务期间其他线程的读写会等待; 嵌套的事务并入最外层
+        with self._lock:
+            if self._depth == 0:
+                self._conn.execute("BEGIN IMMEDIATE")
+            self._depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._conn.execute("ROLLBACK")
+                raise
+            self._depth -= 1
+            if self._depth == 0:
+                self._conn.execute("COMMIT")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM kv").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+        _forget_store(self)
+
+
+def _prefix_upper_bound(prefix: str) -> str | None:
+    """获取比所有以 prefix 开头的字符串都大的最小字符串, 不存在 (或前缀为空) 时为 None"""
+    while prefix:
+        code = ord(prefix[-1]) + 1
+        if 0xD800 <= code <= 0xDFFF:
+            # 代理区的码位无法编码为 UTF-8, 跳到其后
+            code = 0xE000
+        if code <= 0x10FFFF:
+            return prefix[:-1] + chr(code)
+        # 末尾为 U+10FFFF 时没有下一个字符, 改为递增前一个字符
+        prefix = prefix[:-1]
+    return None
+
+
+# 后端名 -> (实现, 数据文件扩展名)
+KV_BACKENDS: dict[str, tuple[type[KVStore], str]] = {
+    "sqlite": (SqliteKVStore, ".db"),
+}
+_opened_stores: dict[tuple[str, str, str], KVStore] = {}
+_opened_lock = threading.Lock()
+
+
+def open_store(
+    plugin_name: str, name: str = "data", backend: str = "sqlite"
+) -> KVStore:
+    """打开插件的一个键值库, 同一个库只会被打开一次
+
+    返回的实例由所有调用方共享, 可在多个线程中使用; 退出 with 语句时不会关闭它,
+    程序退出时由 close_all_stores 统一关闭.
+
+    Args:
+        plugin_name (str): 插件名
+        name (str, optional): 库名
+        backend (str, optional): 后端, 见 KV_BACKENDS
+
+    Returns:
+        KVStore: 键值库
+    """
+    key = (plugin_name, name, backend)
+    with _opened_lock:
+        store = _opened_stores.get(key)
+        if store is None:
+            cls, ext = KV_BACKENDS[backend]
+            folder = os.path.join(TOOLDELTA_PLUGIN_DATA_DIR, plugin_name)
+            os.makedirs(folder, exist_ok=True)
+            store = _opened_stores[key] = cls(os.path.join(folder, name + ext))
+            store.shared = True
+        return store
+
+
+def _forget_store(store: KVStore) -> None:
+    with _opened_lock:
+        for key, opened in list(_opened_stores.items()):
+            if opened is store:
+                del _opened_stores[key]
+
+
+def close_all_stores() -> None:
+    """关闭所有已打开的键值库"""
+    with _opened_lock:
+        stores = list(_opened_stores.values())
+        _opened_stores.clear()
+    for store in stores:
+        store.close()
+
+
+def migrate_json_files(
+    store: KVStore, folder: str, split_top_level: bool = False
+) -> int:
+    """将文件夹内的 JSON 文件导入键值库, 原文件保持不变
+
+    Args:
+        store (KVStore): 键值库
+        folder (str): JSON 文件所在的文件夹, 如 插件数据文件/<插件名>/玩家数据
+        split_top_level (bool, optional): 为 False 时每个文件作为一个键 (文件名去掉 .json);
+            为 True 时文件的每个顶层键作为一个键, 适合原先存放在单个大文件中的数据
+
+    Returns:
+        int: 导入的键数量
+    """
+    count = 0
+    with store.transaction():
+        for file in sorted(os.listdir(folder)):
+            if not file.endswith(".json"):
+                continue
+            with open(os.path.join(folder, file), encoding="utf-8") as f:
+                content = json.load(f)
+            if split_top_level:
+                if not isinstance(content, dict):
+                    raise ValueError(f"{file} 的内容不是 JSON 对象, 无法按顶层键拆分")
+                for key, value in content.items():
+                    store.put(key, value)
+                count += len(content)
+            else:
+                store.put(file[:-5], content)
+                count += 1
+    return count
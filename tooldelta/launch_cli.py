@@ -1,11 +1,15 @@
 """客户端启动器框架"""
 
+import asyncio
 import os
 import platform
 import shlex
 import subprocess
 import threading
 import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future
+from concurrent.futures import wait as futures_wait
 from typing import Callable, Optional
 
 import tooldelta
@@ -14,7 +18,8 @@ from .cfg import Cfg
 from .color_print import Print
 from .neo_libs import file_download as neo_fd
 from .neo_libs import neo_conn
-from .packets import Packet_CommandOutput
+from .packet_dispatcher import DispatcherOptions
+from .packets import LazyPacket, Packet_CommandOutput
 from .sys_args import sys_args_to_dict
 from .urlmethod import get_free_port
 from .utils import Utils
@@ -144,6 +149,63 @@ class StandardFrame:
         """
         raise NotImplementedError
 
+    async def sendcmd_async(
+        self, cmd: str, timeout: float = 30
+    ) -> Packet_CommandOutput:
+        """以玩家身份发送命令, 在协程中等待结果
+
+        Args:
+            cmd (str): 命令
+            timeout (int | float, optional): 超时时间
+
+        Raises:
+            NotImplementedError: 未实现此方法
+
+        Returns:
+            Packet_CommandOutput: 返回命令结果
+        """
+        raise NotImplementedError
+
+    async def sendwscmd_async(
+        self, cmd: str, timeout: float = 30
+    ) -> Packet_CommandOutput:
+        """以 ws 身份发送命令, 在协程中等待结果
+
+        Args:
+            cmd (str): 命令
+            timeout (int | float, optional): 超时时间
+
+        Raises:
+            NotImplementedError: 未实现此方法
+
+        Returns:
+            Packet_CommandOutput: 返回命令结果
+        """
+        raise NotImplementedError
+
+    def sendcmd_many(
+        self,
+        cmds: Iterable[str],
+        window: int = 32,
+        timeout: float = 30,
+        as_player: bool = False,
+    ) -> Iterator[tuple[int, Packet_CommandOutput | None]]:
+        """批量发送命令, 同时最多有 window 条命令等待返回, 按返回先后产出结果
+
+        Args:
+            cmds (Iterable[str]): 命令
+            window (int, optional): 同时等待返回的命令数上限
+            timeout (int | float, optional): 单条命令的超时时间
+            as_player (bool, optional): 是否以玩家身份发送, 默认以 ws 身份发送
+
+        Raises:
+            NotImplementedError: 未实现此方法
+
+        Returns:
+            Iterator[tuple[int, Optional[Packet_CommandOutput]]]: (命令序号, 命令结果), 超时的命令结果为 None
+        """
+        raise NotImplementedError
+
     def sendwocmd(self, cmd: str) -> None:
         """以 wo 身份发送命令
 
@@ -226,6 +288,7 @@ class FrameNeOmg(StandardFrame):
         self.serverNumber = None
         self.neomega_account_opt = None
         self.bot_name = ""
+        self.dispatcher_options = DispatcherOptions()
         self.omega = neo_conn.ThreadOmega(
             connect_type=neo_conn.ConnectType.Remote,
             address="tcp://localhost:24013",
@@ -276,6 +339,7 @@ class FrameNeOmg(StandardFrame):
         """
         retries = 0
         self.omega.address = f"tcp://localhost:{openat_port}"
+        self.omega.dispatcher_options = self.dispatcher_options
         while retries <= 10:
             try:
                 self.omega.connect()
@@ -371,11 +435,9 @@ class FrameNeOmg(StandardFrame):
         self.update_status(SysStatus.RUNNING)
         self.wait_omega_disconn_thread()
         Print.print_suc("已开启接入点进程")
-        pcks = [
-            self.omega.get_packet_id_to_name_mapping(i)
-            for i in self.need_listen_packets
-        ]
-        self.omega.listen_packets(pcks, self.packet_handler_parent)
+        self.omega.listen_packets_by_id(
+            list(self.need_listen_packets), self.packet_handler_parent
+        )
         self._launcher_listener()
         Print.print_suc("接入点已就绪！")
         self.exit_event.wait()  # 等待事件的触发
@@ -407,20 +469,19 @@ class FrameNeOmg(StandardFrame):
             self.bot_name = self.omega.get_bot_name()
         return self.bot_name
 
-    def packet_handler_parent(self, pkt_type: str, pkt: dict) -> None:
+    def packet_handler_parent(self, pkt_type: int, pkt: LazyPacket) -> None:
         """数据包处理器
 
         Args:
-            pkt_type (str): 数据包类型
-            pkt (dict): 数据包内容
+            pkt_type (int): 数据包 ID
+            pkt (LazyPacket): 数据包内容
 
         Raises:
             ValueError: 未连接到接入点
         """
         if self.omega is None or self.packet_handler is None:
             raise ValueError("未连接到接入点")
-        packetType = self.omega.get_packet_name_to_id_mapping(pkt_type)
-        self.packet_handler(packetType, pkt)
+        self.packet_handler(pkt_type, pkt)
 
     def check_avaliable(self):
         if self.status != SysStatus.RUNNING:
@@ -444,10 +505,7 @@ class FrameNeOmg(StandardFrame):
         """
         self.check_avaliable()
         if waitForResp:
-            res = self.omega.send_player_command_need_response(cmd, timeout)
-            if res is None:
-                raise TimeoutError("指令超时")
-            return res
+            return self.omega.send_player_command_need_response(cmd, timeout)
         self.omega.send_player_command_omit_response(cmd)
         return None
 
@@ -469,13 +527,99 @@ class FrameNeOmg(StandardFrame):
         """
         self.check_avaliable()
         if waitForResp:
-            res = self.omega.send_websocket_command_need_response(cmd, timeout)
-            if res is None:
-                raise TimeoutError("指令超时")
-            return res
+            return self.omega.send_websocket_command_need_response(cmd, timeout)
         self.omega.send_websocket_command_omit_response(cmd)
         return None
 
+    async def sendcmd_async(
+        self, cmd: str, timeout: float = 30
+    ) -> Packet_CommandOutput:
+        """以玩家身份发送命令, 在协程中等待结果
+
+        Args:
+            cmd (str): 命令
+            timeout (int | float, optional): 超时时间
+
+        Raises:
+            TimeoutError: 指令超时
+
+        Returns:
+            Packet_CommandOutput: 返回命令结果
+        """
+        self.check_avaliable()
+        return await asyncio.wrap_future(
+            self.omega.send_player_command_future(cmd, timeout)
+        )
+
+    async def sendwscmd_async(
+        self, cmd: str, timeout: float = 30
+    ) -> Packet_CommandOutput:
+        """以 ws 身份发送命令, 在协程中等待结果
+
+        Args:
+            cmd (str): 命令
+            timeout (int | float, optional): 超时时间
+
+        Raises:
+            TimeoutError: 指令超时
+
+        Returns:
+            Packet_CommandOutput: 返回命令结果
+        """
+        self.check_avaliable()
+        return await asyncio.wrap_future(
+            self.omega.send_websocket_command_future(cmd, timeout)
+        )
+
+    def sendcmd_many(
+        self,
+        cmds: Iterable[str],
+        window: int = 32,
+        timeout: float = 30,
+        as_player: bool = False,
+    ) -> Iterator[tuple[int, Packet_CommandOutput | None]]:
+        """批量发送命令, 同时最多有 window 条命令等待返回, 按返回先后产出结果
+
+        Args:
+            cmds (Iterable[str]): 命令
+            window (int, optional): 同时等待返回的命令数上限
+            timeout (int | float, optional): 单条命令的超时时间
+            as_player (bool, optional): 是否以玩家身份发送, 默认以 ws 身份发送
+
+        Returns:
+            Iterator[tuple[int, Optional[Packet_CommandOutput]]]: (命令序号, 命令结果), 超时的命令结果为 None
+        """
+        self.check_avaliable()
+        send = (
+            self.omega.send_player_command_future
+            if as_player
+            else self.omega.send_websocket_command_future
+        )
+        cmd_iter = enumerate(cmds)
+        # 等待返回的命令 -> 命令序号, 超时由指令回调登记表统一处理
+        pending: dict[Future, int] = {}
+        try:
+            while True:
+                while len(pending) < window:
+                    item = next(cmd_iter, None)
+                    if item is None:
+                        break
+                    index, cmd = item
+                    pending[send(cmd, timeout)] = index
+                if not pending:
+                    return
+                done, _ = futures_wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    index = pending.pop(fut)
+                    if fut.cancelled() or fut.exception() is not None:
+                        yield index, None
+                    else:
+                        yield index, fut.result()
+        finally:
+            # 调用方提前结束迭代时, 取消未返回的命令
+            for fut in pending:
+                fut.cancel()
+
     def sendwocmd(self, cmd: str) -> None:
         """以 wo 身份发送命令
 
@@ -604,11 +748,9 @@ class FrameNeOmgRemote(FrameNeOmg):
         self.update_status(SysStatus.RUNNING)
         self.wait_omega_disconn_thread()
         Print.print_suc("已连接上接入点进程。")
-        pcks = [
-            self.omega.get_packet_id_to_name_mapping(i)
-            for i in self.need_listen_packets
-        ]
-        self.omega.listen_packets(pcks, self.packet_handler_parent)
+        self.omega.listen_packets_by_id(
+            list(self.need_listen_packets), self.packet_handler_parent
+        )
         self._launcher_listener()
         Print.print_suc("接入点已就绪")
         self.exit_event.wait()
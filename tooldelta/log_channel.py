@@ -0,0 +1,275 @@
+"""
+插件日志通道
+
+每个插件有一个日志通道, 通道内按调用位置 (文件与行号, 或者调用方给出的名称) 分别计数:
+- 令牌桶限速: 同一位置的输出超过速率时被省略, 恢复后提示省略了多少条
+- 去重: 同一位置连续输出相同的内容时只输出一次, 之后提示重复了多少次
+- 报错堆栈采样: 同一位置同一种报错的完整堆栈每 TRACEBACK_SAMPLE_EVERY 次 (或每 TRACEBACK_SAMPLE_INTERVAL 秒) 输出一次,
+  其余只输出最后一行; 报错堆栈不参与去重, 每一次都会被计数
+- 没有新的输出时, 积压的重复与省略提示每 NOTICE_FLUSH_INTERVAL 秒由 log_channel_flush_thread 输出一次
+"""
+
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+
+from .color_print import Print
+from .utils import Utils
+
+# 同一位置每秒允许的输出条数
+LOG_CHANNEL_RATE = 5.0
+# 同一位置可连续输出的条数
+LOG_CHANNEL_BURST = 20
+# 相同内容在此时间 (秒) 内重复出现时不再输出
+DEDUP_WINDOW = 30.0
+# 同一种报错每出现多少次输出一次完整堆栈
+TRACEBACK_SAMPLE_EVERY = 100
+# 同一种报错至少每隔多久 (秒) 输出一次完整堆栈
+TRACEBACK_SAMPLE_INTERVAL = 60.0
+# 积压的重复与省略提示每隔多久 (秒) 输出一次
+NOTICE_FLUSH_INTERVAL = 10.0
+_TRACEBACK_HEAD = "Traceback (most recent call last)"
+
+
+@dataclass
+class SiteStats:
+    "一个调用位置的限流状态与计数"
+
+    tokens: float = LOG_CHANNEL_BURST
+    last_refill: float = 0.0
+    last_text: str = ""
+    last_time: float = 0.0
+    "上次输出的时间"
+    repeats: int = 0
+    rate_limited_pending: int = 0
+    # 报错特征 -> (出现次数, 上次输出完整堆栈的时间)
+    tracebacks: dict[str, tuple[int, float]] = field(default_factory=dict)
+    printed: int = 0
+    deduplicated: int = 0
+    rate_limited: int = 0
+    sampled: int = 0
+
+
+def _traceback_signature(text: str) -> str | None:
+    """获取报错堆栈的特征: 最内层的调用位置与异常类型; 不是报错堆栈时返回 None"""
+    if _TRACEBACK_HEAD not in text:
+        return None
+    lines = [ln for ln in text.rstrip().splitlines() if ln.strip()]
+    frame = next(
+        (ln.strip() for ln in reversed(lines) if ln.lstrip().startswith('File "')),
+        "",
+    )
+    return frame + " | " + lines[-1].split(":", 1)[0].strip()
+
+
+def exception_site(err: BaseException) -> str:
+    """以报错的异常类型与最内层的调用位置作为日志通道的调用位置
+
+    Args:
+        err (BaseException): 异常
+
+    Returns:
+        str: 调用位置, 如 ValueError@plugin.py:12
+    """
+    tb = err.__traceback__
+    if tb is None:
+        return type(err).__name__
+    while tb.tb_next is not None:
+        tb = tb.tb_next
+    return f"{type(err).__name__}@{tb.tb_frame.f_code.co_filename}:{tb.tb_lineno}"
+
+
+class LogChannel:
+    """一个插件的日志通道
+
+    ```python
+    channel = log_channels.get(self.name)
+    channel.print_err(traceback.format_exc())
+    ```
+    """
+
+    def __init__(self, name: str) -> None:
+        """
+        Args:
+            name (str): 插件名
+        """
+        self.name = name
+        self.sites: dict[str, SiteStats] = {}
+        self._lock = threading.Lock()
+
+    def emit(
+        self, text: str, info: str = Print.INFO_NORMAL, site: str | None = None
+    ) -> bool:
+        """经过限速, 去重与采样后输出一条信息
+
+        Args:
+            text (str): 输出的文本
+            info (str, optional): 输出的信息, 如 Print.INFO_ERROR
+            site (str | None, optional): 调用位置, 默认为调用方的文件与行号
+
+        Returns:
+            bool: 是否输出了这条信息
+        """
+        if site is None:
+            site = _caller_site()
+        notices = []
+        with self._lock:
+            now = time.monotonic()
+            st = self.sites.get(site)
+            if st is None:
+                st = self.sites[site] = SiteStats(last_refill=now)
+            # 报错堆栈先计数再决定是否输出, 相同的堆栈不会被去重吞掉
+            sig = _traceback_signature(text)
+            if sig is not None:
+                count, last_full = st.tracebacks.get(sig, (0, 0.0))
+                count += 1
+                st.tracebacks[sig] = (count, last_full)
+            elif text == st.last_text and now - st.last_time < DEDUP_WINDOW:
+                st.repeats += 1
+                st.deduplicated += 1
+                return False
+            if st.repeats:
+                notices.append(_repeats_notice(st))
+            st.last_text = text
+            st.last_time = now
+            st.tokens = min(
+                LOG_CHANNEL_BURST, st.tokens + (now - st.last_refill) * LOG_CHANNEL_RATE
+            )
+            st.last_refill = now
+            if st.tokens < 1:
+                st.rate_limited += 1
+                st.rate_limited_pending += 1
+                return False
+            st.tokens -= 1
+            if st.rate_limited_pending:
+                notices.append(_rate_limited_notice(st))
+            if sig is not None:
+                if (
+                    count == 1
+                    or count % TRACEBACK_SAMPLE_EVERY == 0
+                    or now - last_full >= TRACEBACK_SAMPLE_INTERVAL
+                ):
+                    st.tracebacks[sig] = (count, now)
+                else:
+                    st.sampled += 1
+                    text = (
+                        f"{text.rstrip().splitlines()[-1]} "
+                        f"§7(相同报错第 {count} 次, 已省略堆栈)"
+                    )
+            st.printed += 1
+        self._print_notices(notices)
+        Print.print_with_info(text, info, source=self.name)
+        return True
+
+    def flush(self) -> None:
+        """立即输出积压的重复与省略提示, 不必等到同一位置有新的输出"""
+        notices = []
+        with self._lock:
+            for st in self.sites.values():
+                # 只清空计数, 之后相同的内容仍会被去重
+                if st.repeats:
+                    notices.append(_repeats_notice(st))
+                if st.rate_limited_pending:
+                    notices.append(_rate_limited_notice(st))
+        self._print_notices(notices)
+
+    def _print_notices(self, notices: list[str]) -> None:
+        for notice in notices:
+            Print.print_with_info(
+                f"§7[{self.name}] {notice}", Print.INFO_NORMAL, source=self.name
+            )
+
+    def print_inf(self, text: str, site: str | None = None) -> bool:
+        """经过限流输出 INFO 信息, 参数见 emit"""
+        return self.emit(text, Print.INFO_NORMAL, site)
+
+    def print_suc(self, text: str, site: str | None = None) -> bool:
+        """经过限流输出成功信息, 参数见 emit"""
+        return self.emit(f"§a{text}", Print.INFO_SUCC, site)
+
+    def print_war(self, text: str, site: str | None = None) -> bool:
+        """经过限流输出警告信息, 参数见 emit"""
+        return self.emit(f"§6{text}", Print.INFO_WARN, site)
+
+    def print_err(self, text: str, site: str | None = None) -> bool:
+        """经过限流输出错误信息, 参数见 emit"""
+        return self.emit(f"§c{text}", Print.INFO_ERROR, site)
+
+
+def _repeats_notice(st: SiteStats) -> str:
+    # 须持有通道的锁
+    notice = f"§7上一条信息又重复出现了 {st.repeats} 次"
+    st.repeats = 0
+    return notice
+
+
+def _rate_limited_notice(st: SiteStats) -> str:
+    # 须持有通道的锁
+    notice = f"§7输出过快, 已省略 {st.rate_limited_pending} 条信息"
+    st.rate_limited_pending = 0
+    return notice
+
+
+def _caller_site() -> str:
+    # 跳过本模块内的调用
+    frame = sys._getframe(1)
+    while frame.f_code.co_filename == __file__ and frame.f_back is not None:
+        frame = frame.f_back
+    return f"{frame.f_code.co_filename}:{frame.f_lineno}"
+
+
+class LogChannels:
+    "所有插件的日志通道"
+
+    def __init__(self) -> None:
+        self._channels: dict[str, LogChannel] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> LogChannel:
+        """获取一个插件的日志通道, 不存在时创建
+
+        Args:
+            name (str): 插件名
+
+        Returns:
+            LogChannel: 日志通道
+        """
+        channel = self._channels.get(name)
+        if channel is None:
+            with self._lock:
+                channel = self._channels.setdefault(name, LogChannel(name))
+        return channel
+
+    def stats(self) -> list[tuple[str, str, SiteStats]]:
+        """获取有信息被省略的调用位置
+
+        Returns:
+            list[tuple[str, str, SiteStats]]: (插件名, 调用位置, 计数), 按省略的条数从多到少排序
+        """
+        result = []
+        for name, channel in list(self._channels.items()):
+            with channel._lock:
+                for site, st in channel.sites.items():
+                    if st.deduplicated or st.rate_limited or st.sampled:
+                        result.append((name, site, st))
+        result.sort(
+            key=lambda x: x[2].deduplicated + x[2].rate_limited + x[2].sampled,
+            reverse=True,
+        )
+        return result
+
+    def flush(self) -> None:
+        """输出所有插件积压的重复与省略提示"""
+        for channel in list(self._channels.values()):
+            channel.flush()
+
+
+log_channels = LogChannels()
+
+
+@Utils.thread_func("插件日志通道定时提示")
+def log_channel_flush_thread() -> None:
+    while True:
+        time.sleep(NOTICE_FLUSH_INTERVAL)
+        log_channels.flush()
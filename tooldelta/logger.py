@@ -1,7 +1,43 @@
 "日志记录器"
 
+import contextlib
+import glob
+import gzip
 import os
+import queue
+import shutil
+import threading
 import time
+from dataclasses import dataclass
+
+import ujson as json
+
+# 单个日志文件的最大字节数, 超出时滚动为新的分卷
+LOG_MAX_BYTES = 64 * 1024 * 1024
+# 每天最多保留的已滚动分卷数, 超出时删除最早的
+LOG_BACKUP_COUNT = 20
+# 单条日志的最大长度, 超出部分截断
+LOG_MAX_MESSAGE_LENGTH = 8192
+LOG_DEFAULT_SOURCE = "ToolDelta"
+
+
+@dataclass(slots=True)
+class LogRecord:
+    "一条结构化的日志记录"
+
+    created: float
+    "记录时的时间戳"
+    monotonic: float
+    "记录时的单调时钟读数, 用于计算间隔"
+    level: str
+    msg: str
+    source: str
+    "来源, 如插件名"
+    thread: str
+    "记录日志的线程名"
+
+
+_STOP = object()
 
 
 class ToolDeltaLogger:
@@ -13,66 +49,318 @@ class ToolDeltaLogger:
     FATAL = "FATAL"
     OTHER_TYPE = "???"
 
-    def __init__(self, log_path, name_fmt="%Y-%m-%d"):
-        "初始化"
+    def __init__(
+        self,
+        log_path,
+        name_fmt="%Y-%m-%d",
+        max_bytes: int = LOG_MAX_BYTES,
+        backup_count: int = LOG_BACKUP_COUNT,
+        compress: bool = True,
+        json_lines: bool = False,
+    ):
+        """初始化
+
+        Args:
+            log_path (str): 日志文件夹
+            name_fmt (str, optional): 日志文件名的日期格式
+            max_bytes (int, optional): 单个日志文件的最大字节数
+            backup_count (int, optional): 每天最多保留的已滚动分卷数
+            compress (bool, optional): 是否用 gzip 压缩已滚动的日志文件
+            json_lines (bool, optional): 是否以 JSON Lines 格式记录, 每行一个 JSON 对象
+        """
         self.path = log_path
         self.name_fmt = name_fmt
-        self.now_day = time.strftime("%Y-%m-%d")
         self.logging_fmt = "[%H-%M-%S]"
-        self.lastLogTime = time.time()
-        self.open_wrapper_io(log_path)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.compress = compress
+        self.json_lines = json_lines
         self.enable_logger = False
         self.writable = True
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+        self._wrapper = None
+        self._size = 0
+        self._day_end = 0.0
+        self._stamp_second = -1
+        self._stamp = ""
+        self._failing = False
 
     def switch_logger(self, isopen: bool) -> None:
         "切换日志记录器状态"
         self.enable_logger = isopen
 
-    def open_wrapper_io(self, log_path: str) -> None:
-        "打开 IO 流"
-        self._wrapper = open(
-            log_path + os.sep + time.strftime(self.name_fmt) + ".log",
-            "a",
-            encoding="utf-8",
-            buffering=4096,
-        )
+    def configure(
+        self,
+        max_bytes: int | None = None,
+        backup_count: int | None = None,
+        compress: bool | None = None,
+        json_lines: bool | None = None,
+    ) -> None:
+        """修改滚动与格式设置, 在写入下一条日志时生效
+
+        Args:
+            max_bytes (int | None, optional): 单个日志文件的最大字节数
+            backup_count (int | None, optional): 每天最多保留的已滚动分卷数
+            compress (bool | None, optional): 是否压缩已滚动的日志文件
+            json_lines (bool | None, optional): 是否以 JSON Lines 格式记录
+        """
+        if max_bytes is not None:
+            self.max_bytes = max(1024, max_bytes)
+        if backup_count is not None:
+            self.backup_count = max(0, backup_count)
+        if compress is not None:
+            self.compress = compress
+        if json_lines is not None and json_lines != self.json_lines:
+            self.json_lines = json_lines
+            # 换用另一种扩展名的文件
+            self._day_end = 0.0
+
+    def log_in(
+        self,
+        msg,
+        level=INFO,
+        source: str | None = None,
+        thread: str | None = None,
+        created: float | None = None,
+    ) -> None:
+        """写入日志信息。level 给定了其等级。
 
-    def log_in(self, msg, level=INFO) -> None:
-        "写入日志信息。level 给定了其等级。"
+        日志由后台线程写入文件, 调用方不会被磁盘读写阻塞。
+
+        Args:
+            msg (str): 日志信息
+            level (str, optional): 等级
+            source (str | None, optional): 来源, 默认为 ToolDelta
+            thread (str | None, optional): 记录日志的线程名, 默认为当前线程
+            created (float | None, optional): 信息产生时的时间戳, 默认为当前时间
+        """
         if not self.writable or not self.enable_logger:
             return
         if not isinstance(msg, str):
             raise TypeError("only allows string")
-        if "\n" in msg:
-            msg = msg.replace("\n", "\n    ")
-        if len(msg) > 200:
-            msg = msg[:200] + "..."
-        self._check_is_another_day()
-        self._wrapper.write(
-            time.strftime(self.logging_fmt)
-            + f" [{level}] "
-            + (msg if msg.endswith("\n") else msg + "\n")
+        if self._thread is None:
+            self._start()
+        now = time.time()
+        monotonic = time.monotonic()
+        if created is None:
+            created = now
+        else:
+            # 由调用方给出时间时, 按相同的间隔推算单调时钟读数
+            monotonic -= now - created
+        self._queue.put(
+            LogRecord(
+                created,
+                monotonic,
+                level,
+                msg,
+                source or LOG_DEFAULT_SOURCE,
+                thread or threading.current_thread().name,
+            )
+        )
+
+    def _start(self) -> None:
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="ToolDelta: 日志记录", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        try:
+            self._compress_stale()
+        except OSError:
+            pass
+        while True:
+            record = self._queue.get()
+            batch = []
+            while record is not _STOP:
+                batch.append(record)
+                try:
+                    record = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            try:
+                for rec in batch:
+                    self._write(rec)
+                if self._wrapper is not None:
+                    self._wrapper.flush()
+                self._failing = False
+            except (OSError, ValueError) as err:
+                # 磁盘已满, 文件被占用等: 丢弃这批日志, 下次写入时重新打开文件
+                self._on_write_error(err, len(batch))
+            if record is _STOP:
+                return
+
+    def _on_write_error(self, err: Exception, dropped: int) -> None:
+        if self._wrapper is not None:
+            with contextlib.suppress(OSError, ValueError):
+                self._wrapper.close()
+            self._wrapper = None
+        self._day_end = 0.0
+        if self._failing:
+            return
+        # 同一次故障只提示一次, 恢复写入后再出错时重新提示
+        self._failing = True
+        from .color_print import Print
+
+        Print.print_err(
+            f"日志写入失败, 已丢弃 {dropped} 条日志: {err!r}", need_log=False
         )
-        if time.time() - self.lastLogTime > 15:
-            self._save_log()
-            self.lastLogTime = time.time()
+
+    def _write(self, record: LogRecord) -> None:
+        if record.created >= self._day_end:
+            self._open_wrapper_io(record.created)
+        msg = record.msg
+        if len(msg) > LOG_MAX_MESSAGE_LENGTH:
+            msg = msg[:LOG_MAX_MESSAGE_LENGTH] + "..."
+        if self.json_lines:
+            line = (
+                json.dumps(
+                    {
+                        "time": round(record.created, 3),
+                        "monotonic": round(record.monotonic, 6),
+                        "level": record.level,
+                        "source": record.source,
+                        "thread": record.thread,
+                        "msg": msg,
+                    },
+                    ensure_ascii=False,
+                )
+                + "\n"
+            )
+        else:
+            second = int(record.created)
+            if second != self._stamp_second:
+                self._stamp = time.strftime(self.logging_fmt, time.localtime(second))
+                self._stamp_second = second
+            if "\n" in msg:
+                msg = msg.replace("\n", "\n    ")
+            line = f"{self._stamp} [{record.level}] [{record.source}] " + (
+                msg if msg.endswith("\n") else msg + "\n"
+            )
+        data = line.encode("utf-8")
+        if self._size and self._size + len(data) > self.max_bytes:
+            self._rollover()
+        assert self._wrapper is not None
+        self._wrapper.write(data)
+        self._size += len(data)
+
+    def _file_name(self, created: float) -> str:
+        return os.path.join(
+            self.path,
+            time.strftime(self.name_fmt, time.localtime(created))
+            + (".jsonl" if self.json_lines else ".log"),
+        )
+
+    def _open_wrapper_io(self, created: float) -> None:
+        "打开当天的日志文件, 跨天时压缩前一天的日志"
+        name = self._file_name(created)
+        if self._wrapper is not None:
+            self._wrapper.close()
+            old = self._wrapper.name
+            # 仅切换格式时不压缩当天的文件
+            if self.compress and (
+                os.path.splitext(old)[0] != os.path.splitext(name)[0]
+            ):
+                self._gzip(old, old + ".gz")
+        lt = time.localtime(created)
+        self._day_end = time.mktime(
+            (lt.tm_year, lt.tm_mon, lt.tm_mday + 1, 0, 0, 0, 0, 0, -1)
+        )
+        os.makedirs(self.path, exist_ok=True)
+        self._reopen(name)
+        self._size = self._wrapper.tell()
+
+    def _reopen(self, name: str) -> None:
+        # 日志文件在写入线程中一直保持打开, 由跨天, 滚动或写入出错时关闭
+        self._wrapper = open(name, "ab", buffering=65536)  # noqa: SIM115
+
+    def open_wrapper_io(self, log_path: str) -> None:
+        "打开 IO 流"
+        self.path = log_path
+        self._day_end = 0.0
+
+    def _rollover(self) -> None:
+        "当前文件超出大小上限, 将其改名为下一个分卷并重新打开"
+        assert self._wrapper is not None
+        name = self._wrapper.name
+        self._wrapper.close()
+        base, ext = os.path.splitext(name)
+        rolled = self._rolled_files(base, ext)
+        index = rolled[-1][0] + 1 if rolled else 1
+        target = f"{base}.{index}{ext}"
+        try:
+            os.replace(name, target)
+        except OSError:
+            # 如 Windows 上文件被其他程序占用: 继续写入原文件, 写满下一个分卷大小后再试
+            self._reopen(name)
+            self._size = 0
+            return
+        if self.compress:
+            self._gzip(target, target + ".gz")
+        rolled = self._rolled_files(base, ext)
+        for _, path in rolled[: max(0, len(rolled) - self.backup_count)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._reopen(name)
+        self._size = 0
+
+    @staticmethod
+    def _rolled_files(base: str, ext: str) -> list[tuple[int, str]]:
+        "获取某个日志文件已滚动的分卷, 按序号排序"
+        rolled = []
+        for path in glob.glob(glob.escape(base) + ".*" + ext + "*"):
+            index = path[len(base) + 1 :].split(".", 1)[0]
+            if index.isdigit():
+                rolled.append((int(index), path))
+        rolled.sort()
+        return rolled
+
+    def _compress_stale(self) -> None:
+        "压缩以往未压缩的日志文件"
+        if not self.compress:
+            return
+        today = (
+            time.strftime(self.name_fmt) + ".log",
+            time.strftime(self.name_fmt) + ".jsonl",
+        )
+        for path in glob.glob(
+            os.path.join(glob.escape(self.path), "*.log")
+        ) + glob.glob(os.path.join(glob.escape(self.path), "*.jsonl")):
+            if os.path.basename(path) not in today:
+                self._gzip(path, path + ".gz")
+
+    @staticmethod
+    def _gzip(src: str, dst: str) -> None:
+        try:
+            with open(src, "rb") as fi, gzip.open(dst, "wb", compresslevel=6) as fo:
+                shutil.copyfileobj(fi, fo, 1024 * 1024)
+            os.remove(src)
+        except OSError:
+            pass
 
     def _save_log(self) -> None:
         "保存日志"
-        self._wrapper.flush()
-
-    def _check_is_another_day(self) -> None:
-        "判断记录日志的时候是否已经是第二天，是的话就变更文件名"
-        if time.strftime("%Y-%m-%d") != self.now_day:
-            self.exit()
-            self.open_wrapper_io(self.path)
+        if self._wrapper is not None:
+            self._wrapper.flush()
 
     def exit(self) -> None:
-        "退出时调用"
+        "退出时调用, 等待已记录的日志写入文件"
         if self.writable:
             self.writable = False
-            self._save_log()
-            self._wrapper.close()
+            if self._thread is not None:
+                self._queue.put(_STOP)
+                self._thread.join(5)
+                if self._thread.is_alive():
+                    # 写入线程仍在工作, 文件由它自行关闭前不能在此关闭
+                    return
+            if self._wrapper is not None:
+                self._wrapper.close()
 
 
 def new_logger(log_path: str) -> ToolDeltaLogger:
@@ -0,0 +1,207 @@
+"""
+指令返回回调登记表
+
+按 retriever ID 关联已发出的指令与其返回结果.
+每条指令可带截止时间, 由一个清扫线程按最小堆依次让过期指令超时;
+已完成的指令在堆中留下的条目超过一半时重建堆, 以免大量短时指令堆积到截止时间.
+超时后才到达的返回会被计数而不再刷屏, 同时统计指令往返延迟的分布.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, InvalidStateError
+from typing import Any
+
+from tooldelta.utils import Utils
+
+# 延迟分布的各区间上限 (毫秒), 最后一个区间为 "以上"
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+# 最多记住多少条已超时的 retriever ID, 用于区分迟到的返回与未知的返回
+EXPIRED_MEMORY = 4096
+# 堆中已完成的条目至少有这么多, 且超过一半时重建堆
+DEADLINE_COMPACT_MIN = 64
+
+
+class CommandCallbackRegistry:
+    """指令返回回调登记表"""
+
+    def __init__(self, prefix: str = "cmd_callback") -> None:
+        """创建登记表并启动超时清扫线程
+
+        Args:
+            prefix (str, optional): retriever ID 前缀
+        """
+        self.prefix = prefix
+        self._ids = itertools.count(1)
+        # retriever ID -> (结果, 发出时间, 是否有截止时间)
+        self._pending: dict[str, tuple[Future, float, bool]] = {}
+        # (截止时间, retriever ID)
+        self._deadlines: list[tuple[float, str]] = []
+        # 堆中仍在等待返回的条目数, 其余为已完成的过时条目
+        self._live_deadlines = 0
+        self._stopped = False
+        self._expired: OrderedDict[str, None] = OrderedDict()
+        self._cond = threading.Condition()
+        self.resolved = 0
+        self.timed_out = 0
+        self.late = 0
+        self.unknown = 0
+        self.latency_histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        Utils.createThread(self._sweep, usage="指令返回超时清扫")
+
+    def register(self, timeout: float = -1) -> tuple[str, Future]:
+        """登记一条即将发出的指令
+
+        Args:
+            timeout (float, optional): 超时时间 (秒), 小于 0 为不限时
+
+        Returns:
+            tuple[str, Future]: retriever ID 与指令结果; 超时后结果为 TimeoutError 异常
+        """
+        fut: Future = Future()
+        now = time.monotonic()
+        with self._cond:
+            retriever_id = f"{self.prefix}_{next(self._ids)}"
+            self._pending[retriever_id] = (fut, now, timeout >= 0)
+            if timeout >= 0:
+                heapq.heappush(self._deadlines, (now + timeout, retriever_id))
+                self._live_deadlines += 1
+                # 新的截止时间最早时才需要叫醒清扫线程
+                if self._deadlines[0][1] == retriever_id:
+                    self._cond.notify()
+        # 调用方取消结果时一并移除登记
+        fut.add_done_callback(lambda _: self._discard(retriever_id))
+        return retriever_id, fut
+
+    def resolve(self, retriever_id: str, result: Any) -> bool:
+        """交付指令的返回结果
+
+        Args:
+            retriever_id (str): retriever ID
+            result (Any): 返回结果
+
+        Returns:
+            bool: 是否有对应的等待方; 为 False 时返回已超时或 retriever ID 未知
+        """
+        with self._cond:
+            entry = self._pop_pending(retriever_id)
+            if entry is None:
+                if retriever_id in self._expired:
+                    del self._expired[retriever_id]
+                    self.late += 1
+                else:
+                    self.unknown += 1
+                return False
+            fut, sent_at, _ = entry
+            self.resolved += 1
+            latency_ms = (time.monotonic() - sent_at) * 1000
+            for i, bound in enumerate(LATENCY_BUCKETS_MS):
+                if latency_ms <= bound:
+                    self.latency_histogram[i] += 1
+                    break
+            else:
+                self.latency_histogram[-1] += 1
+        try:
+            fut.set_result(result)
+        except InvalidStateError:
+            # 等待方已取消
+            return False
+        return True
+
+    def cancel(self, retriever_id: str) -> None:
+        """取消一条已登记的指令 (如发送失败时)
+
+        Args:
+            retriever_id (str): retriever ID
+        """
+        with self._cond:
+            entry = self._pop_pending(retriever_id)
+        if entry is not None:
+            entry[0].cancel()
+
+    def _discard(self, retriever_id: str) -> None:
+        with self._cond:
+            self._pop_pending(retriever_id)
+
+    def _pop_pending(self, retriever_id: str) -> tuple[Future, float, bool] | None:
+        # 须持有 self._cond; 指令完成时移除其在堆中的条目 (过时条目较多时重建堆)
+        entry = self._pending.pop(retriever_id, None)
+        if entry is not None and entry[2]:
+            self._live_deadlines -= 1
+            stale = len(self._deadlines) - self._live_deadlines
+            if stale >= DEADLINE_COMPACT_MIN and stale * 2 > len(self._deadlines):
+                self._deadlines = [
+                    item for item in self._deadlines if item[1] in self._pending
+                ]
+                heapq.heapify(self._deadlines)
+        return entry
+
+    def stop(self) -> None:
+        """停止清扫线程, 仍在等待的指令以 TimeoutError 结束 (如重新连接时)"""
+        with self._cond:
+            self._stopped = True
+            pending = [entry[0] for entry in self._pending.values()]
+            self._pending.clear()
+            self._deadlines.clear()
+            self._live_deadlines = 0
+            self._cond.notify_all()
+        for fut in pending:
+            try:
+                fut.set_exception(TimeoutError("连接已断开, 指令没有返回"))
+            except InvalidStateError:
+                pass
+
+    def _sweep(self) -> None:
+        while True:
+            expired: list[Future] = []
+            with self._cond:
+                while not self._deadlines and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                deadline, retriever_id = self._deadlines[0]
+                now = time.monotonic()
+                if deadline > now:
+                    self._cond.wait(deadline - now)
+                    continue
+                while self._deadlines and self._deadlines[0][0] <= now:
+                    _, retriever_id = heapq.heappop(self._deadlines)
+                    # 尚未重建堆时, 已完成的指令仍留有过时条目, 直接跳过
+                    entry = self._pop_pending(retriever_id)
+                    if entry is None:
+                        continue
+                    expired.append(entry[0])
+                    self.timed_out += 1
+                    self._expired[retriever_id] = None
+                    if len(self._expired) > EXPIRED_MEMORY:
+                        self._expired.popitem(last=False)
+            for fut in expired:
+                try:
+                    fut.set_exception(TimeoutError("指令超时"))
+                except InvalidStateError:
+                    pass
+
+    def stats(self) -> dict[str, Any]:
+        """获取登记表的统计数据
+
+        Returns:
+            dict[str, Any]: 等待中, 已返回, 已超时, 迟到与未知返回的数量, 以及延迟分布
+        """
+        with self._cond:
+            return {
+                "pending": len(self._pending),
+                "resolved": self.resolved,
+                "timed_out": self.timed_out,
+                "late": self.late,
+                "unknown": self.unknown,
+                "latency_histogram": dict(
+                    zip(
+                        [f"<={i}ms" for i in LATENCY_BUCKETS_MS]
+                        + [f">{LATENCY_BUCKETS_MS[-1]}ms"],
+                        self.latency_histogram,
+                    )
+                ),
+            }
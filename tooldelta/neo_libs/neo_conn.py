@@ -3,6 +3,8 @@ import enum
 import os.path
 import platform
 import threading
+import time
+from concurrent.futures import Future
 from dataclasses import dataclass
 from threading import Thread
 from typing import Any, Callable, Dict, List, Optional, Union
@@ -10,7 +12,9 @@ from typing import Any, Callable, Dict, List, Optional, Union
 import ujson as json
 
 from tooldelta.color_print import Print
-from tooldelta.packets import Packet_CommandOutput
+from tooldelta.neo_libs.cmd_registry import CommandCallbackRegistry
+from tooldelta.packet_dispatcher import DispatcherOptions, PacketDispatcher
+from tooldelta.packets import LazyPacket, Packet_CommandOutput
 from tooldelta.utils import Utils
 
 CInt = ctypes.c_longlong
@@ -99,6 +103,31 @@ def OmitEvent():
     LIB.OmitEvent()
 
 
+# batch event draining (optional, only when the lib exports EventPollBatch)
+# EventPollBatch(maxN) blocks until at least one event is ready, then returns up to
+# maxN events as newline-delimited JSON records, each record already consumed:
+#   {"Type": str, "Retriever": str, "Data": payload, "ConvertError": str}
+# payload: MCPacket -> packet json str, CommandResponseCB -> command output object,
+#          PlayerChange -> action str, OmegaConnErr -> reason str, others -> null
+# ConvertError is only set (non-empty) for MCPacket records that failed to convert
+class EventBatch(ctypes.Structure):
+    _fields_ = [("data", CBytes), ("l", CInt)]
+
+
+def BatchDrainAvailable() -> bool:
+    return hasattr(LIB, "EventPollBatch")
+
+
+def EventPollBatch(max_events: int) -> list[dict]:
+    r = LIB.EventPollBatch(to_GoInt(max_events))
+    if r.l == 0:
+        return []
+    blob = r.data[: r.l]
+    LIB.FreeMem(r.data)
+    # json records never contain raw newlines, so the whole batch decodes in one pass
+    return json.loads(b"[" + blob.strip(b"\n").replace(b"\n", b",") + b"]")
+
+
 # end lib core: event
 
 # event retrievers
@@ -269,11 +298,112 @@ class QueriedPlayerPos:
     yRot: float = 0.0
 
 
+# player attributes that never change while the player stays online
+PLAYER_FIXED_FIELDS = (
+    "name",
+    "entity_unique_id",
+    "device_id",
+    "login_time",
+    "build_platform",
+    "platform_chat_id",
+)
+# packets after which cached mutable player attributes (permissions, op...) are stale
+PLAYER_STATE_PACKETS = frozenset(
+    (
+        "AddPlayer",
+        "AdventureSettings",
+        "UpdateAbilities",
+        "UpdatePlayerGameType",
+        "SetPlayerGameType",
+    )
+)
+# fields of those packets naming the player they are about, see _invalidate_players
+PLAYER_STATE_UNIQUE_ID_FIELDS = ("PlayerUniqueID", "EntityUniqueID")
+# safety net for mutable attributes changed without any packet we can see
+PLAYER_MUTABLE_TTL = 5.0
+
+_PLAYER_FIELD_GETTERS: dict[str, Callable[[bytes], Any]] = {
+    "name": lambda c_uuid: toPyString(LIB.PlayerName(c_uuid)),
+    "entity_unique_id": lambda c_uuid: int(LIB.PlayerEntityUniqueID(c_uuid)),
+    "op": lambda c_uuid: LIB.PlayerIsOP(c_uuid) == 1,
+    "online": lambda c_uuid: LIB.PlayerOnline(c_uuid) == 1,
+    "login_time": lambda c_uuid: int(LIB.PlayerLoginTime(c_uuid)),
+    "platform_chat_id": lambda c_uuid: toPyString(LIB.PlayerPlatformChatID(c_uuid)),
+    "build_platform": lambda c_uuid: int(LIB.PlayerBuildPlatform(c_uuid)),
+    "skin_id": lambda c_uuid: toPyString(LIB.PlayerSkinID(c_uuid)),
+    "device_id": lambda c_uuid: toPyString(LIB.PlayerDeviceID(c_uuid)),
+    "can_build": lambda c_uuid: toPyString(LIB.PlayerCanBuild(c_uuid)),
+    "can_mine": lambda c_uuid: toPyString(LIB.PlayerCanMine(c_uuid)),
+    "can_doors_and_switches": lambda c_uuid: toPyString(
+        LIB.PlayerCanDoorsAndSwitches(c_uuid)
+    ),
+    "can_open_containers": lambda c_uuid: toPyString(
+        LIB.PlayerCanOpenContainers(c_uuid)
+    ),
+    "can_attack_players": lambda c_uuid: toPyString(LIB.PlayerCanAttackPlayers(c_uuid)),
+    "can_attack_mobs": lambda c_uuid: toPyString(LIB.PlayerCanAttackMobs(c_uuid)),
+    "can_operator_commands": lambda c_uuid: int(LIB.PlayerCanOperatorCommands(c_uuid)),
+    "can_teleport": lambda c_uuid: toPyString(LIB.PlayerCanTeleport(c_uuid)),
+    "is_invulnerable": lambda c_uuid: toPyString(LIB.PlayerStatusInvulnerable(c_uuid)),
+    "is_flying": lambda c_uuid: toPyString(LIB.PlayerStatusFlying(c_uuid)),
+    "can_fly": lambda c_uuid: toPyString(LIB.PlayerStatusMayFly(c_uuid)),
+    "entity_runtime_id": lambda c_uuid: int(LIB.PlayerEntityRuntimeID(c_uuid)),
+}
+
+# bulk player info (optional, only when the lib exports GetAllOnlinePlayersInfo)
+# GetAllOnlinePlayersInfo() returns a json list, one object per online player:
+#   {"uuid": str, <any of the keys in _PLAYER_FIELD_GETTERS>: value, ...}
+# so the cache of every online player is filled in one call
+
+
 class PlayerKit:
+    """one instance per online player, pooled by ThreadOmega (see _get_bind_player)"""
+
     def __init__(self, uuid: str, parent: "ThreadOmega") -> None:
         self.parent = parent
         self._uuid = uuid
         self._c_uuid = toCString(self._uuid)
+        # snapshot of attributes, see PLAYER_FIXED_FIELDS
+        self._fixed: dict[str, Any] = {}
+        # field -> (value, fetched at)
+        self._mutable: dict[str, tuple[Any, float]] = {}
+
+    def _get(self, field: str) -> Any:
+        if field in PLAYER_FIXED_FIELDS:
+            if field in self._fixed:
+                return self._fixed[field]
+            OmegaAvailable()
+            value = _PLAYER_FIELD_GETTERS[field](self._c_uuid)
+            # empty values mean the lib does not know the player (yet), don't keep them
+            if value:
+                self._fixed[field] = value
+            return value
+        now = time.monotonic()
+        entry = self._mutable.get(field)
+        if entry is not None and now - entry[1] < PLAYER_MUTABLE_TTL:
+            return entry[0]
+        OmegaAvailable()
+        value = _PLAYER_FIELD_GETTERS[field](self._c_uuid)
+        self._mutable[field] = (value, now)
+        return value
+
+    def _fill(self, info: dict[str, Any]) -> None:
+        now = time.monotonic()
+        for field, value in info.items():
+            if field in PLAYER_FIXED_FIELDS:
+                if value:
+                    self._fixed[field] = value
+            elif field in _PLAYER_FIELD_GETTERS:
+                self._mutable[field] = (value, now)
+
+    def invalidate(self) -> None:
+        """drop cached mutable attributes (op, permissions, ...)"""
+        self._mutable = {}
+
+    def _set_permission(self, setter: Callable[[bytes, int], None], allow: bool):
+        OmegaAvailable()
+        setter(self._c_uuid, toGoUint8(allow))
+        self.invalidate()
 
     @property
     def uuid(self) -> str:
@@ -281,140 +411,111 @@ class PlayerKit:
 
     @property
     def name(self) -> str:
-        OmegaAvailable()
-        return toPyString(LIB.PlayerName(self._c_uuid))
+        return self._get("name")
 
     @property
     def entity_unique_id(self) -> int:
-        OmegaAvailable()
-        return int(LIB.PlayerEntityUniqueID(self._c_uuid))
+        return self._get("entity_unique_id")
 
     @property
     def op(self) -> bool:
-        OmegaAvailable()
-        return LIB.PlayerIsOP(self._c_uuid) == 1
+        return self._get("op")
 
     @property
     def online(self) -> bool:
-        OmegaAvailable()
-        return LIB.PlayerOnline(self._c_uuid) == 1
+        return self._get("online")
 
     @property
     def login_time(self) -> int:
-        OmegaAvailable()
-        return int(LIB.PlayerLoginTime(self._c_uuid))
+        return self._get("login_time")
 
     @property
     def platform_chat_id(self) -> str:
-        OmegaAvailable()
-        return toPyString(LIB.PlayerPlatformChatID(self._c_uuid))
+        return self._get("platform_chat_id")
 
     @property
     def build_platform(self) -> int:
-        OmegaAvailable()
-        return int(LIB.PlayerBuildPlatform(self._c_uuid))
+        return self._get("build_platform")
 
     @property
     def skin_id(self) -> str:
-        OmegaAvailable()
-        return toPyString(LIB.PlayerSkinID(self._c_uuid))
+        return self._get("skin_id")
 
     @property
     def device_id(self) -> str:
-        OmegaAvailable()
-        return toPyString(LIB.PlayerDeviceID(self._c_uuid))
+        return self._get("device_id")
 
     @property
     def can_build(self) -> str:
-        OmegaAvailable()
-        return toPyString(LIB.PlayerCanBuild(self._c_uuid))
+        return self._get("can_build")
 
     def set_build_permission(self, allow: bool):
-        OmegaAvailable()
-        LIB.PlayerSetBuild(self._c_uuid, toGoUint8(allow))
+        self._set_permission(LIB.PlayerSetBuild, allow)
 
     @property
     def can_mine(self) -> str:
-        OmegaAvailable()
-        return toPyString(LIB.PlayerCanMine(self._c_uuid))
+        return self._get("can_mine")
 
     def set_mine_permission(self, allow: bool):
-        OmegaAvailable()
-        LIB.PlayerSetMine(self._c_uuid, toGoUint8(allow))
+        self._set_permission(LIB.PlayerSetMine, allow)
 
     @property
     def can_doors_and_switches(self) -> str:
-        OmegaAvailable()
-        return toPyString(LIB.PlayerCanDoorsAndSwitches(self._c_uuid))
+        return self._get("can_doors_and_switches")
 
     def set_doors_and_switches_permission(self, allow: bool):
-        OmegaAvailable()
-        LIB.PlayerSetDoorsAndSwitches(self._c_uuid, toGoUint8(allow))
+        self._set_permission(LIB.PlayerSetDoorsAndSwitches, allow)
 
     @property
     def can_open_containers(self) -> str:
-        OmegaAvailable()
-        return toPyString(LIB.PlayerCanOpenContainers(self._c_uuid))
+        return self._get("can_open_containers")
 
     def set_containers_permission(self, allow: bool):
-        OmegaAvailable()
-        LIB.PlayerSetOpenContainers(self._c_uuid, toGoUint8(allow))
+        self._set_permission(LIB.PlayerSetOpenContainers, allow)
 
     @property
     def can_attack_players(self) -> str:
-        OmegaAvailable()
-        return toPyString(LIB.PlayerCanAttackPlayers(self._c_uuid))
+        return self._get("can_attack_players")
 
     def set_attack_players_permission(self, allow: bool):
-        OmegaAvailable()
-        LIB.PlayerSetAttackPlayers(self._c_uuid, toGoUint8(allow))
+        self._set_permission(LIB.PlayerSetAttackPlayers, allow)
 
     @property
     def can_attack_mobs(self) -> str:
-        OmegaAvailable()
-        return toPyString(LIB.PlayerCanAttackMobs(self._c_uuid))
+        return self._get("can_attack_mobs")
 
     def set_attack_mobs_permission(self, allow: bool):
-        OmegaAvailable()
-        LIB.PlayerSetAttackMobs(self._c_uuid, toGoUint8(allow))
+        self._set_permission(LIB.PlayerSetAttackMobs, allow)
 
     @property
     def can_operator_commands(self) -> int:
-        OmegaAvailable()
-        return int(LIB.PlayerCanOperatorCommands(self._c_uuid))
+        return self._get("can_operator_commands")
 
     def set_operator_commands_permission(self, allow: bool):
-        OmegaAvailable()
-        LIB.PlayerSetOperatorCommands(self._c_uuid, toGoUint8(allow))
+        self._set_permission(LIB.PlayerSetOperatorCommands, allow)
 
     @property
     def can_teleport(self) -> str:
-        OmegaAvailable()
-        return toPyString(LIB.PlayerCanTeleport(self._c_uuid))
+        return self._get("can_teleport")
 
     def set_teleports_permission(self, allow: bool):
-        OmegaAvailable()
-        LIB.PlayerSetTeleport(self._c_uuid, toGoUint8(allow))
+        self._set_permission(LIB.PlayerSetTeleport, allow)
 
     @property
     def is_invulnerable(self) -> str:
-        OmegaAvailable()
-        return toPyString(LIB.PlayerStatusInvulnerable(self._c_uuid))
+        return self._get("is_invulnerable")
 
     @property
     def is_flying(self) -> str:
-        OmegaAvailable()
-        return toPyString(LIB.PlayerStatusFlying(self._c_uuid))
+        return self._get("is_flying")
 
     @property
     def can_fly(self) -> str:
-        OmegaAvailable()
-        return toPyString(LIB.PlayerStatusMayFly(self._c_uuid))
+        return self._get("can_fly")
 
     @property
     def entity_runtime_id(self) -> int:
-        OmegaAvailable()
-        return int(LIB.PlayerEntityRuntimeID(self._c_uuid))
+        return self._get("entity_runtime_id")
 
     @property
     def entity_metadata(self) -> bool:
@@ -466,13 +567,20 @@ class ThreadOmega:
         self.accountOption = accountOption
         self._omega_disconnected_lock: threading.Event
         self._omega_disconnected_reason: str
-        self._cmd_callback_retriever_counter: Counter
-        self._omega_cmd_callback_events: Dict[str, Callable]
-        self._packet_listeners: Dict[str, List[Callable[[str, Any], None]]]
+        self._cmd_callbacks: CommandCallbackRegistry
+        # packet name -> [(callback, first arg: packet name or packet id)]
+        self._packet_listeners: dict[str, list[tuple[Callable[[Any, Any], None], Any]]]
         self._player_change_listeners: List[Callable[[PlayerKit, str], None]]
         self._bot_basic_info: ClientMaintainedBotBasicInfo
         self._packet_name_to_id_mapping: dict[str, int]
         self._packet_id_to_name_mapping: dict[int, str]
+        self.dispatcher_options = DispatcherOptions()
+        self._packet_dispatcher: PacketDispatcher
+        # max events pulled per EventPollBatch call, 0 disables batch draining
+        self.event_batch_size = 64
+        # identity map of live PlayerKit, a binding is released only once evicted
+        self._players: dict[str, PlayerKit] = {}
+        self._players_lock = threading.Lock()
 
     def connect(self):
         if self.connect_type == ConnectType.Local:
@@ -481,17 +589,26 @@ class ThreadOmega:
         elif self.connect_type == ConnectType.Remote:
             ConnectOmega(self.address)
 
+        # packet and player change callbacks run on a bounded worker pool,
+        # the workers of the previous connection are stopped on reconnect
+        if (old_dispatcher := getattr(self, "_packet_dispatcher", None)) is not None:
+            old_dispatcher.stop()
+        self._packet_dispatcher = PacketDispatcher(self.dispatcher_options)
+
         # disconnect event
         self._omega_disconnected_lock = threading.Event()
         self._omega_disconnected_lock.clear()  # lock
         self._omega_disconnected_reason = ""
 
-        # cmd events
-        self._cmd_callback_retriever_counter = Counter("cmd_callback")
-        self._omega_cmd_callback_events: Dict[str, Callable] = {}
+        # cmd events, the sweeper of the previous connection is stopped on reconnect
+        if (old_callbacks := getattr(self, "_cmd_callbacks", None)) is not None:
+            old_callbacks.stop()
+        self._cmd_callbacks = CommandCallbackRegistry("cmd_callback")
 
         # packet listeners
-        self._packet_listeners: Dict[str, List[Callable[[str, Any], None]]] = {}
+        self._packet_listeners: dict[
+            str, list[tuple[Callable[[Any, Any], None], Any]]
+        ] = {}
 
         # setup actions
         # make LIB listen to all packets and new packets will have eventType="MCPacket"
@@ -515,6 +632,9 @@ class ThreadOmega:
         Utils.createThread(self._react, usage="Omega React Thread")
 
     def _react(self):
+        if self.event_batch_size > 0 and BatchDrainAvailable():
+            self._react_batched()
+            return
         while True:
             eventType, retriever = EventPoll()
 
@@ -534,100 +654,171 @@ class ThreadOmega:
             elif eventType in ["PlayerInterceptInput", "Chat"]:
                 self._handle_player_intercept_or_chat()
 
+    def _react_batched(self):
+        while True:
+            for event in EventPollBatch(self.event_batch_size):
+                eventType = event["Type"]
+                retriever = event["Retriever"]
+                data = event.get("Data")
+
+                if eventType == "OmegaConnErr":
+                    self._omega_disconnected_reason = data or ""
+                    self._omega_disconnected_lock.set()
+                    return
+
+                if eventType == "CommandResponseCB":
+                    self._on_command_response(
+                        retriever, None if data is None else Packet_CommandOutput(data)
+                    )
+
+                elif eventType == "MCPacket":
+                    listeners = self._packet_listeners.get(retriever)
+                    if retriever == "":
+                        print("'', ignored")
+                    elif retriever in PLAYER_STATE_PACKETS or listeners:
+                        # same as _handle_mc_packet
+                        if convertError := event.get("ConvertError"):
+                            raise ValueError(convertError)
+                        jsonPkt = LazyPacket(data)
+                        if retriever in PLAYER_STATE_PACKETS:
+                            self._invalidate_players(jsonPkt)
+                        if listeners:
+                            self._on_mc_packet(retriever, jsonPkt, listeners)
+
+                elif eventType == "PlayerChange":
+                    self._on_player_state_change(retriever, data)
+                    if self._player_change_listeners:
+                        self._on_player_change(retriever, data)
+
     def _handle_omega_conn_err(self):
         self._omega_disconnected_reason = toPyString(LIB.ConsumeOmegaConnError())
         self._omega_disconnected_lock.set()
 
     def _handle_command_response_cb(self, retriever):
         cmdResp = unpackCommandOutput(toPyString(LIB.ConsumeCommandResponseCB()))
-        if callback_event := self._omega_cmd_callback_events.get(retriever):
-            callback_event(cmdResp)
-        else:
-            Print.print_war(
-                f"接入点核心进程：指令返回 {retriever} 没有对应的回调，已忽略"
-            )
+        self._on_command_response(retriever, cmdResp)
+
+    def _on_command_response(self, retriever, cmdResp):
+        # late (already timed out) or unknown responses are only counted by the registry
+        self._cmd_callbacks.resolve(retriever, cmdResp)
 
     def _handle_mc_packet(self, packetTypeName):
+        listeners = self._packet_listeners.get(packetTypeName)
         if packetTypeName == "":
             print("'', ignored")
-        elif listeners := self._packet_listeners.get(packetTypeName, []):
+        elif packetTypeName in PLAYER_STATE_PACKETS or listeners:
             ret = LIB.ConsumeMCPacket()
             if convertError := toPyString(ret.convertError):
                 raise ValueError(convertError)
-            jsonPkt = json.loads(toPyString(ret.packetDataAsJsonStr))
-            for listener in listeners:
-                Utils.createThread(
-                    listener, (packetTypeName, jsonPkt), usage="Packet Callback Thread"
-                )
+            # 延迟解码, 没有监听者读取的字段不会被解析
+            jsonPkt = LazyPacket(toPyString(ret.packetDataAsJsonStr))
+            if packetTypeName in PLAYER_STATE_PACKETS:
+                self._invalidate_players(jsonPkt)
+            if listeners:
+                self._on_mc_packet(packetTypeName, jsonPkt, listeners)
 
         else:
             LIB.OmitEvent()
 
+    def _on_mc_packet(self, packetTypeName, jsonPkt, listeners):
+        key = self._packet_dispatcher.key_of(packetTypeName, jsonPkt)
+        for listener, packetType in listeners:
+            self._packet_dispatcher.submit(key, listener, (packetType, jsonPkt))
+
     def _handle_player_change(self, playerUUID):
-        if not self._player_change_listeners:
-            LIB.OmitEvent()
-        else:
-            action = toPyString(LIB.ConsumePlayerChange())
-            for callback in self._player_change_listeners:
-                Utils.createThread(
-                    callback,
-                    (self._get_bind_player(playerUUID), action),
-                    usage="Player Change Callback Thread",
-                )
+        # always consumed (player changes are rare) to keep the player info cache right
+        action = toPyString(LIB.ConsumePlayerChange())
+        self._on_player_state_change(playerUUID, action)
+        if self._player_change_listeners:
+            self._on_player_change(playerUUID, action)
+
+    def _on_player_state_change(self, playerUUID, action):
+        if player := self._players.get(playerUUID):
+            # invalidate before evicting, plugins may still hold the kit (online etc.)
+            player.invalidate()
+        if action == "offline":
+            self._evict_player(playerUUID)
+
+    def _invalidate_players(self, pkt: LazyPacket | None = None):
+        # only the player the packet names, so a join wave keeps the others' cache
+        uniqueID = None
+        if pkt is not None:
+            if (player := self._players.get(pkt.get("UUID") or "")) is not None:
+                player.invalidate()
+                return
+            for field in PLAYER_STATE_UNIQUE_ID_FIELDS:
+                if (uniqueID := pkt.get(field)) is not None:
+                    break
+            else:
+                abilities = pkt.get("AbilityData")
+                if isinstance(abilities, dict):
+                    uniqueID = abilities.get("EntityUniqueID")
+        for player in list(self._players.values()):
+            # players whose unique id is not cached yet might be the one named
+            known = player._fixed.get("entity_unique_id")
+            if uniqueID is None or known is None or known == uniqueID:
+                player.invalidate()
+
+    def _evict_player(self, uuidStr: str):
+        # the binding is released by PlayerKit.__del__ once nobody else holds it
+        with self._players_lock:
+            self._players.pop(uuidStr, None)
+
+    def _on_player_change(self, playerUUID, action):
+        for callback in self._player_change_listeners:
+            self._packet_dispatcher.submit(
+                playerUUID, callback, (self._get_bind_player(playerUUID), action)
+            )
 
     @staticmethod
     def _handle_player_intercept_or_chat():
         LIB.OmitEvent()
 
+    def get_packet_dispatcher(self) -> PacketDispatcher:
+        return self._packet_dispatcher
+
     def wait_disconnect(self) -> str:
         """return: disconnect reason"""
         self._omega_disconnected_lock.wait()
         return self._omega_disconnected_reason
 
-    @staticmethod
-    def _create_lock_and_result_setter():
-        lock = threading.Lock()
-        lock.acquire()
-        ret = [None]
-
-        def result_setter(result):
-            ret[0] = result
-            lock.release()
+    def _send_command_future(
+        self, cmd: str, sender: Callable[[str, str], None], timeout: float = -1
+    ) -> "Future[Packet_CommandOutput]":
+        retriever_id, fut = self._cmd_callbacks.register(timeout)
+        try:
+            sender(cmd, retriever_id)
+        except BaseException:
+            self._cmd_callbacks.cancel(retriever_id)
+            raise
+        return fut
 
-        def result_getter(timeout: float = -1) -> Any:
-            lock.acquire(timeout=timeout)
-            return ret[0]
+    def send_websocket_command_future(
+        self, cmd: str, timeout: float = -1
+    ) -> "Future[Packet_CommandOutput]":
+        """the future fails with TimeoutError once timeout (if >= 0) has passed"""
+        return self._send_command_future(cmd, SendWebSocketCommandNeedResponse, timeout)
 
-        return result_setter, result_getter
+    def send_player_command_future(
+        self, cmd: str, timeout: float = -1
+    ) -> "Future[Packet_CommandOutput]":
+        """the future fails with TimeoutError once timeout (if >= 0) has passed"""
+        return self._send_command_future(cmd, SendPlayerCommandNeedResponse, timeout)
 
     def send_websocket_command_need_response(
         self, cmd: str, timeout: float = -1
     ) -> Packet_CommandOutput:
-        setter, getter = self._create_lock_and_result_setter()
-        try:
-            retriever_id = next(self._cmd_callback_retriever_counter)
-        except StopIteration as err:
-            raise ValueError("retriever counter overflow") from err
-        self._omega_cmd_callback_events[retriever_id] = setter
-        SendWebSocketCommandNeedResponse(cmd, retriever_id)
-        return self.send_cmd_resp(getter, timeout, retriever_id)
+        """raises TimeoutError once timeout (if >= 0) has passed"""
+        return self.send_websocket_command_future(cmd, timeout).result()
 
     def send_player_command_need_response(
         self, cmd: str, timeout: float = -1
-    ) -> Optional[Packet_CommandOutput]:
-        setter, getter = self._create_lock_and_result_setter()
-        try:
-            retriever_id = next(self._cmd_callback_retriever_counter)
-        except StopIteration as e:
-            raise ValueError("retriever counter overflow") from e
-        self._omega_cmd_callback_events[retriever_id] = setter
-        SendPlayerCommandNeedResponse(cmd, retriever_id)
-        return self.send_cmd_resp(getter, timeout, retriever_id)
-
-    def send_cmd_resp(self, getter, timeout, retriever_id):
-        res = getter(timeout=timeout)
-        del self._omega_cmd_callback_events[retriever_id]
-        return res
+    ) -> Packet_CommandOutput:
+        """raises TimeoutError once timeout (if >= 0) has passed"""
+        return self.send_player_command_future(cmd, timeout).result()
+
+    def get_command_callback_stats(self) -> dict[str, Any]:
+        return self._cmd_callbacks.stats()
 
     @staticmethod
     def send_settings_command(cmd: str):
@@ -664,19 +855,33 @@ class ThreadOmega:
         targets: Union[str | int, list[Dict[int, str] | str]],
         callback: Callable[[str, Any], None],
     ):
+        self._set_packet_listeners(targets, callback, by_id=False)
+
+    def listen_packets_by_id(
+        self,
+        targets: int | list[int],
+        callback: Callable[[int, Any], None],
+    ):
+        """same as listen_packets, but the callback receives the packet id instead of
+        the packet name, resolved once here rather than on every packet"""
+        self._set_packet_listeners(targets, callback, by_id=True)
+
+    def _set_packet_listeners(self, targets, callback, by_id: bool):
         for k in self._packet_listeners.copy():
             self._packet_listeners[k].clear()
         if isinstance(targets, str):
             targets = [targets]
         if isinstance(targets, int):
-            targets = [f"{targets}"]
+            targets = [targets] if by_id else [f"{targets}"]
         res = []
         for t in targets:
             if isinstance(t, int):
                 t = self.get_packet_id_to_name_mapping(t)
             res.append(t)
         for t in res:
-            self._packet_listeners[t].append(callback)
+            self._packet_listeners[t].append(
+                (callback, self._packet_name_to_id_mapping[t] if by_id else t)
+            )
 
     def construct_game_packet_bytes_in_json_as_is(
         self, packet_type: Union[int, str], content: Any
@@ -719,15 +924,35 @@ class ThreadOmega:
         )
 
     def _get_bind_player(self, uuidStr: str) -> Optional[PlayerKit]:
-        return None if uuidStr is None or not uuidStr else PlayerKit(uuidStr, self)
+        if uuidStr is None or not uuidStr:
+            return None
+        if player := self._players.get(uuidStr):
+            return player
+        with self._players_lock:
+            if (player := self._players.get(uuidStr)) is None:
+                player = self._players[uuidStr] = PlayerKit(uuidStr, self)
+            return player
 
     def get_all_online_players(self):
         OmegaAvailable()
-        playerUUIDS = json.loads(toPyString(LIB.GetAllOnlinePlayers()))
+        infos: dict[str, dict[str, Any]] = {}
+        if hasattr(LIB, "GetAllOnlinePlayersInfo"):
+            for info in json.loads(toPyString(LIB.GetAllOnlinePlayersInfo())):
+                infos[info.pop("uuid")] = info
+            playerUUIDS = list(infos)
+        else:
+            playerUUIDS = json.loads(toPyString(LIB.GetAllOnlinePlayers()))
         ret: List[PlayerKit] = []
         for uuidStr in playerUUIDS:
             if r := self._get_bind_player(uuidStr):
+                if uuidStr in infos:
+                    r._fill(infos[uuidStr])
                 ret.append(r)
+        # evict players that left without us seeing a PlayerChange
+        if len(self._players) > len(ret):
+            online = set(playerUUIDS)
+            for uuidStr in [u for u in list(self._players) if u not in online]:
+                self._evict_player(uuidStr)
         return ret
 
     def get_player_by_name(self, name: str) -> Optional[PlayerKit]:
@@ -808,6 +1033,8 @@ def load_lib():
     LIB.GetClientMaintainedBotBasicInfo.restype = CString
     LIB.GetClientMaintainedExtendInfo.restype = CString
     LIB.GetAllOnlinePlayers.restype = CString
+    if hasattr(LIB, "GetAllOnlinePlayersInfo"):
+        LIB.GetAllOnlinePlayersInfo.restype = CString
     LIB.ReleaseBindPlayer.argtypes = [CString]
     LIB.PlayerName.argtypes = [CString]
     LIB.PlayerName.restype = CString
@@ -867,3 +1094,6 @@ def load_lib():
     LIB.GetPlayerByName.restype = CString
     LIB.ConsumePlayerChange.restype = CString
     LIB.PlaceCommandBlock.argtypes = [CString]
+    if BatchDrainAvailable():
+        LIB.EventPollBatch.argtypes = [CInt]
+        LIB.EventPollBatch.restype = EventBatch
@@ -0,0 +1,215 @@
+"""
+数据包分发器
+
+使用固定数量的工作线程处理数据包回调, 而不是每个数据包都新建线程.
+同一个分发键 (数据包类型或玩家) 的任务总是交给同一个工作线程, 以保证处理顺序.
+
+回调在工作线程内同步执行, 因此只应做解码, 路由与名单更新等不会阻塞的工作;
+GameCtrl 在此之后将插件的数据包监听与事件方法交给线程池 (Utils.createThread) 执行.
+聊天等带发送者的数据包 (见 SENDER_KEY_FIELDS) 按发送者分发, 以分散到多个工作线程.
+"""
+
+import queue
+import threading
+import traceback
+from collections.abc import Callable, Hashable, Mapping
+from dataclasses import dataclass
+from typing import Any
+
+from .color_print import Print
+from .utils import Utils
+
+
+class DropPolicy:
+    """工作队列已满时的处理方式
+
+    BLOCK: 阻塞投递方 (背压), 直到队列有空位
+    DROP_NEWEST: 丢弃新投递的任务
+    DROP_OLDEST: 丢弃队列中最旧的任务
+    """
+
+    BLOCK = "阻塞"
+    DROP_NEWEST = "丢弃最新"
+    DROP_OLDEST = "丢弃最旧"
+
+
+class OrderBy:
+    """数据包保序方式
+
+    PACKET_TYPE: 同一类型的数据包按到达顺序处理
+    PLAYER: 同一玩家相关的数据包按到达顺序处理, 无法识别玩家时退化为按数据包类型
+    """
+
+    PACKET_TYPE = "数据包类型"
+    PLAYER = "玩家"
+
+
+# 按玩家保序时, 用于识别数据包所属玩家的字段
+PLAYER_KEY_FIELDS = ("EntityRuntimeID", "SourceName", "UUID")
+# 无论保序方式如何, 都按发送者分发的数据包类型, 及其表示发送者的字段
+SENDER_KEY_FIELDS = {"Text": "SourceName"}
+
+
+@dataclass
+class DispatcherOptions:
+    """数据包分发器配置"""
+
+    workers: int = 8
+    queue_size: int = 2048
+    drop_policy: str = DropPolicy.DROP_OLDEST
+    order_by: str = OrderBy.PACKET_TYPE
+
+    @classmethod
+    def from_cfg(cls, cfg: dict) -> "DispatcherOptions":
+        """从 ToolDelta 基本配置的 数据包分发配置 项读取
+
+        Args:
+            cfg (dict): 配置项
+
+        Raises:
+            ValueError: 配置值不合法
+
+        Returns:
+            DispatcherOptions: 分发器配置
+        """
+        opts = cls(
+            workers=cfg["工作线程数"],
+            queue_size=cfg["单个队列最大长度"],
+            drop_policy=cfg["队列已满时的处理方式(阻塞/丢弃最新/丢弃最旧)"],
+            order_by=cfg["数据包保序方式(数据包类型/玩家)"],
+        )
+        if opts.workers < 1:
+            raise ValueError("工作线程数至少为 1")
+        if opts.queue_size < 1:
+            raise ValueError("单个队列最大长度至少为 1")
+        if opts.drop_policy not in (
+            DropPolicy.BLOCK,
+            DropPolicy.DROP_NEWEST,
+            DropPolicy.DROP_OLDEST,
+        ):
+            raise ValueError(f"未知的队列已满处理方式：{opts.drop_policy}")
+        if opts.order_by not in (OrderBy.PACKET_TYPE, OrderBy.PLAYER):
+            raise ValueError(f"未知的数据包保序方式：{opts.order_by}")
+        return opts
+
+
+class PacketDispatcher:
+    """有界工作线程池的数据包分发器"""
+
+    def __init__(self, options: DispatcherOptions | None = None) -> None:
+        """创建分发器并启动工作线程
+
+        Args:
+            options (DispatcherOptions | None, optional): 分发器配置
+        """
+        self.options = options or DispatcherOptions()
+        self._queues: list[queue.Queue] = [
+            queue.Queue(self.options.queue_size) for _ in range(self.options.workers)
+        ]
+        self._counter_lock = threading.Lock()
+        self.submitted = 0
+        self.dropped = 0
+        self._processed = [0] * self.options.workers
+        for i, q in enumerate(self._queues):
+            Utils.createThread(self._work, (i, q), usage=f"数据包分发工作线程 #{i + 1}")
+
+    def key_of(self, packet_type: Hashable, packet: Mapping | None = None) -> Hashable:
+        """根据保序方式获取数据包的分发键
+
+        Args:
+            packet_type (Hashable): 数据包类型
+            packet (Mapping | None, optional): 数据包内容
+
+        Returns:
+            Hashable: 分发键
+        """
+        if packet is None:
+            return packet_type
+        if self.options.order_by == OrderBy.PLAYER:
+            for field in PLAYER_KEY_FIELDS:
+                if (key := packet.get(field)) is not None:
+                    return key
+        elif (field := SENDER_KEY_FIELDS.get(packet_type)) is not None and (
+            sender := packet.get(field)
+        ):
+            # 同一发送者的消息仍按顺序处理; 系统消息没有发送者, 按数据包类型分发
+            return (packet_type, sender)
+        return packet_type
+
+    def submit(self, key: Hashable, func: Callable, args: tuple = ()) -> bool:
+        """投递一个回调任务
+
+        Args:
+            key (Hashable): 分发键, 分发键相同的任务按投递顺序执行
+            func (Callable): 回调方法
+            args (tuple, optional): 回调参数
+
+        Returns:
+            bool: 是否成功投递 (为 False 时任务被丢弃)
+        """
+        q = self._queues[hash(key) % len(self._queues)]
+        task = (func, args)
+        policy = self.options.drop_policy
+        dropped = 0
+        if policy == DropPolicy.BLOCK:
+            q.put(task)
+        else:
+            while True:
+                try:
+                    q.put_nowait(task)
+                    break
+                except queue.Full:
+                    if policy == DropPolicy.DROP_NEWEST:
+                        with self._counter_lock:
+                            self.dropped += 1
+                        return False
+                    try:
+                        q.get_nowait()
+                        dropped += 1
+                    except queue.Empty:
+                        pass
+        with self._counter_lock:
+            self.submitted += 1
+            self.dropped += dropped
+        return True
+
+    def _work(self, index: int, q: queue.Queue) -> None:
+        while True:
+            task = q.get()
+            if task is None:
+                return
+            func, args = task
+            try:
+                func(*args)
+            except SystemExit:
+                pass
+            except Exception:  # noqa: BLE001 回调出错不能让工作线程退出
+                Print.print_err(
+                    f"数据包回调 {getattr(func, '__name__', func)} 出错:\n"
+                    + traceback.format_exc()
+                )
+            self._processed[index] += 1
+
+    def queue_depths(self) -> list[int]:
+        """获取各工作队列当前的积压任务数"""
+        return [q.qsize() for q in self._queues]
+
+    def stats(self) -> dict[str, Any]:
+        """获取分发器的统计数据
+
+        Returns:
+            dict[str, Any]: 投递数, 丢弃数, 已处理数与各队列积压数
+        """
+        with self._counter_lock:
+            submitted, dropped = self.submitted, self.dropped
+        return {
+            "submitted": submitted,
+            "dropped": dropped,
+            "processed": sum(self._processed),
+            "queue_depths": self.queue_depths(),
+        }
+
+    def stop(self) -> None:
+        """通知所有工作线程在处理完积压任务后退出"""
+        for q in self._queues:
+            q.put(None)
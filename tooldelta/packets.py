@@ -1,6 +1,11 @@
 "数据包类构建器"
 
+import json
+from collections.abc import Iterator, Mapping
 from dataclasses import dataclass
+from typing import Any
+
+import ujson
 
 
 @dataclass
@@ -364,3 +369,88 @@ class Packet_CommandOutput:
         ]
         self.SuccessCount = pkt["SuccessCount"]
         self.OutputType = pkt["OutputType"]
+
+
+_JSON_VALUE_DECODER = json.JSONDecoder()
+
+
+class LazyPacket(Mapping[str, Any]):
+    """延迟解码的数据包
+
+    保留原始 json 文本, 首次访问字段时才解码.
+    访问位于第一个嵌套对象/数组之前的顶层字段 (如 TextType, SourceName, EntityRuntimeID) 时,
+    只定位并解码该字段的值; 其余情况下完整解码一次, 之后直接查表.
+    """
+
+    __slots__ = ("_data", "_fields", "_nest_at", "raw")
+
+    def __init__(self, raw: str | bytes):
+        """
+        Args:
+            raw (str | bytes): 数据包的 json 文本
+        """
+        self.raw = raw.decode("utf-8") if isinstance(raw, bytes) else raw
+        self._data: dict | None = None
+        # 已部分解码的顶层字段
+        self._fields: dict[str, Any] = {}
+        # 第一个嵌套对象/数组的位置, 在此之前出现的键一定是顶层键
+        self._nest_at = -1
+
+    @property
+    def decoded(self) -> bool:
+        """数据包是否已被完整解码"""
+        return self._data is not None
+
+    def as_dict(self) -> dict:
+        """完整解码数据包
+
+        Returns:
+            dict: 数据包内容
+        """
+        if self._data is None:
+            self._data = ujson.loads(self.raw)
+        return self._data
+
+    def _partial(self, key: str) -> Any:
+        raw = self.raw
+        if self._nest_at < 0:
+            top = raw.find("{")
+            nest_obj = raw.find("{", top + 1)
+            nest_arr = raw.find("[", top + 1)
+            self._nest_at = min(
+                len(raw) if nest_obj < 0 else nest_obj,
+                len(raw) if nest_arr < 0 else nest_arr,
+            )
+        # json 字符串内的引号必须转义, 因此未转义的 "key": 只可能是一个键
+        pos = raw.find(f'"{key}":', 0, self._nest_at)
+        if pos < 0 or raw[pos - 1] == "\\":
+            return self.as_dict()[key]
+        value = _JSON_VALUE_DECODER.raw_decode(raw, pos + len(key) + 3)[0]
+        self._fields[key] = value
+        return value
+
+    def __getitem__(self, key: str) -> Any:
+        if self._data is not None:
+            return self._data[key]
+        try:
+            return self._fields[key]
+        except KeyError:
+            return self._partial(key)
+
+    def __contains__(self, key: object) -> bool:
+        try:
+            self[key]  # type: ignore
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.as_dict())
+
+    def __len__(self) -> int:
+        return len(self.as_dict())
+
+    def __repr__(self) -> str:
+        if self._data is not None:
+            return f"LazyPacket({self._data!r})"
+        return f"LazyPacket(<未解码, {len(self.raw)} 字节>)"
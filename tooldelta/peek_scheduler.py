@@ -0,0 +1,108 @@
+"""
+合并机器人 "看一眼" 玩家的传送
+
+玩家加入后机器人需要临时传送到玩家身边, 以便捕获其实体数据 (如 entityruntimeid).
+一波玩家同时加入时, 调度器在一个短暂的窗口内收集这些玩家,
+只查询一次机器人坐标, 依次传送到各玩家身边, 最后只返回原位一次;
+已经获知实体运行时 ID 的玩家会被跳过.
+"""
+
+import threading
+import time
+from collections.abc import Iterable
+from typing import TYPE_CHECKING
+
+from .color_print import Print
+from .game_utils import getPosXYZ
+from .utils import Utils
+
+if TYPE_CHECKING:
+    from .frame import GameCtrl
+
+# 收集待查看玩家的窗口时长 (秒)
+PEEK_WINDOW = 0.5
+
+
+class PeekScheduler:
+    """合并玩家加入后的临时传送"""
+
+    def __init__(self, game_ctrl: "GameCtrl", window: float = PEEK_WINDOW) -> None:
+        """
+        Args:
+            game_ctrl (GameCtrl): 游戏控制对象
+            window (float, optional): 收集待查看玩家的窗口时长 (秒)
+        """
+        self.game_ctrl = game_ctrl
+        self.window = window
+        self._pending: dict[str, None] = {}
+        self._lock = threading.Lock()
+        self._running = False
+        self.peeked = 0
+        self.skipped = 0
+        self.rounds = 0
+
+    def request(self, players: str | Iterable[str]) -> None:
+        """登记需要查看的玩家, 在窗口结束后统一传送
+
+        Args:
+            players (str | Iterable[str]): 玩家名或玩家名列表
+        """
+        if isinstance(players, str):
+            players = (players,)
+        with self._lock:
+            self._pending.update(dict.fromkeys(players))
+            if self._running or not self._pending:
+                return
+            self._running = True
+        Utils.createThread(self._run, usage="合并临时传送")
+
+    def _run(self) -> None:
+        try:
+            while True:
+                time.sleep(self.window)
+                with self._lock:
+                    players = list(self._pending)
+                    self._pending.clear()
+                    if not players:
+                        self._running = False
+                        return
+                try:
+                    self._peek(players)
+                except Exception as err:  # noqa: BLE001 一轮失败不影响之后的请求
+                    Print.print_err(f"临时传送玩家失败: {err}")
+        except BaseException:
+            with self._lock:
+                self._running = False
+            raise
+
+    def _peek(self, players: list[str]) -> None:
+        game_ctrl = self.game_ctrl
+        bot_name = game_ctrl.bot_name
+        targets = []
+        for player in players:
+            if player == bot_name or player not in game_ctrl.roster:
+                continue
+            if self._runtime_id_known(player):
+                self.skipped += 1
+                continue
+            targets.append(player)
+        if not targets:
+            return
+        x, y, z = getPosXYZ(bot_name)
+        for player in targets:
+            game_ctrl.sendwocmd(f"tp {bot_name} {player}")
+        game_ctrl.sendwocmd(f"tp {bot_name} {int(x)} {int(y)} {int(z)}")
+        self.peeked += len(targets)
+        self.rounds += 1
+
+    def _runtime_id_known(self, player: str) -> bool:
+        uuid = self.game_ctrl.roster.uuid_of(player)
+        if uuid is None:
+            return False
+        kit = self.game_ctrl.roster.kit_of(uuid)
+        if kit is None:
+            return False
+        try:
+            return bool(kit.entity_runtime_id)
+        except Exception:  # noqa: BLE001 接入点断开时抛出的是 Exception
+            return False
@@ -0,0 +1,154 @@
+"""
+在线玩家名单
+
+维护 玩家名 <-> UUID 的双向索引, 由按到达顺序处理的 PlayerList 数据包增量更新, 每次变动都会使版本号加一. 插件通过 snapshot() 获取只读快照, 同一版本的快照只生成一次.
+接入点的 PlayerChange 事件只为已在名单中的玩家补上 PlayerKit, 不会增删玩家, 因此两者先后不定也不会让已退出的玩家重新出现.
+"""
+
+import threading
+from collections.abc import Mapping
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any
+
+
+@dataclass(frozen=True)
+class RosterSnapshot:
+    """在线玩家名单的只读快照"""
+
+    version: int
+    names: tuple[str, ...]
+    players_uuid: Mapping[str, str]
+    players: tuple[Any, ...]
+
+
+class PlayerRoster:
+    """在线玩家名单"""
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        # 玩家名 -> UUID (UUID 未知时为空字符串), 按加入顺序排列
+        self._uuid_by_name: dict[str, str] = {}
+        self._name_by_uuid: dict[str, str] = {}
+        # UUID -> PlayerKit
+        self._players: dict[str, Any] = {}
+        self.version = 0
+        self._snapshot: RosterSnapshot | None = None
+
+    def reset(
+        self, players: Mapping[str, str], kits: Mapping[str, Any] | None = None
+    ) -> None:
+        """用完整的在线玩家表重建名单
+
+        Args:
+            players (Mapping[str, str]): 玩家名 -> UUID
+            kits (Mapping[str, Any] | None, optional): UUID -> PlayerKit
+        """
+        with self._lock:
+            self._uuid_by_name = dict(players)
+            self._name_by_uuid = {u: n for n, u in players.items() if u}
+            self._players = {
+                u: k for u, k in (kits or {}).items() if u in self._name_by_uuid
+            }
+            self.version += 1
+
+    def add(self, name: str, uuid: str = "", kit: Any = None) -> bool:
+        """添加或更新一名在线玩家
+
+        Args:
+            name (str): 玩家名
+            uuid (str, optional): 玩家 UUID
+            kit (Any, optional): 玩家的 PlayerKit
+
+        Returns:
+            bool: 是否为新加入的玩家
+        """
+        with self._lock:
+            old_uuid = self._uuid_by_name.get(name)
+            is_new = old_uuid is None
+            if old_uuid == uuid and (kit is None or self._players.get(uuid) is kit):
+                return False
+            if old_uuid:
+                self._name_by_uuid.pop(old_uuid, None)
+                self._players.pop(old_uuid, None)
+            self._uuid_by_name[name] = uuid
+            if uuid:
+                self._name_by_uuid[uuid] = name
+                if kit is not None:
+                    self._players[uuid] = kit
+            self.version += 1
+            return is_new
+
+    def attach_kit(self, uuid: str, kit: Any) -> bool:
+        """为已在名单中的玩家设置 PlayerKit, 不在名单中的玩家会被忽略
+
+        Args:
+            uuid (str): 玩家 UUID
+            kit (Any): 玩家的 PlayerKit
+
+        Returns:
+            bool: 名单是否有变动
+        """
+        with self._lock:
+            if uuid not in self._name_by_uuid or self._players.get(uuid) is kit:
+                return False
+            self._players[uuid] = kit
+            self.version += 1
+            return True
+
+    def remove_uuid(self, uuid: str) -> str | None:
+        """按 UUID 移除一名玩家
+
+        Args:
+            uuid (str): 玩家 UUID
+
+        Returns:
+            str | None: 玩家名, 玩家不在名单中时为 None
+        """
+        with self._lock:
+            name = self._name_by_uuid.pop(uuid, None)
+            if name is None:
+                return None
+            self._uuid_by_name.pop(name, None)
+            self._players.pop(uuid, None)
+            self.version += 1
+            return name
+
+    def name_of(self, uuid: str) -> str | None:
+        """按 UUID 获取在线玩家名"""
+        return self._name_by_uuid.get(uuid)
+
+    def uuid_of(self, name: str) -> str | None:
+        """按玩家名获取在线玩家 UUID"""
+        return self._uuid_by_name.get(name) or None
+
+    def kit_of(self, uuid: str) -> Any:
+        """按 UUID 获取在线玩家的 PlayerKit"""
+        return self._players.get(uuid)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._uuid_by_name
+
+    def __len__(self) -> int:
+        return len(self._uuid_by_name)
+
+    def snapshot(self) -> RosterSnapshot:
+        """获取名单的只读快照, 名单未变动时返回同一个快照
+
+        Returns:
+            RosterSnapshot: 快照
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == self.version:
+            return snapshot
+        with self._lock:
+            snapshot = RosterSnapshot(
+                version=self.version,
+                names=tuple(self._uuid_by_name),
+                players_uuid=MappingProxyType(
+                    {n: u for n, u in self._uuid_by_name.items() if u}
+                ),
+                players=tuple(self._players.values()),
+            )
+            self._snapshot = snapshot
+            return snapshot
@@ -6,6 +6,7 @@ import traceback
 from typing import TYPE_CHECKING, Any, Callable, Union, TypeVar
 
 from ..color_print import Print
+from ..log_channel import log_channels
 from .classic_plugin import (
     Plugin,
     add_plugin,
@@ -13,7 +14,6 @@ from .classic_plugin import (
     _init_frame,
     _PLUGIN_CLS_TYPE,
 )
-from ..utils import Utils
 from .injected_plugin import (
     execute_init,
     execute_player_prejoin,
@@ -24,6 +24,8 @@ from .injected_plugin import (
     execute_frame_exit,
     execute_command_say,
     execute_repeat,
+    run_in_loop,
+    submit_to_loop,
 )
 from ..plugin_load import (
     classic_plugin,
@@ -40,6 +42,7 @@ from ..constants import (
     TOOLDELTA_INJECTED_PLUGIN,
 )
 from ..game_utils import _set_frame
+from ..packets import LazyPacket
 from .injected_plugin.movent import set_frame as _set_frame_inj
 
 if TYPE_CHECKING:
@@ -71,7 +74,9 @@ class PluginGroup:
     def __init__(self):
         "初始化"
         self.listen_packet_ids = set()
-        self._packet_funcs: dict[str, list[Callable]] = {}
+        self._packet_funcs: dict[int, list[Callable]] = {}
+        # 以数据包 ID 为下标的路由表, 仅在监听器变动时重建
+        self._packet_routes: list[tuple[Callable, ...]] = []
         self._update_player_attributes_funcs: list[Callable] = []
         self._broadcast_listeners: dict[str, list[Callable]] = {}
         self.plugins_api: dict[str, Plugin] = {}
@@ -310,10 +315,15 @@ class PluginGroup:
             packetType (int): 数据包 ID
             func (Callable): 数据包监听器
         """
-        if self._packet_funcs.get(str(packetType)):
-            self._packet_funcs[str(packetType)].append(func)
-        else:
-            self._packet_funcs[str(packetType)] = [func]
+        self._packet_funcs.setdefault(packetType, []).append(func)
+        self._rebuild_packet_routes()
+
+    def _rebuild_packet_routes(self) -> None:
+        """根据已添加的数据包监听器重建路由表"""
+        routes: list[tuple[Callable, ...]] = [()] * (max(self._packet_funcs) + 1)
+        for pktID, funcs in self._packet_funcs.items():
+            routes[pktID] = tuple(funcs)
+        self._packet_routes = routes
 
     def add_broadcast_evt(self, evt: str, func: Callable) -> None:
         """添加广播事件监听器，仅在系统内部使用
@@ -376,8 +386,9 @@ class PluginGroup:
                 func()
             except Exception as err:
                 onerr(name, err, traceback.format_exc())
-        asyncio.run(execute_init())
-        Utils.createThread(asyncio.run, (execute_repeat(),))
+        # 初始化完成后, 重复任务与后续事件共用同一个常驻事件循环
+        run_in_loop(execute_init())
+        submit_to_loop(execute_repeat())
 
     def execute_player_prejoin(
         self, player, onerr: Callable[[str, Exception, str], None] = NON_FUNC
@@ -393,7 +404,7 @@ class PluginGroup:
                 func(player)
             except Exception as err:
                 onerr(name, err, traceback.format_exc())
-        asyncio.run(execute_player_prejoin(player))
+        submit_to_loop(execute_player_prejoin(player))
 
     def execute_player_join(
         self, player: str, onerr: Callable[[str, Exception, str], None] = NON_FUNC
@@ -409,7 +420,7 @@ class PluginGroup:
                 func(player)
             except Exception as err:
                 onerr(name, err, traceback.format_exc())
-        asyncio.run(execute_player_join(player))
+        submit_to_loop(execute_player_join(player))
 
     def execute_player_message(
         self,
@@ -432,7 +443,7 @@ class PluginGroup:
                 func(player, msg)
             except Exception as err:
                 onerr(name, err, traceback.format_exc())
-        asyncio.run(execute_player_message(player, msg))
+        submit_to_loop(execute_player_message(player, msg))
 
     def execute_player_leave(
         self, player: str, onerr: Callable[[str, Exception, str], None] = NON_FUNC
@@ -448,7 +459,7 @@ class PluginGroup:
                 func(player)
             except Exception as err:
                 onerr(name, err, traceback.format_exc())
-        asyncio.run(execute_player_left(player))
+        submit_to_loop(execute_player_left(player))
 
     def execute_player_death(
         self,
@@ -470,7 +481,7 @@ class PluginGroup:
                 func(player, killer, msg)
             except Exception as err:
                 onerr(name, err, traceback.format_exc())
-        asyncio.run(execute_death_message(player, killer, msg))
+        submit_to_loop(execute_death_message(player, killer, msg))
 
     def execute_command(
         self,
@@ -490,7 +501,7 @@ class PluginGroup:
                 func(plugin_name, msg)
             except Exception as err:
                 onerr(plugin_name, err, traceback.format_exc())
-        asyncio.run(execute_command_say(name, msg))
+        submit_to_loop(execute_command_say(name, msg))
 
     def execute_frame_exit(
         self, onerr: Callable[[str, Exception, str], None] = NON_FUNC
@@ -505,29 +516,41 @@ class PluginGroup:
                 func()
             except Exception as err:
                 onerr(name, err, traceback.format_exc())
-        asyncio.run(execute_frame_exit())
+        run_in_loop(execute_frame_exit())
 
-    def processPacketFunc(self, pktID: int, pkt: dict) -> bool:
+    def processPacketFunc(self, pktID: int, pkt: dict | LazyPacket) -> bool:
         """处理数据包监听器
 
         Args:
             pktID (int): 数据包 ID
-            pkt (dict): 数据包
+            pkt (dict | LazyPacket): 数据包
 
         Returns:
             bool: 是否处理成功
         """
-        d = self._packet_funcs.get(str(pktID))
+        routes = self._packet_routes
+        d = routes[pktID] if pktID < len(routes) else None
         if d:
+            # 插件可能修改或序列化数据包, 交给插件前需完整解码
+            if isinstance(pkt, LazyPacket):
+                pkt = pkt.as_dict()
             for func in d:
                 try:
                     res = func(pkt)
                     if res:
                         return True
                 except Exception:
-                    Print.print_err(f"插件方法 {func.__name__} 出错：")
-                    Print.print_err(traceback.format_exc())
+                    # 出错的监听器可能对每个数据包都报错, 经日志通道限流
+                    log_channels.get(_plugin_name_of(func)).print_err(
+                        f"插件方法 {func.__name__} 出错：\n{traceback.format_exc()}",
+                        site=func.__qualname__,
+                    )
         return False
 
 
+def _plugin_name_of(func: Callable) -> str:
+    """获取监听器所属的插件名: 类式插件为插件主类的 name, 否则为函数所在的模块名"""
+    return getattr(getattr(func, "__self__", None), "name", "") or func.__module__
+
+
 plugin_group = PluginGroup()
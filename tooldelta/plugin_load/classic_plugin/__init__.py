@@ -6,6 +6,7 @@ import sys
 import traceback
 from typing import TYPE_CHECKING, Union, TypeVar
 from ...color_print import Print
+from ...log_channel import LogChannel, log_channels
 from ...utils import Utils
 from ...cfg import Cfg
 from ...plugin_load import plugin_is_enabled, NotValidPluginError
@@ -42,6 +43,11 @@ class Plugin:
             self.__path_created__ = True
         return path
 
+    @property
+    def log_channel(self) -> LogChannel:
+        "该插件的日志通道, 输出经过限速, 去重与报错堆栈采样"
+        return log_channels.get(self.name)
+
     def make_data_path(self):
         os.makedirs(os.path.join(TOOLDELTA_PLUGIN_DATA_DIR, self.name), exist_ok=True)
 
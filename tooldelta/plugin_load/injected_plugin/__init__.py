@@ -1,13 +1,19 @@
 "ToolDelta 注入式插件"
 
 import asyncio
+from concurrent.futures import Future
 from dataclasses import dataclass
 import os
 import sys
 import importlib
+import threading
+import traceback
+from collections.abc import Callable, Coroutine
+from typing import TYPE_CHECKING, Any
 
-from typing import TYPE_CHECKING, Callable, List, Tuple
 from ...color_print import Print
+from ...log_channel import log_channels
+from ...utils import Utils
 from ...plugin_load import (
     plugin_is_enabled,
     PluginAPINotFoundError,
@@ -17,132 +23,211 @@ from ...plugin_load import (
 if TYPE_CHECKING:
     from tooldelta.plugin_load.PluginGroup import PluginGroup
 
+
+class PriorityHandlers(dict[Callable, int | None]):
+    """按优先级分层的事件处理函数表
+
+    键为处理函数, 值为优先级. 增删处理函数时即排好执行层级:
+    优先级为 None 的处理函数最先执行, 其余按优先级从小到大依次执行,
+    同一优先级的处理函数并发执行.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.timeouts: dict[Callable, float | None] = {}
+        self.tiers: tuple[tuple[Callable, ...], ...] = ()
+
+    def add(
+        self, func: Callable, priority: int | None = None, timeout: float | None = None
+    ) -> None:
+        """添加处理函数
+
+        Args:
+            func (Callable): 处理函数
+            priority (int | None, optional): 优先级
+            timeout (float | None, optional): 单次执行的超时时间 (秒), None 为不限时
+        """
+        self.timeouts[func] = timeout
+        self[func] = priority
+
+    def __setitem__(self, func: Callable, priority: int | None) -> None:
+        super().__setitem__(func, priority)
+        self.tiers = sort_tiers(self)
+
+    def __delitem__(self, func: Callable) -> None:
+        super().__delitem__(func)
+        self.timeouts.pop(func, None)
+        self.tiers = sort_tiers(self)
+
+    def clear(self) -> None:
+        super().clear()
+        self.timeouts.clear()
+        self.tiers = ()
+
+
+def sort_tiers(func_dict: dict) -> tuple[tuple[Callable, ...], ...]:
+    """将 处理函数->优先级 字典按优先级分层
+
+    Args:
+        func_dict (dict): 处理函数字典
+
+    Returns:
+        tuple[tuple[Callable, ...], ...]: 按执行顺序排列的各层处理函数
+    """
+    groups: dict[int | None, list[Callable]] = {}
+    for func, priority in func_dict.items():
+        groups.setdefault(priority, []).append(func)
+    order = sorted(groups, key=lambda p: (p is not None, p or 0))
+    return tuple(tuple(groups[p]) for p in order)
+
+
+class _Consume:
+    """事件拦截标记"""
+
+    def __repr__(self) -> str:
+        return "CONSUME"
+
+
+CONSUME = _Consume()
+"处理函数返回此值时视为事件已被拦截, 不再执行优先级更低的处理函数"
+
 # 定义插件处理函数列表
-player_message_funcs: dict[Callable, int | None] = {}
-player_prejoin_funcs: dict[Callable, int | None] = {}
-player_join_funcs: dict[Callable, int | None] = {}
-player_left_funcs: dict[Callable, int | None] = {}
-player_death_funcs: dict[Callable, int | None] = {}
-commmand_message_funcs: dict[Callable, int | None] = {}
+player_message_funcs = PriorityHandlers()
+player_prejoin_funcs = PriorityHandlers()
+player_join_funcs = PriorityHandlers()
+player_left_funcs = PriorityHandlers()
+player_death_funcs = PriorityHandlers()
+commmand_message_funcs = PriorityHandlers()
 repeat_funcs: dict[Callable, int | float] = {}
-init_plugin_funcs: dict[Callable, int | None] = {}
-frame_exit_funcs: dict[Callable, int | None] = {}
+init_plugin_funcs = PriorityHandlers()
+frame_exit_funcs = PriorityHandlers()
 
 
-def player_message(priority: int | None = None) -> Callable:
+def player_message(
+    priority: int | None = None, timeout: float | None = None
+) -> Callable:
     """载入处理玩家消息
 
     Args:
         priority (int, optional): 插件优先级
+        timeout (float | None, optional): 单次执行的超时时间 (秒), 超时后跳过该处理函数
 
     Returns:
         Callable: 插件处理函数
     """
 
     def decorator(func):
-        player_message_funcs[func] = priority
+        player_message_funcs.add(func, priority, timeout)
         return func
 
     return decorator
 
 
-def player_prejoin(priority: int | None = None) -> Callable[["player_name"], None]:
+def player_prejoin(
+    priority: int | None = None, timeout: float | None = None
+) -> Callable[["player_name"], None]:
     """载入处理玩家加入前事件
 
     Args:
         priority (int | None, optional): 插件优先级
+        timeout (float | None, optional): 单次执行的超时时间 (秒), 超时后跳过该处理函数
 
     Returns:
         Callable: 插件处理函数
     """
 
     def decorator(func):
-        player_prejoin_funcs[func] = priority
+        player_prejoin_funcs.add(func, priority, timeout)
         return func
 
     return decorator
 
 
-def player_join(priority: int | None = None) -> Callable:
+def player_join(priority: int | None = None, timeout: float | None = None) -> Callable:
     """载入处理玩家加入事件
 
     Args:
         priority (int | None, optional): 插件优先级
+        timeout (float | None, optional): 单次执行的超时时间 (秒), 超时后跳过该处理函数
 
     Returns:
         Callable: 插件处理函数
     """
 
     def decorator(func):
-        player_join_funcs[func] = priority
+        player_join_funcs.add(func, priority, timeout)
         return func
 
     return decorator
 
 
-def player_left(priority: int | None = None) -> Callable:
+def player_left(priority: int | None = None, timeout: float | None = None) -> Callable:
     """载入处理玩家离开事件
 
     Args:
         priority (int | None, optional): 插件优先级
+        timeout (float | None, optional): 单次执行的超时时间 (秒), 超时后跳过该处理函数
 
     Returns:
         Callable: 插件处理函数
     """
 
     def decorator(func):
-        player_left_funcs[func] = priority
+        player_left_funcs.add(func, priority, timeout)
         return func
 
     return decorator
 
 
-def player_death(priority: int | None = None) -> Callable:
+def player_death(priority: int | None = None, timeout: float | None = None) -> Callable:
     """载入处理玩家死亡事件
 
     Args:
         priority (int | None, optional): 插件优先级
+        timeout (float | None, optional): 单次执行的超时时间 (秒), 超时后跳过该处理函数
 
     Returns:
         Callable: 插件处理函数
     """
 
     def decorator(func):
-        player_death_funcs[func] = priority
+        player_death_funcs.add(func, priority, timeout)
         return func
 
     return decorator
 
 
-def init(priority: int | None = None) -> Callable:
+def init(priority: int | None = None, timeout: float | None = None) -> Callable:
     """载入机器人进入游戏后初始化插件
 
     Args:
         priority (int | None, optional): 插件优先级
+        timeout (float | None, optional): 单次执行的超时时间 (秒), 超时后跳过该处理函数
 
     Returns:
         Callable: 插件处理函数
     """
 
     def decorator(func):
-        init_plugin_funcs[func] = priority
+        init_plugin_funcs.add(func, priority, timeout)
         return func
 
     return decorator
 
 
-def frame_exit(priority: int | None = None) -> Callable:
+def frame_exit(priority: int | None = None, timeout: float | None = None) -> Callable:
     """载入处理框架退出事件的插件
 
     Args:
         priority (int | None, optional): 插件优先级
+        timeout (float | None, optional): 单次执行的超时时间 (秒), 超时后跳过该处理函数
 
     Returns:
         Callable: 插件处理函数
     """
 
     def decorator(func):
-        frame_exit_funcs[func] = priority
+        frame_exit_funcs.add(func, priority, timeout)
         return func
 
     return decorator
@@ -165,21 +250,105 @@ def repeat(retime: int | float = 5) -> Callable:
     return decorator
 
 
-async def command_say(priority: int | None = None) -> Callable:
+def command_say(priority: int | None = None, timeout: float | None = None) -> Callable:
     """载入处理命令消息
 
     Args:
-        name (str): 命令名
         priority (int | None, optional): 插件优先级
+        timeout (float | None, optional): 单次执行的超时时间 (秒), 超时后跳过该处理函数
     """
 
     def decorator(func):
-        commmand_message_funcs[func] = priority
+        commmand_message_funcs.add(func, priority, timeout)
         return func
 
     return decorator
 
 
+_event_loop: asyncio.AbstractEventLoop | None = None
+_event_loop_thread: "Utils.createThread | None" = None
+_event_loop_lock = threading.Lock()
+# 重复任务是否已启动且未被 safe_jump 取消; 事件循环重新启动时据此重新提交重复任务
+_repeat_running = False
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """获取注入式插件共用的事件循环, 首次调用时在独立线程中启动;
+    事件循环线程已退出 (如协程中未捕获的 SystemExit 打断了 run_forever) 时重新启动,
+    并重新提交已在旧事件循环中运行的重复任务
+
+    Returns:
+        asyncio.AbstractEventLoop: 事件循环
+    """
+    # skipcq: PYL-W0603
+    global _event_loop, _event_loop_thread
+    with _event_loop_lock:
+        if (
+            _event_loop is None
+            or _event_loop.is_closed()
+            or _event_loop_thread is None
+            or not _event_loop_thread.is_alive()
+        ):
+            restarting = _event_loop is not None and not _event_loop.is_closed()
+            if restarting:
+                Print.print_war("注入式插件事件循环已停止, 正在重新启动")
+            _event_loop = asyncio.new_event_loop()
+            _event_loop_thread = Utils.createThread(
+                _event_loop.run_forever, usage="注入式插件事件循环"
+            )
+            if restarting and _repeat_running:
+                asyncio.run_coroutine_threadsafe(
+                    execute_repeat(), _event_loop
+                ).add_done_callback(_report_future_exception)
+        return _event_loop
+
+
+def _report_future_exception(fut: Future) -> None:
+    if fut.cancelled():
+        return
+    if (err := fut.exception()) is not None:
+        Print.print_err(
+            "注入式插件事件处理出错:\n" + "".join(traceback.format_exception(err))
+        )
+
+
+def submit_to_loop(coro: Coroutine) -> Future:
+    """将协程交给注入式插件事件循环执行, 不等待其完成
+
+    Args:
+        coro (Coroutine): 协程
+
+    Returns:
+        Future: 协程的执行结果, 出错时会自动输出错误信息
+    """
+    fut = asyncio.run_coroutine_threadsafe(coro, get_event_loop())
+    fut.add_done_callback(_report_future_exception)
+    return fut
+
+
+def run_in_loop(coro: Coroutine) -> Any:
+    """将协程交给注入式插件事件循环执行, 并等待其完成
+
+    Args:
+        coro (Coroutine): 协程
+
+    Raises:
+        RuntimeError: 在事件循环所在线程中调用 (会导致死锁)
+
+    Returns:
+        Any: 协程的返回值
+    """
+    loop = get_event_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise RuntimeError("不能在注入式插件事件循环中同步等待协程")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
 async def repeat_task(func: Callable, time: int | float) -> None:
     """执行重复任务（执行完等待一段时间再执行）
 
@@ -192,32 +361,67 @@ async def repeat_task(func: Callable, time: int | float) -> None:
         # 防止出错
         try:
             await func()
-        except Exception as e:
-            Print.print_err(f"repeat_task error: {e}")
+        except asyncio.CancelledError:
+            raise
+        except BaseException as e:  # noqa: BLE001
+            # SystemExit 等若逸出任务会停止共用的事件循环
+            Print.print_err(f"repeat_task error: {e!r}")
+
+
+async def _run_handler(
+    func: Callable, timeout: float | None, args: tuple, kwargs: dict
+) -> Any:
+    try:
+        if timeout is None:
+            return await func(*args, **kwargs)
+        return await asyncio.wait_for(func(*args, **kwargs), timeout)
+    except asyncio.TimeoutError:  # noqa: UP041 Python 3.11 之前与 TimeoutError 不同
+        Print.print_war(f"注入式插件方法 {func.__name__} 执行超过 {timeout}s, 已跳过")
+    except asyncio.CancelledError:
+        raise
+    except Utils.ChatbarLockBusy:
+        # 聊天栏锁被占用时已输出提示
+        pass
+    except BaseException:  # noqa: BLE001
+        # SystemExit 等若逸出任务会停止共用的事件循环, 在此一并拦下
+        log_channels.get(func.__module__).print_err(
+            f"注入式插件方法 {func.__name__} 出错：\n" + traceback.format_exc(),
+            site=func.__qualname__,
+        )
+    return None
 
 
-async def execute_asyncio_task(func_dict: dict, *args, **kwargs) -> None:
-    """执行异步任务
+async def execute_asyncio_task(func_dict: dict, *args, **kwargs) -> bool:
+    """按优先级分层执行异步任务
+
+    各层依次执行, 同一层内并发执行;
+    任一处理函数返回 CONSUME 时视为事件已被拦截, 不再执行之后的层;
+    其他返回值 (包括真值) 不影响之后的层.
 
     Args:
         func_dict (dict): 函数字典
+
+    Returns:
+        bool: 事件是否被拦截
     """
-    tasks: List[Tuple[int, asyncio.Task]] = []
-    none_tasks: List[Tuple[None, asyncio.Task]] = []
-    # 将任务添加到 tasks 列表或 none_tasks 列表中
-    for func, priority in func_dict.items():
-        if priority is not None:
-            tasks.append((priority, asyncio.create_task(func(*args, **kwargs))))
+    if isinstance(func_dict, PriorityHandlers):
+        tiers, timeouts = func_dict.tiers, func_dict.timeouts
+    else:
+        tiers, timeouts = sort_tiers(func_dict), {}
+    for tier in tiers:
+        if len(tier) == 1:
+            func = tier[0]
+            consumed = (
+                await _run_handler(func, timeouts.get(func), args, kwargs) is CONSUME
+            )
         else:
-            none_tasks.append((priority, asyncio.create_task(func(*args, **kwargs))))
-
-    # 按优先级对非 None 任务排序
-    tasks.sort(key=lambda x: x[0])
-
-    # 将 none_tasks 列表附加到已排序的任务列表的末尾
-    task_list = none_tasks + tasks
-
-    await asyncio.gather(*[task[1] for task in task_list])
+            results = await asyncio.gather(
+                *(_run_handler(f, timeouts.get(f), args, kwargs) for f in tier)
+            )
+            consumed = any(res is CONSUME for res in results)
+        if consumed:
+            return True
+    return False
 
 
 async def execute_init() -> None:
@@ -237,10 +441,15 @@ async def run_repeat():
 
 async def safe_jump():
     """安全跳出重复任务"""
+    # skipcq: PYL-W0603
+    global _repeat_running
+    _repeat_running = False
     try:
-        main_task.cancel()
+        task = main_task
     except NameError:
         return
+    # 重复任务运行在事件循环线程中, 需在该线程内取消
+    task.get_loop().call_soon_threadsafe(task.cancel)
 
 
 main_task: asyncio.Task
@@ -279,11 +488,13 @@ class player_death_info(player_name):
 async def execute_repeat() -> None:
     """执行重复任务"""
     # skipcq: PYL-W0603
-    global main_task
+    global main_task, _repeat_running
+    _repeat_running = True
     main_task = asyncio.create_task(run_repeat())
     try:
         await main_task
     except asyncio.CancelledError:
+        _repeat_running = False
         Print.print_suc("重复任务 repeat_task 已退出！")
 
 
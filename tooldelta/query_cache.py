@@ -0,0 +1,240 @@
+"""
+只读游戏查询的结果缓存
+
+game_utils 中的查询方法传入 cached=True 时使用此缓存, 以 (查询类型, 参数) 为键.
+- 每种查询类型有各自的有效期 (QUERY_CACHE_TTLS)
+- 同时发起的相同查询只会发出一条指令, 其余调用方共享其结果
+- 超出容量时淘汰最久未使用的项
+- 通过 sendwocmd 等方法写入计分板时, 相关的分数缓存会失效
+"""
+
+import shlex
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from concurrent.futures import Future
+from typing import Any
+
+# 各查询类型的缓存有效期 (秒)
+QUERY_CACHE_TTLS: dict[str, float] = {
+    "score": 2.0,
+    "scores": 2.0,
+    "pos": 0.5,
+    "target": 1.0,
+    "item": 1.0,
+}
+QUERY_CACHE_MAX_SIZE = 512
+# 会修改分数的 scoreboard players 子命令
+SCOREBOARD_WRITES = frozenset(("set", "add", "remove", "reset", "operation", "random"))
+# 计分板标签为此值的缓存项在任一计分板被写入时都会失效
+ANY_SCOREBOARD = "*"
+
+
+def _split_command(cmd: str) -> list[str] | None:
+    """按 MC 的规则拆分指令参数: 双引号内的空格与目标选择器 [...] 内的空格不拆分
+
+    Returns:
+        list[str] | None: 参数列表, 引号或括号不配对等无法确定如何拆分时为 None
+    """
+    lexer = shlex.shlex(cmd, posix=True)
+    lexer.whitespace_split = True
+    lexer.quotes = '"'
+    lexer.commenters = ""
+    try:
+        tokens = list(lexer)
+    except ValueError:
+        return None
+    args: list[str] = []
+    depth = 0
+    for token in tokens:
+        if depth > 0:
+            args[-1] += " " + token
+        else:
+            args.append(token)
+        depth += token.count("[") - token.count("]")
+    return None if depth else args
+
+
+class QueryCache:
+    """只读游戏查询的结果缓存"""
+
+    def __init__(
+        self,
+        ttls: dict[str, float] = QUERY_CACHE_TTLS,
+        max_size: int = QUERY_CACHE_MAX_SIZE,
+    ) -> None:
+        """
+        Args:
+            ttls (dict[str, float], optional): 查询类型 -> 有效期 (秒)
+            max_size (int, optional): 最多缓存多少项
+        """
+        self.ttls = dict(ttls)
+        self.max_size = max_size
+        # (类型, 参数) -> (结果, 过期时间, 计分板标签)
+        self._entries: OrderedDict[tuple, tuple[Any, float, str | None]] = OrderedDict()
+        # (类型, 参数) -> (进行中的查询结果, 计分板标签)
+        self._inflight: dict[tuple, tuple[Future, str | None]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+        self.invalidations = 0
+
+    def get(
+        self,
+        kind: str,
+        args: Hashable,
+        loader: Callable[[], Any],
+        scoreboard: str | None = None,
+    ) -> Any:
+        """获取查询结果, 缓存未命中时调用 loader 执行查询
+
+        Args:
+            kind (str): 查询类型, 决定有效期
+            args (Hashable): 查询参数
+            loader (Callable[[], Any]): 实际执行查询的函数
+            scoreboard (str | None, optional): 结果依赖的计分板名, 该计分板被写入时缓存失效;
+                为 ANY_SCOREBOARD 时任一计分板被写入都会失效
+
+        Returns:
+            Any: 查询结果
+        """
+        key = (kind, args)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                self.misses += 1
+                fut: Future = Future()
+                self._inflight[key] = (fut, scoreboard)
+            else:
+                self.shared += 1
+        if inflight is not None:
+            return inflight[0].result()
+        try:
+            result = loader()
+        except BaseException as err:
+            with self._lock:
+                self._inflight.pop(key, None)
+            fut.set_exception(err)
+            raise
+        with self._lock:
+            # 查询期间被失效的结果不写入缓存, 但仍交给本次的调用方
+            if self._inflight.get(key, (None,))[0] is fut:
+                del self._inflight[key]
+                self._entries[key] = (
+                    result,
+                    time.monotonic() + self.ttls.get(kind, 1.0),
+                    scoreboard,
+                )
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        fut.set_result(result)
+        return result
+
+    def invalidate(self, kind: str | None = None) -> None:
+        """使缓存失效
+
+        Args:
+            kind (str | None, optional): 查询类型, 为 None 时清空全部缓存
+        """
+        with self._lock:
+            if kind is None:
+                self._entries.clear()
+                self._inflight.clear()
+            else:
+                for key in [k for k in self._entries if k[0] == kind]:
+                    del self._entries[key]
+                for key in [k for k in self._inflight if k[0] == kind]:
+                    del self._inflight[key]
+            self.invalidations += 1
+
+    def invalidate_scoreboard(self, scoreboard: str | None = None) -> None:
+        """使依赖某个计分板的缓存失效
+
+        Args:
+            scoreboard (str | None, optional): 计分板名, 为 None 时使所有分数缓存失效
+        """
+        with self._lock:
+            # 进行中的查询被移出登记后, 其结果不会写入缓存
+            for store in (self._entries, self._inflight):
+                stale = [
+                    key
+                    for key, value in store.items()
+                    if value[-1] is not None
+                    and (
+                        scoreboard is None or value[-1] in (scoreboard, ANY_SCOREBOARD)
+                    )
+                ]
+                for key in stale:
+                    del store[key]
+            self.invalidations += 1
+
+    def note_command(self, cmd: str) -> None:
+        """检查即将发出的指令, 若会写入计分板则使相关缓存失效
+
+        execute 指令会检查其 store ... score 子句与 run 之后的指令;
+        无法确定写入了哪个计分板时, 使所有分数缓存失效.
+
+        Args:
+            cmd (str): MC 指令
+        """
+        if "score" not in cmd:
+            return
+        args = _split_command(cmd.lstrip("/ "))
+        if args is None:
+            self.invalidate_scoreboard(None)
+        else:
+            self._note_args(args)
+
+    def _note_args(self, args: list[str]) -> None:
+        if not args:
+            return
+        head = args[0].lstrip("/")
+        if head == "execute":
+            for i, arg in enumerate(args):
+                if arg == "run":
+                    self._note_args(args[i + 1 :])
+                    return
+                if arg == "store" and i + 2 < len(args) and args[i + 2] == "score":
+                    # execute store result|success score <目标> <计分板>
+                    self._invalidate_written(args, i + 3)
+        elif head == "scoreboard" and len(args) >= 3:
+            if args[1] == "players":
+                if args[2] in SCOREBOARD_WRITES:
+                    self._invalidate_written(args, 3)
+            elif args[1] == "objectives" and args[2] in ("remove", "add"):
+                self.invalidate_scoreboard(args[3] if len(args) > 3 else None)
+
+    def _invalidate_written(self, args: list[str], target_index: int) -> None:
+        # 缺少计分板参数时 (如 scoreboard players reset <目标>) 可能写入所有计分板
+        if target_index + 1 >= len(args):
+            self.invalidate_scoreboard(None)
+            return
+        scoreboard = args[target_index + 1]
+        self.invalidate_scoreboard(None if scoreboard == "*" else scoreboard)
+
+    def stats(self) -> dict[str, int]:
+        """获取缓存的统计数据
+
+        Returns:
+            dict[str, int]: 缓存项数, 命中, 未命中, 共享进行中查询与失效的次数
+        """
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "shared": self.shared,
+                "invalidations": self.invalidations,
+            }
+
+
+query_cache = QueryCache()
@@ -6,6 +6,7 @@ import traceback
 
 from .color_print import Print
 from .frame import GameCtrl, ToolDelta
+from .log_channel import log_channel_flush_thread
 from .plugin_load.PluginGroup import plugin_group
 from .sys_args import sys_args_to_dict
 from .urlmethod import check_update
@@ -32,6 +33,8 @@ def start_tool_delta() -> None:
         plugin_group.read_all_plugins()
         tooldelta.plugin_load_finished(plugin_group)
         tmpjson_save_thread()
+        log_channel_flush_thread()
+        Print.set_async_output(True)
         tooldelta.launcher.listen_launched(game_control.Inject)
         game_control.set_listen_packets()
         raise tooldelta.launcher.launch()
@@ -39,6 +42,7 @@ def start_tool_delta() -> None:
         pass
     except Exception:
         Print.print_err(f"ToolDelta 运行过程中出现问题：{traceback.format_exc()}")
+        Print.flush()
         input(Print.clean_fmt("§c按回车键退出..."))
 
 
@@ -57,5 +61,8 @@ def safe_jump(out_task: bool = True, exit_directly: bool = True) -> None:
             Print.print_war(f"{_}秒后强制退出...", end="\r")
             time.sleep(1)
         Print.print_suc("ToolDelta 已退出。")
+        # os._exit 不会执行 atexit, 需先写完输出队列
+        Print.flush()
         os._exit(0)
     Print.print_suc("ToolDelta 已退出。")
+    Print.flush()
@@ -0,0 +1,178 @@
+"""
+弹性线程池
+
+Utils.createThread 创建的任务由此线程池执行:
+- 有空闲的工作线程时直接复用, 否则新建一个; 空闲过久的工作线程会自行退出
+- 任务按用途 (usage) 分类, 可为每个类别设置同时运行的任务数上限, 超出的任务排队等待
+- 运行中的任务登记在字典中, 登记与注销均为 O(1)
+"""
+
+import collections
+import contextlib
+import threading
+import time
+from typing import Any, Protocol
+
+# 工作线程空闲多久 (秒) 后退出
+IDLE_WORKER_TIMEOUT = 60.0
+
+
+class PoolTask(Protocol):
+    category: str
+
+    def run_in_worker(self) -> None: ...
+
+    def finish(self) -> None: ...
+
+
+class ElasticThreadPool:
+    """弹性线程池"""
+
+    def __init__(self, idle_timeout: float = IDLE_WORKER_TIMEOUT) -> None:
+        """
+        Args:
+            idle_timeout (float, optional): 工作线程空闲多久 (秒) 后退出
+        """
+        self.idle_timeout = idle_timeout
+        self._cond = threading.Condition()
+        # 可立即执行的任务
+        self._ready: collections.deque = collections.deque()
+        self._idle_workers = 0
+        self._workers = 0
+        # 类别 -> 上限 / 运行中数量 / 因达到上限而排队的任务
+        self._limits: dict[str, int] = {}
+        self._running_by_category: collections.Counter = collections.Counter()
+        self._queued_by_category: dict[str, collections.deque] = {}
+        # id(任务) -> 任务
+        self._tasks: dict[int, PoolTask] = {}
+        self.started = 0
+        self.completed = 0
+
+    def set_limit(self, category: str, limit: int | None) -> None:
+        """设置某个类别同时运行的任务数上限
+
+        Args:
+            category (str): 类别 (任务的 usage)
+            limit (int | None): 上限, 为 None 时取消限制
+        """
+        with self._cond:
+            if limit is None:
+                self._limits.pop(category, None)
+            else:
+                self._limits[category] = max(1, limit)
+            self._drain_category(category)
+
+    def submit(self, task: PoolTask) -> None:
+        """提交一个任务
+
+        Args:
+            task (PoolTask): 任务
+        """
+        with self._cond:
+            self._tasks[id(task)] = task
+            limit = self._limits.get(task.category)
+            if limit is not None and self._running_by_category[task.category] >= limit:
+                self._queued_by_category.setdefault(
+                    task.category, collections.deque()
+                ).append(task)
+                return
+            self._schedule(task)
+
+    def _schedule(self, task: PoolTask) -> None:
+        self._running_by_category[task.category] += 1
+        self._ready.append(task)
+        if self._idle_workers > len(self._ready) - 1:
+            self._cond.notify()
+        else:
+            self._workers += 1
+            threading.Thread(target=self._work, daemon=True).start()
+
+    def _drain_category(self, category: str) -> None:
+        queued = self._queued_by_category.get(category)
+        limit = self._limits.get(category)
+        while queued and (limit is None or self._running_by_category[category] < limit):
+            self._schedule(queued.popleft())
+        if not queued:
+            self._queued_by_category.pop(category, None)
+
+    def _task_done(self, task: PoolTask) -> None:
+        with self._cond:
+            if self._tasks.pop(id(task), None) is None:
+                return
+            self.completed += 1
+            self._running_by_category[task.category] -= 1
+            if self._running_by_category[task.category] <= 0:
+                del self._running_by_category[task.category]
+            self._drain_category(task.category)
+
+    def cancel_queued(self, task: PoolTask) -> bool:
+        """取消一个仍在排队的任务
+
+        Args:
+            task (PoolTask): 任务
+
+        Returns:
+            bool: 任务是否仍在排队并已被取消
+        """
+        with self._cond:
+            queued = self._queued_by_category.get(task.category)
+            if not queued or task not in queued:
+                return False
+            queued.remove(task)
+            if not queued:
+                del self._queued_by_category[task.category]
+            del self._tasks[id(task)]
+            return True
+
+    def _work(self) -> None:
+        thread = threading.current_thread()
+        while True:
+            with self._cond:
+                deadline = time.monotonic() + self.idle_timeout
+                while not self._ready:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._workers -= 1
+                        return
+                    self._idle_workers += 1
+                    self._cond.wait(remaining)
+                    self._idle_workers -= 1
+                task = self._ready.popleft()
+                self.started += 1
+            thread.name = f"ToolDelta: {task.category}"
+            # stop() 的异步异常 (SystemExit) 可能在任务刚结束时才送达, 不能让它结束工作线程;
+            # 任务自身的报错已由任务处理. finish() 会清除尚未送达的异步异常, 被打断时重试即可
+            with contextlib.suppress(SystemExit):
+                task.run_in_worker()
+            while True:
+                try:
+                    task.finish()
+                    break
+                except SystemExit:
+                    continue
+            self._task_done(task)
+
+    def tasks(self) -> list[Any]:
+        """获取所有运行中与排队中的任务"""
+        with self._cond:
+            return list(self._tasks.values())
+
+    def stats(self) -> dict[str, Any]:
+        """获取线程池的统计数据
+
+        Returns:
+            dict[str, Any]: 工作线程数, 空闲数, 各类别运行中与排队的任务数, 累计开始与完成的任务数
+        """
+        with self._cond:
+            return {
+                "workers": self._workers,
+                "idle": self._idle_workers,
+                "running": dict(self._running_by_category),
+                "queued": {k: len(v) for k, v in self._queued_by_category.items()},
+                "limits": dict(self._limits),
+                "started": self.started,
+                "completed": self.completed,
+            }
+
+
+thread_pool = ElasticThreadPool()
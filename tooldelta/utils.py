@@ -1,6 +1,8 @@
 """提供了一些实用方法的类"""
 
-import copy
+import asyncio
+import collections
+import contextlib
 import ctypes
 import json as rjson
 import os
@@ -14,10 +16,14 @@ import ujson as json
 
 from .color_print import Print
 from .constants import TOOLDELTA_PLUGIN_DATA_DIR
+from .frozen_json import JsonListView, JsonView, freeze, json_copy
+from .kv_store import KVStore, close_all_stores, open_store
+from .thread_pool import thread_pool
 
 event_pool = {"tmpjson_save": threading.Event()}
 event_flags_pool = {"tmpjson_save": True}
-threads_list: list["Utils.createThread"] = []
+# JSON 缓存文件的存盘间隔 (秒)
+TMPJSON_SAVE_INTERVAL = 60
 
 
 class Utils:
@@ -26,8 +32,14 @@ class Utils:
     class ThreadExit(SystemExit):
         """线程退出."""
 
+    class ChatbarLockBusy(Exception):
+        """异步使用聊天栏锁时, 锁被占用且等待超时."""
+
     class ToolDeltaThread(threading.Thread):
-        """简化 ToolDelta 子线程创建的 threading.Thread 的子类."""
+        """简化 ToolDelta 子线程创建的 threading.Thread 的子类.
+
+        任务由弹性线程池 (thread_pool) 中的工作线程执行, 而不是自己新建线程;
+        join / is_alive / ident / native_id / name / daemon 等接口与 threading.Thread 一致."""
 
         def __init__(
             self, func: Callable, args: Iterable[Any] = (), usage="", **kwargs
@@ -37,36 +49,81 @@ class Utils:
             Args:
                 func (Callable): 线程方法
                 args (tuple, optional): 方法的参数项
-                usage (str, optional): 线程的用途说明
+                usage (str, optional): 线程的用途说明, 同时作为线程池中的任务类别
                 kwargs (dict, optional): 方法的关键词参数项
             """
-            super().__init__(target=func)
+            self.category = usage or getattr(func, "__name__", "")
+            super().__init__(target=func, name=self.category, daemon=True)
             self.func = func
-            self.daemon = True
             self.all_args = [args, kwargs]
             self.usage = usage
-            self.start()
             self.stopping = False
-            self._thread_id = None
+            self._state_lock = threading.Lock()
+            self._done = threading.Event()
+            thread_pool.submit(self)
+
+        def start(self) -> None:
+            """创建时即已提交给线程池, 为兼容保留"""
+
+        def run_in_worker(self) -> None:
+            """由线程池的工作线程调用"""
+            with self._state_lock:
+                if self.stopping:
+                    return
+                # threading.Thread 的 ident / native_id 属性读取这两个字段
+                self._ident = threading.get_ident()
+                self._native_id = threading.get_native_id()
+                self._started.set()
+            self.run()
 
         def run(self) -> None:
             """线程运行方法"""
-            threads_list.append(self)
             try:
                 self.func(*self.all_args[0], **self.all_args[1])
             except SystemExit:
                 pass
             except ValueError as e:
                 if str(e) != "未连接到游戏":
-                    raise
-                Print.print_war(f"线程 {self.usage} 因游戏断开连接被迫中断")
+                    Print.print_err(
+                        f"线程 {self.usage or self.func.__name__} 出错:\n"
+                        + traceback.format_exc()
+                    )
+                else:
+                    Print.print_war(f"线程 {self.usage} 因游戏断开连接被迫中断")
             except Exception:
                 Print.print_err(
                     f"线程 {self.usage or self.func.__name__} 出错:\n"
                     + traceback.format_exc()
                 )
-            finally:
-                threads_list.remove(self)
+
+        def finish(self) -> None:
+            """由线程池的工作线程在任务结束后调用"""
+            with self._state_lock:
+                if self._ident is not None:
+                    # 清除 stop() 设下但尚未送达的异步异常, 以免影响该工作线程的下一个任务
+                    ctypes.pythonapi.PyThreadState_SetAsyncExc(
+                        ctypes.c_ulong(self._ident), None
+                    )
+                    self._ident = None
+                    self._native_id = None
+                self._done.set()
+
+        def is_alive(self) -> bool:
+            """任务是否仍在运行或排队"""
+            return not self._done.is_set()
+
+        def join(self, timeout: float | None = None) -> None:
+            """等待任务结束
+
+            Args:
+                timeout (float | None, optional): 最长等待时间 (秒)
+
+            Raises:
+                RuntimeError: 在任务自身中等待自己结束
+            """
+            if self._ident == threading.get_ident() and not self._done.is_set():
+                raise RuntimeError("cannot join current thread")
+            self._done.wait(timeout)
 
         def get_id(self) -> int:
             """获取线程的 ID
@@ -77,61 +134,87 @@ class Utils:
             Returns:
                 int: 线程 ID
             """
-            if self._thread_id is None:
-                for thread in threading.enumerate():
-                    if thread is self:
-                        self._thread_id = thread.ident
-                        break
-            if self._thread_id is None:
+            if self.ident is None:
                 raise RuntimeError("Could not determine the thread's ID")
-            return self._thread_id
+            return self.ident
 
         def stop(self) -> None:
             """终止线程"""
-            self.stopping = True
-            self._thread_id = self.ident
-            thread_id = self.get_id()
-            res = ctypes.pythonapi.PyThreadState_SetAsyncExc(
-                thread_id, ctypes.py_object(SystemExit)
-            )
+            with self._state_lock:
+                self.stopping = True
+                if self._done.is_set():
+                    return
+                # 释放锁后 ident 可能变化 (如任务结束, 工作线程接手下一个任务), 只读取一次
+                ident = self._ident
+                if ident is None:
+                    # 尚未开始运行, 取消排队即可
+                    if thread_pool.cancel_queued(self):
+                        self._done.set()
+                    return
+                res = ctypes.pythonapi.PyThreadState_SetAsyncExc(
+                    ctypes.c_ulong(ident), ctypes.py_object(SystemExit)
+                )
             if res > 1:
-                ctypes.pythonapi.PyThreadState_SetAsyncExc(thread_id, 0)
+                ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(ident), None)
                 Print.print_err(f"§c终止线程 {self.name} 失败")
 
     createThread = ClassicThread = ToolDeltaThread
 
     class TMPJson:
-        """提供了加载、卸载、读取和写入 JSON 文件到缓存区的方法的类."""
+        """提供了加载、卸载、读取和写入 JSON 文件到缓存区的方法的类.
+
+        各虚拟路径按哈希分配到固定数量的锁上, 同一路径的加载, 写入与存盘互斥,
+        不同路径之间基本互不阻塞; 存盘时只在复制内容期间持有锁, 序列化与写盘不阻塞读写.
+        write 与 update 总是换入新的对象而不修改缓存中原有的对象 (写时复制),
+        因此 read_view 返回的视图是读取那一刻的快照, 之后的写入不会改变它.
+        """
+
+        @staticmethod
+        def _lock_of(path: str) -> threading.RLock:
+            return jsonPathLocks[hash(path) % len(jsonPathLocks)]
 
         @staticmethod
-        def loadPathJson(path: str, needFileExists: bool = True) -> None:
+        def _save_lock_of(path: str) -> threading.RLock:
+            # 需要同时持有两把锁时, 总是先获取存盘锁
+            return jsonSaveLocks[hash(path) % len(jsonSaveLocks)]
+
+        @staticmethod
+        def loadPathJson(
+            path: str, needFileExists: bool = True, compact: bool = False
+        ) -> None:
             """
             将 json 文件从磁盘加载到缓存区，以便快速读写.
             在缓存文件已加载的情况下，再使用一次该方法不会有任何作用.
+            缓存区只会在内容被写入后才会存盘, 存盘时先写入临时文件再替换原文件, 不会因中途崩溃而损坏.
 
             Args:
                 path (str): 作为文件的磁盘内路径的同时也会作为在缓存区的虚拟路径
                 needFileExists (bool, optional): 默认为 True, 为 False 时，若文件路径不存在，就会自动创建一个文件，且默认值为 null
+                compact (bool, optional): 存盘时是否不缩进, 适合体积较大的文件
 
             Raises:
                 err: 文件不存在时
             """
-            if path in jsonPathTmp:
-                return
-            try:
-                with open(path, "r", encoding="utf-8") as file:
-                    js = Utils.SimpleJsonDataReader.SafeJsonLoad(file)
-            except FileNotFoundError as err:
-                if not needFileExists:
-                    js = None
-                else:
-                    raise err from None
-            jsonPathTmp[path] = [False, js]
+            with Utils.TMPJson._lock_of(path):
+                if path in jsonPathTmp:
+                    return
+                try:
+                    with open(path, "r", encoding="utf-8") as file:
+                        js = Utils.SimpleJsonDataReader.SafeJsonLoad(file)
+                except FileNotFoundError as err:
+                    if not needFileExists:
+                        js = None
+                    else:
+                        raise err from None
+                if compact:
+                    jsonCompactPaths.add(path)
+                jsonPathTmp[path] = [False, js]
 
         @staticmethod
         def unloadPathJson(path: str) -> bool:
             """
             将 json 文件从缓存区卸载 (保存内容到磁盘), 之后不能再在缓存区对这个文件进行读写.
+            存盘失败时不会卸载, 缓存中的改动得以保留.
             在缓存文件已卸载的情况下，再使用一次该方法不会有任何作用，但是可以通过其返回的值来知道存盘有没有成功.
 
             Args:
@@ -140,14 +223,60 @@ class Utils:
             Returns:
                 bool: 存盘是否成功
             """
-            if jsonPathTmp.get(path) is not None:
-                isChanged, dat = jsonPathTmp[path]
-                if isChanged:
-                    with open(path, "w", encoding="utf-8") as file:
-                        Utils.SimpleJsonDataReader.SafeJsonDump(dat, file)
+            with Utils.TMPJson._save_lock_of(path), Utils.TMPJson._lock_of(path):
+                if jsonPathTmp.get(path) is None:
+                    jsonUnloadPathTmp.pop(path, None)
+                    return False
+                if Utils.TMPJson.save(path) is False:
+                    # 存盘失败时保留缓存, 稍后再尝试卸载, 以免丢失未保存的改动
+                    if path in jsonUnloadPathTmp:
+                        jsonUnloadPathTmp[path] = (
+                            int(time.time()) + TMPJSON_SAVE_INTERVAL
+                        )
+                    return False
+                jsonUnloadPathTmp.pop(path, None)
                 del jsonPathTmp[path]
+                jsonCompactPaths.discard(path)
                 return True
-            return False
+
+        @staticmethod
+        def save(path: str) -> bool | None:
+            """
+            若缓存区的该虚拟路径的文件有改动，立即将其存盘
+
+            Args:
+                path (str): 文件的虚拟路径
+
+            Returns:
+                bool | None: 存盘是否成功, 文件未改动或未加载时为 None
+            """
+            # 同一路径的存盘依次进行, 保证较新的内容不会被较旧的覆盖
+            with Utils.TMPJson._save_lock_of(path):
+                with Utils.TMPJson._lock_of(path):
+                    entry = jsonPathTmp.get(path)
+                    if entry is None or not entry[0]:
+                        return None
+                    # 先清除改动标记, 存盘期间的新写入会在下次存盘时保存
+                    entry[0] = False
+                    snapshot = json_copy(entry[1])
+                    indent = 0 if path in jsonCompactPaths else 4
+                try:
+                    Utils.JsonIO.AtomicJsonDump(snapshot, path, indent=indent)
+                except (OSError, TypeError, ValueError, OverflowError) as err:
+                    # 写盘失败或内容无法序列化
+                    with Utils.TMPJson._lock_of(path):
+                        if jsonPathTmp.get(path) is entry:
+                            entry[0] = True
+                    Print.print_err(f"JSON 缓存文件 {path} 存盘失败: {err}")
+                    return False
+                return True
+
+        @staticmethod
+        def flush() -> None:
+            """立即将缓存区内所有有改动的文件存盘, 未改动的文件不会被写入"""
+            for path, (isChanged, _) in list(jsonPathTmp.items()):
+                if isChanged:
+                    Utils.TMPJson.save(path)
 
         @staticmethod
         def read(path: str) -> Any:
@@ -162,29 +291,51 @@ class Utils:
             Returns:
                 list[Any] | dict[Any, Any] | Any: 该虚拟路径的 JSON
             """
-            if path in jsonPathTmp:
+            with Utils.TMPJson._lock_of(path):
                 val = jsonPathTmp.get(path)
                 if val is not None:
                     val = val[1]
                     if isinstance(val, (list, dict)):
-                        val = copy.deepcopy(val)
+                        val = json_copy(val)
                     return val
             raise ValueError("json 路径未初始化，不能进行读取和写入操作：" + path)
 
+        @staticmethod
+        def read_view(path: str) -> Any:
+            """对缓存区的该虚拟路径的文件进行只读操作，不进行任何复制
+            适合只读取数据的场合; 需要修改时对返回值调用 thaw() 获取可修改的深拷贝.
+            返回的视图是读取时内容的快照, 之后通过 write/update 写入的内容不会反映在其中
+
+            Args:
+                path (str): 文件的虚拟路径
+
+            Raises:
+                Exception: json 路径未初始化，不能进行读取和写入操作
+
+            Returns:
+                JsonView | JsonListView | Any: 该虚拟路径的 JSON 的只读视图
+            """
+            with Utils.TMPJson._lock_of(path):
+                val = jsonPathTmp.get(path)
+            if val is not None:
+                return freeze(val[1])
+            raise ValueError("json 路径未初始化，不能进行读取和写入操作：" + path)
+
         @staticmethod
         def get(path: str) -> None:
             """
             直接获取缓存区的该虚拟路径的 JSON, 不使用 copy
+            返回的对象是读取时内容的快照, 之后通过 write/update 写入的内容不会反映在其中;
+            直接修改它会改动缓存 (但不会被标记为需要存盘)
             WARNING: 如果你不知道有什么后果，请老老实实使用`read(...)`而不是`get(...)`!
 
             Args:
                 path (str): 文件的虚拟路径
             """
-            if path in jsonPathTmp:
+            with Utils.TMPJson._lock_of(path):
                 val = jsonPathTmp.get(path)
-                if val is not None:
-                    val = val[1]
-                    return val
+            if val is not None:
+                return val[1]
             raise ValueError("json 路径未初始化，不能进行读取和写入操作：" + path)
 
         @staticmethod
@@ -196,14 +347,53 @@ class Utils:
                 path (str): 文件的虚拟路径
                 obj (Any): 任何合法的 JSON 类型 例如 dict/list/str/bool/int/float
             """
-            if path in jsonPathTmp:
+            if isinstance(obj, (JsonView, JsonListView)):
+                obj = obj.thaw()
+            with Utils.TMPJson._lock_of(path):
+                if path in jsonPathTmp:
+                    jsonPathTmp[path] = [True, obj]
+                else:
+                    raise ValueError(
+                        "json 路径未初始化，不能进行读取和写入操作：" + path
+                    )
+
+        @staticmethod
+        def update(path: str, func: Callable[[Any], Any]) -> Any:
+            """
+            对缓存区的该虚拟路径的文件进行原子的读-改-写操作,
+            期间其他线程对该路径的写入都会等待, 不会丢失任何一方的修改.
+            func 收到的是当前内容的深拷贝, 修改它不会影响已被 read_view/get 取走的快照
+
+            Args:
+                path (str): 文件的虚拟路径
+                func (Callable[[Any], Any]): 接收当前的 JSON 对象 (的拷贝) 并返回新的 JSON 对象,
+                    可以直接修改传入的对象后将其返回
+
+            Raises:
+                Exception: json 路径未初始化，不能进行读取和写入操作
+
+            Returns:
+                Any: 新的 JSON 对象
+            """
+            with Utils.TMPJson._lock_of(path):
+                entry = jsonPathTmp.get(path)
+                if entry is None:
+                    raise ValueError(
+                        "json 路径未初始化，不能进行读取和写入操作：" + path
+                    )
+                obj = entry[1]
+                obj = func(json_copy(obj) if isinstance(obj, (list, dict)) else obj)
+                if isinstance(obj, (JsonView, JsonListView)):
+                    obj = obj.thaw()
                 jsonPathTmp[path] = [True, obj]
-            else:
-                raise ValueError("json 路径未初始化，不能进行读取和写入操作：" + path)
+                return obj
 
         @staticmethod
         def read_as_tmp(
-            path: str, needFileExists: bool = True, timeout: int = 60
+            path: str,
+            needFileExists: bool = True,
+            timeout: int = 60,
+            compact: bool = False,
         ) -> Any:
             """读取 json 文件并将其从磁盘加载到缓存区，以便一段时间内能快速读写.
 
@@ -211,18 +401,24 @@ class Utils:
                 path (str): 作为文件的磁盘内路径的同时也会作为在缓存区的虚拟路径
                 needFileExists (bool, optional): 默认为 True, 为 False 时，若文件路径不存在，就会自动创建一个文件，且写入默认值 null
                 timeout (int, optional): 多久没有再进行读取操作时卸载缓存
+                compact (bool, optional): 存盘时是否不缩进
 
             Returns:
                 Any: 该虚拟路径的 JSON
             """
-            if path not in jsonUnloadPathTmp and path not in jsonPathTmp:
-                jsonUnloadPathTmp[path] = timeout + int(time.time())
-                Utils.TMPJson.loadPathJson(path, needFileExists)
-            return Utils.TMPJson.read(path)
+            with Utils.TMPJson._lock_of(path):
+                if path not in jsonUnloadPathTmp and path not in jsonPathTmp:
+                    jsonUnloadPathTmp[path] = timeout + int(time.time())
+                    Utils.TMPJson.loadPathJson(path, needFileExists, compact)
+                return Utils.TMPJson.read(path)
 
         @staticmethod
         def write_as_tmp(
-            path: str, obj: Any, needFileExists: bool = True, timeout: int = 60
+            path: str,
+            obj: Any,
+            needFileExists: bool = True,
+            timeout: int = 60,
+            compact: bool = False,
         ) -> None:
             """写入 json 文件并将其从磁盘加载到缓存区，以便一段时间内能快速读写.
 
@@ -231,16 +427,19 @@ class Utils:
                 obj (Any): 任何合法的 JSON 类型 例如 dict/list/str/bool/int/float
                 needFileExists (bool, optional): 默认为 True, 为 False 时，若文件路径不存在，就会自动创建一个文件，且写入默认值 null
                 timeout (int, optional): 多久没有再进行读取操作时卸载缓存
+                compact (bool, optional): 存盘时是否不缩进
             """
-            if path not in jsonUnloadPathTmp and path not in jsonPathTmp:
-                jsonUnloadPathTmp[path] = timeout + int(time.time())
-                Utils.TMPJson.loadPathJson(path, needFileExists)
-            Utils.TMPJson.write(path, obj)
+            with Utils.TMPJson._lock_of(path):
+                if path not in jsonUnloadPathTmp and path not in jsonPathTmp:
+                    jsonUnloadPathTmp[path] = timeout + int(time.time())
+                    Utils.TMPJson.loadPathJson(path, needFileExists, compact)
+                Utils.TMPJson.write(path, obj)
 
         @staticmethod
         def cancel_change(path: str) -> None:
             """取消缓存 json 所做的更改，非必要情况请勿调用，你不知道什么时候会自动保存所做更改"""
-            jsonPathTmp[path][0] = False
+            with Utils.TMPJson._lock_of(path):
+                jsonPathTmp[path][0] = False
 
         @staticmethod
         def get_tmps() -> dict:
@@ -265,6 +464,29 @@ class Utils:
                 with fp:
                     fp.write(json.dumps(obj, indent=indent, ensure_ascii=False))
 
+        @staticmethod
+        def AtomicJsonDump(obj: Any, path: str, indent=4) -> None:
+            """将一个 json 对象原子地写入一个文件:
+            先写入同目录下的临时文件并刷入磁盘, 再替换原文件, 中途崩溃不会损坏原文件.
+
+            Args:
+                obj (Any): JSON 对象
+                path (str): 文件路径
+                indent (int, optional): 缩进, 为 0 时不缩进也不换行
+            """
+            content = json.dumps(obj, indent=indent, ensure_ascii=False)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as file:
+                    file.write(content)
+                    file.flush()
+                    os.fsync(file.fileno())
+                os.replace(tmp_path, path)
+            except BaseException:
+                with contextlib.suppress(OSError):
+                    os.remove(tmp_path)
+                raise
+
         @staticmethod
         def SafeJsonLoad(fp: TextIOWrapper | str) -> Any:
             """从一个文件读取 json 对象，会自动关闭文件读写接口.
@@ -342,12 +564,30 @@ class Utils:
             ) as f:
                 Utils.JsonIO.SafeJsonDump(obj, f, indent=indent)
 
+        @staticmethod
+        def openKVStore(plugin_name: str, name: str = "data") -> KVStore:
+            """打开插件数据文件夹内的一个键值库, 适合按键 (如玩家名) 频繁读写的小块数据.
+            同一个库只会被打开一次, 可在多个线程中使用.
+
+            Args:
+                plugin_name (str): 插件名
+                name (str, optional): 库名
+
+            Returns:
+                KVStore: 键值库, 提供 get/put/delete/scan/transaction 等方法
+            """
+            return open_store(plugin_name, name)
+
     SimpleJsonDataReader = JsonIO
 
     class ChatbarLock:
         r"""
         聊天栏锁, 用于防止玩家同时开启多个聊天栏对话\n
-        调用了该锁的所有代码, 在另一个进程使用该锁的时候, 尝试调用其他锁会导致进程直接退出, 直到此锁退出为止\n
+        默认情况下, 在另一个进程使用该玩家的锁的时候, 尝试调用其他锁会导致进程直接退出 (引发 SystemExit), 直到此锁退出为止\n
+        在异步函数中使用 (async with) 时则引发 Utils.ChatbarLockBusy, 以免 SystemExit 停止注入式插件的事件循环\n
+        传入 timeout 时则会排队等待锁被释放, 超时后才退出; 也可以使用 acquire() / release() 自行处理\n
+        每个玩家有一个先进先出的等待队列, 释放锁时直接交给队首的等待者:
+        同步等待者由 threading.Event 唤醒, 异步等待者由其事件循环中的 Future 唤醒\n
         示例(以类式插件为例):
         ```python
         class MyPlugin(Plugin):
@@ -358,33 +598,238 @@ class Utils:
                     # 则在上面就会直接引发 SystemExit
                     ...
         ```
-        示例(以注入式插件为例):
+        示例(以注入式插件为例, 等待最多 10 秒; 异步函数中需要等待时必须使用 async with):
         ```
         @player_message()
         async def onPlayerChat(info: player_message_info):
-            with ChatbarLock(info.playername):
+            async with ChatbarLock(info.playername, timeout=10):
                 ...
         ```
         """
 
-        def __init__(self, player: str, oth_cb: Callable[[str], None] = lambda _: None):
+        def __init__(
+            self,
+            player: str,
+            oth_cb: Callable[[str], None] = lambda _: None,
+            timeout: float | None = 0,
+        ):
+            """
+            Args:
+                player (str): 玩家名
+                oth_cb (Callable[[str], None], optional): 未能获得锁时调用, 参数为玩家名
+                timeout (float | None, optional): 锁被占用时最多排队等待多久 (秒),
+                    0 为不等待, None 为一直等待
+            """
             self.player = player
             self.oth_cb = oth_cb
+            self.timeout = timeout
+            # 排队等待时的唤醒方式: 同步等待用 _event, 异步等待用 _loop 中的 _future
+            self._event: threading.Event | None = None
+            self._loop: asyncio.AbstractEventLoop | None = None
+            self._future: asyncio.Future | None = None
+            # 锁已交给自己 / 已放弃等待
+            self._granted = False
+            self._cancelled = False
+
+        def _try_take(self, timeout: float | None) -> bool:
+            # 须持有 chatbar_lock_mutex; 锁空闲时直接获得, 否则记一次争用
+            if self.player not in chatbar_lock_holders:
+                chatbar_lock_holders[self.player] = self
+                chatbar_lock_stats["acquired"] += 1
+                return True
+            chatbar_lock_stats["contended"] += 1
+            if timeout == 0:
+                chatbar_lock_stats["aborted"] += 1
+            return False
+
+        def _enqueue(self) -> None:
+            # 须持有 chatbar_lock_mutex
+            self._granted = self._cancelled = False
+            waiters = chatbar_lock_waiters.get(self.player)
+            if waiters is None:
+                waiters = chatbar_lock_waiters[self.player] = collections.deque()
+            waiters.append(self)
+
+        def _wake(self) -> bool:
+            # 须持有 chatbar_lock_mutex; 返回是否成功通知了等待者
+            if self._future is None:
+                assert self._event is not None
+                self._event.set()
+                return True
+            assert self._loop is not None
+            try:
+                self._loop.call_soon_threadsafe(_set_future_done, self._future)
+            except RuntimeError:
+                # 等待者所在的事件循环已关闭
+                return False
+            return True
+
+        def _release_locked(self) -> None:
+            # 须持有 chatbar_lock_mutex 且自己持有锁; 将锁交给下一个仍在等待的等待者
+            waiters = chatbar_lock_waiters.get(self.player)
+            while waiters:
+                waiter = waiters.popleft()
+                if waiter._cancelled:
+                    continue
+                chatbar_lock_holders[self.player] = waiter
+                waiter._granted = True
+                if waiter._wake():
+                    if not waiters:
+                        del chatbar_lock_waiters[self.player]
+                    return
+                waiter._granted = False
+                waiter._cancelled = True
+            chatbar_lock_waiters.pop(self.player, None)
+            del chatbar_lock_holders[self.player]
+
+        def _finish_wait(self, start: float) -> bool:
+            # 等待结束 (被唤醒, 超时或被取消) 后调用, 返回是否获得了锁
+            waited = time.monotonic() - start
+            with chatbar_lock_mutex:
+                chatbar_lock_stats["wait_time"] += waited
+                if self._granted:
+                    chatbar_lock_stats["acquired"] += 1
+                    chatbar_lock_stats["max_wait"] = max(
+                        chatbar_lock_stats["max_wait"], waited
+                    )
+                    return True
+                # 只标记为放弃, 由释放锁的一方跳过; 恰好位于队尾时直接移除
+                self._cancelled = True
+                waiters = chatbar_lock_waiters.get(self.player)
+                if waiters and waiters[-1] is self:
+                    waiters.pop()
+                    if not waiters:
+                        del chatbar_lock_waiters[self.player]
+                chatbar_lock_stats["aborted"] += 1
+                return False
+
+        def acquire(self, timeout: float | None = 0) -> bool:
+            """尝试获得锁
+
+            Args:
+                timeout (float | None, optional): 最多排队等待多久 (秒), 0 为不等待, None 为一直等待
+
+            Raises:
+                RuntimeError: 在异步函数中同步等待锁 (会阻塞事件循环), 应使用 acquire_async
+
+            Returns:
+                bool: 是否获得了锁
+            """
+            if timeout != 0 and _in_running_event_loop():
+                raise RuntimeError(
+                    "不能在异步函数中同步等待聊天栏锁, 请使用 async with ChatbarLock"
+                )
+            with chatbar_lock_mutex:
+                if self._try_take(timeout):
+                    return True
+                if timeout == 0:
+                    return False
+                self._event = threading.Event()
+                self._future = self._loop = None
+                self._enqueue()
+            start = time.monotonic()
+            self._event.wait(timeout)
+            return self._finish_wait(start)
+
+        async def acquire_async(self, timeout: float | None = 0) -> bool:
+            """在异步函数中尝试获得锁, 等待期间不会阻塞事件循环
+
+            Args:
+                timeout (float | None, optional): 最多排队等待多久 (秒), 0 为不等待, None 为一直等待
+
+            Returns:
+                bool: 是否获得了锁
+            """
+            with chatbar_lock_mutex:
+                if self._try_take(timeout):
+                    return True
+                if timeout == 0:
+                    return False
+                self._event = None
+                self._loop = asyncio.get_running_loop()
+                self._future = self._loop.create_future()
+                self._enqueue()
+            start = time.monotonic()
+            try:
+                await asyncio.wait((self._future,), timeout=timeout)
+            except BaseException:
+                # 等待中被取消: 锁已交给自己时立即释放, 以免卡住后面的等待者
+                if self._finish_wait(start):
+                    self.release()
+                raise
+            return self._finish_wait(start)
+
+        def release(self) -> None:
+            """释放锁"""
+            with chatbar_lock_mutex:
+                if chatbar_lock_holders.get(self.player) is self:
+                    self._release_locked()
+
+        def _on_busy(self, in_async: bool = False):
+            self.oth_cb(self.player)
+            Print.print_war(f"玩家 {self.player} 的线程锁正在锁定状态")
+            if in_async:
+                raise Utils.ChatbarLockBusy(self.player)
+            raise SystemExit
 
         def __enter__(self):
-            if self.player in chatbar_lock_list:
-                self.oth_cb(self.player)
-                Print.print_war(f"玩家 {self.player} 的线程锁正在锁定状态")
-                raise SystemExit
-            chatbar_lock_list.append(self.player)
+            if not self.acquire(self.timeout):
+                self._on_busy()
+            return self
 
         def __exit__(self, e, e2, e3):
-            chatbar_lock_list.remove(self.player)
+            self.release()
+
+        async def __aenter__(self):
+            if not await self.acquire_async(self.timeout):
+                self._on_busy(in_async=True)
+            return self
+
+        async def __aexit__(self, e, e2, e3):
+            self.release()
+
+        @staticmethod
+        def locked(player: str) -> bool:
+            """玩家的聊天栏锁是否正被占用"""
+            return player in chatbar_lock_holders
+
+        @staticmethod
+        def stats() -> dict[str, Any]:
+            """获取聊天栏锁的统计数据
+
+            Returns:
+                dict[str, Any]: 占用中的锁与排队数, 获得, 需要等待与放弃的次数, 累计与最长等待时间 (秒)
+            """
+            with chatbar_lock_mutex:
+                return {
+                    "locked": len(chatbar_lock_holders),
+                    "waiting": sum(
+                        not waiter._cancelled
+                        for waiters in chatbar_lock_waiters.values()
+                        for waiter in waiters
+                    ),
+                    **chatbar_lock_stats,
+                }
 
     @staticmethod
     def get_threads_list() -> list["Utils.createThread"]:
-        """返回使用 createThread 创建的全线程列表。"""
-        return threads_list
+        """返回使用 createThread 创建的全线程列表 (包括排队中的)。"""
+        return thread_pool.tasks()
+
+    @staticmethod
+    def set_thread_limit(usage: str, limit: int | None) -> None:
+        """限制某种用途的线程同时运行的数量, 超出的线程排队等待
+
+        Args:
+            usage (str): 线程的用途说明 (createThread 的 usage 参数)
+            limit (int | None): 上限, 为 None 时取消限制
+        """
+        thread_pool.set_limit(usage, limit)
+
+    @staticmethod
+    def get_thread_stats() -> dict[str, Any]:
+        """获取线程池的统计数据, 包括各用途运行中与排队的线程数"""
+        return thread_pool.stats()
 
     @staticmethod
     def simple_fmt(kw: dict[str, Any], sub: str) -> str:
@@ -483,6 +928,7 @@ def safe_close() -> None:
     """安全关闭"""
     event_pool["tmpjson_save"].set()
     event_flags_pool["tmpjson_save"] = False
+    close_all_stores()
 
 
 @Utils.thread_func("JSON 缓存文件定时保存")
@@ -492,20 +938,50 @@ def tmpjson_save_thread():
     while 1:
         evt.wait(2)
         secs += 2
-        if secs >= 60:
+        if secs >= TMPJSON_SAVE_INTERVAL:
             secs = 0
-            for k, (isChanged, dat) in jsonPathTmp.copy().items():
-                if isChanged:
-                    Utils.SimpleJsonDataReader.SafeJsonDump(dat, k)
-                    jsonPathTmp[k][0] = False
-        for k, v in jsonUnloadPathTmp.copy().items():
+            # 同一文件在间隔内的多次写入只会存盘一次
+            Utils.TMPJson.flush()
+        for k, v in list(jsonUnloadPathTmp.items()):
             if time.time() - v > 0:
                 Utils.TMPJson.unloadPathJson(k)
-                del jsonUnloadPathTmp[k]
         if not event_flags_pool["tmpjson_save"]:
+            # 退出前保存剩余的改动
+            Utils.TMPJson.flush()
             return
 
 
 jsonPathTmp = {}
-chatbar_lock_list = []
+jsonCompactPaths: set[str] = set()
+# 按路径哈希分片的锁, 见 Utils.TMPJson
+TMPJSON_LOCK_STRIPES = 64
+jsonPathLocks = [threading.RLock() for _ in range(TMPJSON_LOCK_STRIPES)]
+jsonSaveLocks = [threading.RLock() for _ in range(TMPJSON_LOCK_STRIPES)]
+# 玩家名 -> 持有该玩家聊天栏锁的 ChatbarLock / 排队等待的 ChatbarLock
+chatbar_lock_holders: dict[str, "Utils.ChatbarLock"] = {}
+chatbar_lock_waiters: dict[str, collections.deque] = {}
+chatbar_lock_mutex = threading.Lock()
+chatbar_lock_stats: dict[str, Any] = {
+    "acquired": 0,
+    "contended": 0,
+    "aborted": 0,
+    "wait_time": 0.0,
+    "max_wait": 0.0,
+}
+
+
+def _set_future_done(fut: asyncio.Future) -> None:
+    # 在等待者的事件循环中调用; 等待已被取消时忽略
+    if not fut.done():
+        fut.set_result(None)
+
+
+def _in_running_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
 jsonUnloadPathTmp = {}